@@ -1,19 +1,36 @@
 #!/usr/bin/env python3
 """Claude Code <-> Telegram Bridge"""
 
+import calendar
+import gzip
 import hashlib
+import heapq
 import os
 import json
+import random
+import struct
 import re
+import select
 import shlex
+import signal
+import socket
+import sqlite3
+import statistics
 import subprocess
+import sys
 import threading
+import tempfile
 import time
+import urllib.error
 import urllib.request
-from datetime import datetime, timedelta, timezone
+import uuid
+import zlib
+from array import array
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 def _load_config_env() -> dict[str, str]:
     """Load defaults from config.env (single source of truth)."""
@@ -32,6 +49,11 @@ def _load_config_env() -> dict[str, str]:
 
 _CONFIG = _load_config_env()
 
+
+def _config_value(name: str, default: str = "") -> str:
+    return os.environ.get(name, _CONFIG.get(f"DEFAULT_{name}", default)).strip()
+
+
 TMUX_SESSION = os.environ.get("TMUX_SESSION", _CONFIG.get("DEFAULT_TMUX_SESSION", "claude"))
 CHAT_ID_FILE = os.path.expanduser("~/.claude/telegram_chat_id")
 PENDING_FILE = os.path.expanduser("~/.claude/telegram_pending")
@@ -39,13 +61,58 @@ SESSION_CHAT_MAP_FILE = os.path.expanduser("~/.claude/session_chat_map.json")
 CURRENT_SESSION_FILE = os.path.expanduser("~/.claude/current_session_id")
 SYNC_DISABLED_FILE = os.path.expanduser("~/.claude/telegram_sync_disabled")
 SYNC_PAUSED_FILE = os.path.expanduser("~/.claude/telegram_sync_paused")
+UPDATE_STATE_FILE = os.path.expanduser("~/.claude/telegram_update_state.json")
+SEARCH_INDEX_FILE = os.path.expanduser("~/.claude/telegram_search.db")
+USAGE_ROLLUP_FILE = os.path.expanduser("~/.claude/telegram_usage_rollup.bin")
+GROUP_PROJECT_MAP_FILE = os.path.expanduser("~/.claude/group_project_map.json")
+PERMISSION_SOCKET_FILE = os.path.expanduser("~/.claude/telegram_permission.sock")
+SPOOL_DIR = os.path.expanduser("~/.claude/telegram_spool")
+PERF_BASELINE_FILE = os.path.expanduser("~/.claude/telegram_perf_baseline.json")
+BRIDGE_PID_FILE = os.path.expanduser("~/.claude/telegram_bridge.pid")
+# Reload handoff: environment from `bridge.py --reload`, in-memory state for the successor
+RELOAD_ENV_FILE = os.path.expanduser("~/.claude/telegram_bridge_reload_env.json")
+RELOAD_STATE_FILE = os.path.expanduser("~/.claude/telegram_bridge_reload_state.json")
+# Prompts still queued when the predecessor stopped serving
+RELOAD_INPUT_FILE = os.path.expanduser("~/.claude/telegram_bridge_reload_input.json")
+LOG_DIR = os.path.expanduser("~/.claude/logs")
+LOG_DATE_FORMAT = _CONFIG.get("DEFAULT_LOG_DATE_FORMAT", "%m%d%Y")
+LOG_ARCHIVE_RETENTION_DAYS = int(os.environ.get(
+    "LOG_ARCHIVE_RETENTION_DAYS", _CONFIG.get("DEFAULT_LOG_ARCHIVE_RETENTION_DAYS", "365")))
+DEBUG_LOG_MAX_BYTES = int(os.environ.get(
+    "DEBUG_LOG_MAX_BYTES", _CONFIG.get("DEFAULT_DEBUG_LOG_MAX_BYTES", "5242880")))
 BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+# Opt-in JSONL recorder of incoming updates, replayable with tests/loadgen.py --replay
+UPDATE_RECORD_FILE = os.environ.get("UPDATE_RECORD_FILE", "")
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+# Merge messages from one chat arriving within this many ms into one prompt (0 = off)
+INPUT_COALESCE_MS = int(_config_value("INPUT_COALESCE_MS", "0") or 0)
+# Inbound admission: per-chat token bucket (messages per minute, burst; rate 0 = off), prompts
+# held per session while Claude is busy, and queue depth at which expensive commands are refused
+INPUT_RATE_PER_MIN = float(_config_value("INPUT_RATE_PER_MIN", "30") or 0)
+INPUT_BURST = int(_config_value("INPUT_BURST", "10") or 1)
+INPUT_QUEUE_MAX = int(_config_value("INPUT_QUEUE_MAX", "20") or 20)
+INPUT_SHED_DEPTH = int(_config_value("INPUT_SHED_DEPTH", "10") or 10)
+# Background tmux windows kept running Claude in recently left projects (0 = off)
+WARM_POOL_SIZE = int(_config_value("WARM_POOL_SIZE", "0") or 0)
+WARM_POOL_IDLE_MINUTES = int(_config_value("WARM_POOL_IDLE_MINUTES", "30") or 30)
 
 # In-memory cache: short hash -> encoded project name (for callback_data within 64 byte limit)
 _project_id_cache: dict[str, str] = {}
 
+# Number of recent update_ids remembered for webhook retry detection
+UPDATE_RECENT_MAX = 512
+
+# /watch pane mirror: capture interval bounds (s), idle auto-stop (s), lines shown
+WATCH_MIN_INTERVAL = 1.0
+WATCH_MAX_INTERVAL = 8.0
+WATCH_IDLE_TIMEOUT = 120.0
+WATCH_LINES = 40
+
 # Window names that indicate no meaningful title is set
 GENERIC_WINDOW_NAMES = frozenset({"bash", "zsh", "sh", "python", ""})
+SHELL_COMMANDS = frozenset({"bash", "zsh", "sh", "fish", "dash", "ksh", "tcsh", "csh", "nu", "pwsh"})
+# What's running in the tmux pane, from tmux's view of its foreground process
+PANE_SHELL, PANE_CLAUDE, PANE_OTHER, PANE_DEAD = "shell", "claude", "other", "dead"
 
 # Callback data prefixes
 CB_RESUME = "resume:"
@@ -53,6 +120,23 @@ CB_PROJECT = "project:"
 CB_NEW_IN_PROJECT = "new_in_project:"
 CB_CONTINUE_RECENT = "continue_recent"
 CB_ASK_ANSWER = "askq:"
+CB_PERMISSION = "perm:"  # perm:<request_id>:<allow|allow_all|deny>
+PERMISSION_DECISIONS = {"allow": "✅ Allowed", "allow_all": "✅ Allowed (don't ask again)", "deny": "❌ Denied"}
+PERMISSION_MAX_WAIT = 600
+CB_RESUME_PAGE = "rpage:"
+CB_PROJECTS_PAGE = "ppage:"
+CB_SESSIONS_PAGE = "spage:"
+
+# Max sessions listed in /search results
+SEARCH_RESULT_LIMIT = 8
+
+# /export: gzip rendered transcripts above this size; Bot API upload cap is 50 MB
+EXPORT_COMPRESS_BYTES = 10 * 1024 * 1024
+EXPORT_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Rows per page in /resume, /projects and project session pickers
+PAGE_SIZE = 8
 
 # Sync state constants
 SYNC_STATE_ACTIVE = "active"
@@ -80,6 +164,111 @@ MODEL_SHORT_NAMES = {
 }
 
 
+_metrics: dict[str, int] = {}
+_metrics_lock = threading.Lock()
+
+
+def metric_incr(name: str, n: int = 1) -> None:
+    """Increment an in-process counter."""
+    with _metrics_lock:
+        _metrics[name] = _metrics.get(name, 0) + n
+
+
+_started_monotonic = time.monotonic()
+
+
+def record_first_update() -> None:
+    """Record milliseconds from process start to the first handled update (once)."""
+    with _metrics_lock:
+        if "first_update_ms" not in _metrics:
+            _metrics["first_update_ms"] = int((time.monotonic() - _started_monotonic) * 1000)
+
+
+def get_metrics() -> dict[str, int]:
+    """Return a snapshot of all in-process counters."""
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+_record_lock = threading.Lock()
+
+
+def record_update(update: dict[str, Any]) -> None:
+    """Append an incoming update to UPDATE_RECORD_FILE (no-op unless configured)."""
+    if not UPDATE_RECORD_FILE:
+        return
+    line = json.dumps({"t": round(time.time(), 3), "update": update}, ensure_ascii=False)
+    try:
+        with _record_lock, open(UPDATE_RECORD_FILE, "a") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"Update recorder error: {e}")
+
+
+class UpdateTracker:
+    """Remember processed Telegram update_ids so webhook retries are dropped.
+
+    Keeps a bounded window of recent ids plus a watermark: every id at or
+    below the watermark has fallen out of the window and counts as seen
+    (Telegram update_ids only increase). State is persisted as a tiny JSON
+    file so a restarted bridge still recognises retries.
+    """
+
+    def __init__(self, max_recent: int = UPDATE_RECENT_MAX):
+        self.max_recent = max_recent
+        self.watermark = 0
+        self._recent: deque[int] = deque()
+        self._recent_set: set[int] = set()
+        self._loaded_from: str | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded_from == UPDATE_STATE_FILE:
+            return
+        self._loaded_from = UPDATE_STATE_FILE
+        self.watermark = 0
+        self._recent.clear()
+        self._recent_set.clear()
+        try:
+            with open(UPDATE_STATE_FILE) as f:
+                state = json.load(f)
+            self.watermark = int(state.get("watermark", 0))
+            for uid in state.get("recent", [])[-self.max_recent:]:
+                self._remember(int(uid))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def _remember(self, update_id: int) -> None:
+        self._recent.append(update_id)
+        self._recent_set.add(update_id)
+        while len(self._recent) > self.max_recent:
+            old = self._recent.popleft()
+            self._recent_set.discard(old)
+            self.watermark = max(self.watermark, old)
+
+    def _save(self) -> None:
+        tmp = UPDATE_STATE_FILE + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"watermark": self.watermark, "recent": list(self._recent)}, f)
+            os.replace(tmp, UPDATE_STATE_FILE)
+        except OSError as e:
+            print(f"Failed to save update state: {e}")
+
+    def check_and_mark(self, update_id: int) -> bool:
+        """Return True if update_id is new (and record it), False if a duplicate."""
+        with self._lock:
+            self._load()
+            if update_id <= self.watermark or update_id in self._recent_set:
+                return False
+            self._remember(update_id)
+            self._save()
+            return True
+
+
+_update_tracker = UpdateTracker()
+
+
 def shorten_model_name(model_id: str) -> str:
     """Convert a model ID to a short display name."""
     if model_id in MODEL_SHORT_NAMES:
@@ -119,6 +308,20 @@ def is_shell_prompt(pane_content: str) -> bool:
     return False
 
 
+def classify_pane_command(command: str) -> str:
+    """Pane state for #{pane_current_command}.
+
+    The native Claude binary shows up as `claude` or as its version number
+    (it runs from versions/<x.y.z>); npm installs show up as `node`.
+    """
+    command = command.lstrip("-")
+    if command in SHELL_COMMANDS:
+        return PANE_SHELL
+    if command in ("claude", "node") or re.fullmatch(r"\d+\.\d+\.\d+", command):
+        return PANE_CLAUDE
+    return PANE_OTHER
+
+
 def filter_window_title(title: str) -> str | None:
     """Return title if meaningful, None if generic/empty."""
     if title and title not in GENERIC_WINDOW_NAMES:
@@ -161,6 +364,7 @@ def parse_callback_data(data: str, prefix: str) -> str | None:
 
 
 PORT = int(os.environ.get("PORT", _CONFIG.get("DEFAULT_PORT", "8080")))
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", _CONFIG.get("DEFAULT_WEBHOOK_URL", "")).strip()
 
 BOT_COMMANDS = [
     {"command": "start", "description": "Start new Claude session in tmux"},
@@ -175,8 +379,20 @@ BOT_COMMANDS = [
     {"command": "status", "description": "Check tmux status"},
     {"command": "projects", "description": "Browse projects and sessions"},
     {"command": "report", "description": "Token usage report"},
+    {"command": "perf", "description": "Time Telegram, tmux and disk against earlier runs"},
+    {"command": "search", "description": "Search sessions: /search <query>"},
+    {"command": "export", "description": "Export session transcript: /export [session]"},
+    {"command": "watch", "description": "Mirror the tmux pane live (/watch off to stop)"},
+    {"command": "observe", "description": "Follow the current session read-only"},
+    {"command": "unobserve", "description": "Stop following the current session"},
+    {"command": "linkgroup", "description": "Link this forum group to a project: /linkgroup <path>"},
+    {"command": "unlinkgroup", "description": "Unlink this forum group from its project"},
+    {"command": "newtopic", "description": "New session in its own topic: /newtopic [name]"},
 ]
 
+# Commands that scan transcripts; refused while the input queue is deep
+SHED_COMMANDS = frozenset({"/report", "/projects", "/search", "/export", "/perf"})
+
 BLOCKED_COMMANDS = [
     "/mcp", "/help", "/settings", "/config", "/model", "/compact", "/cost",
     "/doctor", "/init", "/login", "/logout", "/memory", "/permissions",
@@ -184,19 +400,358 @@ BLOCKED_COMMANDS = [
 ]
 
 
-def telegram_api(method, data):
+# --- Bot API circuit breaker ---
+
+API_TIMEOUT_MIN = 2.0
+API_TIMEOUT_MAX = 10.0
+API_TIMEOUT_P95_FACTOR = 3.0  # timeout = p95 latency x this, within the bounds above
+API_LATENCY_WINDOW = 50
+API_LATENCY_MIN_SAMPLES = 10
+BREAKER_FAILURES = 5  # consecutive failures that open a method's circuit
+BREAKER_COOLDOWN = 10.0  # seconds open before a probe call is let through
+
+
+class ApiBreaker:
+    """Per-method circuit breaker and latency-derived timeouts for Bot API calls.
+
+    A method's circuit opens after BREAKER_FAILURES consecutive failures
+    (unreachable, timeout, 429, 5xx). While open, calls fail fast. After the
+    cooldown, a single probe goes through (half-open). Its success closes the
+    circuit, and its failure reopens it for another cooldown. Until a method
+    has enough samples, and for probes, the timeout is the API_TIMEOUT_MAX
+    ceiling.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failures_to_open = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.failures: dict[str, int] = {}
+        self.opened_at: dict[str, float] = {}
+        self.probing: set[str] = set()
+        self.latencies: dict[str, deque] = {}
+
+    def state(self, method: str) -> str:
+        with self._lock:
+            if method in self.probing:
+                return "half-open"
+            return "open" if method in self.opened_at else "closed"
+
+    def open_methods(self) -> list[str]:
+        with self._lock:
+            return sorted(self.opened_at)
+
+    def allow(self, method: str, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            opened = self.opened_at.get(method)
+            if opened is None:
+                return True
+            if method in self.probing or now - opened < self.cooldown:
+                return False
+            self.probing.add(method)
+            return True
+
+    def timeout(self, method: str) -> float:
+        with self._lock:
+            samples = self.latencies.get(method)
+            if method in self.probing or not samples or len(samples) < API_LATENCY_MIN_SAMPLES:
+                return API_TIMEOUT_MAX
+            ordered = sorted(samples)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(API_TIMEOUT_MAX, max(API_TIMEOUT_MIN, p95 * API_TIMEOUT_P95_FACTOR))
+
+    def record(self, method: str, ok: bool, latency: float | None = None, now: float | None = None) -> None:
+        """Outcome of a call; latency (seconds) feeds the timeout, including for timed-out calls."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if latency is not None:
+                self.latencies.setdefault(method, deque(maxlen=API_LATENCY_WINDOW)).append(latency)
+            was_probe = method in self.probing
+            self.probing.discard(method)
+            if ok:
+                self.failures.pop(method, None)
+                self.opened_at.pop(method, None)
+                return
+            failures = self.failures[method] = self.failures.get(method, 0) + 1
+            if was_probe or failures >= self.failures_to_open:
+                if method not in self.opened_at or was_probe:
+                    metric_incr("api_circuit_opened")
+                self.opened_at[method] = now
+
+
+_api_breaker = ApiBreaker()
+
+
+def _api_request(method: str, data: dict) -> urllib.request.Request:
+    return urllib.request.Request(
+        f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/{method}",
+        data=json.dumps(data).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+
+
+def telegram_api(method, data, spool=True):
+    if not BOT_TOKEN:
+        return None
+    # Messages queue behind ones still spooled for the chat, and spool if Telegram is unreachable,
+    # rate-limiting (429) or failing (5xx). Replies, pickers and watch frames pass spool=False:
+    # replayed later they would only be stale.
+    spool_chat = str(data.get("chat_id")) if spool and method in SPOOLED_METHODS and "chat_id" in data else None
+    if spool_chat and _outbound_spool.pending(spool_chat):
+        _outbound_spool.append(spool_chat, method, data)
+        return None
+    if not _api_breaker.allow(method):
+        # Circuit open: don't tie up a handler thread waiting on a failing API
+        metric_incr("api_fast_fails")
+        if spool_chat:
+            _outbound_spool.append(spool_chat, method, data)
+        return None
+    timeout = _api_breaker.timeout(method)
+    start = time.monotonic()
+    try:
+        with urllib.request.urlopen(_api_request(method, data), timeout=timeout) as r:
+            result = json.loads(r.read())
+        _api_breaker.record(method, True, time.monotonic() - start)
+        return result
+    except urllib.error.HTTPError as e:
+        # 4xx other than 429 means the API is up and answered
+        retryable = e.code == 429 or e.code >= 500
+        _api_breaker.record(method, not retryable, time.monotonic() - start)
+        print(f"Telegram API error: {e}")
+        if retryable and spool_chat:
+            # Same rule as the drainer (_spool_send): rate limits and outages are retried
+            _outbound_spool.append(spool_chat, method, data)
+        return None
+    except Exception as e:
+        elapsed = time.monotonic() - start
+        _api_breaker.record(method, False, elapsed if elapsed >= timeout else None)
+        print(f"Telegram API error: {e}")
+        if spool_chat:
+            _outbound_spool.append(spool_chat, method, data)
+        return None
+
+
+# --- Outbound spool ---
+
+SPOOLED_METHODS = frozenset({"sendMessage"})
+SPOOL_MAX_BYTES = 5 * 1024 * 1024  # per chat; hooks/lib/telegram_hook.py mirrors this
+SPOOL_BACKOFF_BASE = 2.0
+SPOOL_BACKOFF_MAX = 300.0
+SPOOL_DRAIN_INTERVAL = 1.0
+
+
+class OutboundSpool:
+    """Append-only per-chat files of messages Telegram didn't take, drained in order.
+
+    Writers (the bridge and the hooks) append one JSON line per message to
+    <chat>.jsonl with a single O_APPEND write. The drainer renames that file to
+    <chat>.jsonl.draining before sending, so appends during a drain start a new
+    file that is only sent after the old one is empty. A failed send keeps the
+    unsent tail and backs the chat off exponentially, with jitter. A chat's
+    spool stops accepting messages at max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = SPOOL_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.failures: dict[str, int] = {}
+        self.retry_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, chat: str) -> str:
+        return os.path.join(self.directory, chat.split(":")[0] + ".jsonl")
+
+    def pending(self, chat: str) -> bool:
+        path = self._path(chat)
+        return os.path.exists(path) or os.path.exists(path + ".draining")
+
+    def append(self, chat: str, method: str, data: dict, fallback: dict | None = None) -> bool:
+        path = self._path(chat)
+        try:
+            if os.path.getsize(path) >= self.max_bytes:
+                metric_incr("spool_dropped")
+                return False
+        except OSError:
+            pass
+        entry: dict[str, Any] = {"ts": time.time(), "method": method, "data": data}
+        if fallback:
+            entry["fallback"] = fallback
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, (json.dumps(entry) + "\n").encode())
+            finally:
+                os.close(fd)
+        except OSError:
+            return False
+        metric_incr("spooled")
+        return True
+
+    def count(self) -> int:
+        """Messages waiting across all chats."""
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        with open(entry.path, "rb") as f:
+                            total += sum(1 for _ in f)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return total
+
+    def drain(self, send: Callable[[dict], str], now: float | None = None) -> int:
+        """One pass over every chat that is due. send returns "ok", "retry" or "drop"."""
+        now = time.time() if now is None else now
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        chats = sorted({name.split(".", 1)[0] for name in names if ".jsonl" in name})
+        delivered = 0
+        with self._lock:
+            for chat in chats:
+                if now >= self.retry_at.get(chat, 0):
+                    delivered += self._drain_chat(chat, send, now)
+        return delivered
+
+    def _drain_chat(self, chat: str, send: Callable[[dict], str], now: float) -> int:
+        path = self._path(chat)
+        draining = path + ".draining"
+        delivered = 0
+        while True:
+            if not os.path.exists(draining):
+                try:
+                    os.rename(path, draining)
+                except OSError:
+                    break
+            try:
+                with open(draining) as f:
+                    lines = f.readlines()
+            except OSError:
+                break
+            for i, line in enumerate(lines):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                result = send(entry)
+                if result == "retry":
+                    self._keep(draining, lines[i:])
+                    failures = self.failures[chat] = self.failures.get(chat, 0) + 1
+                    delay = min(SPOOL_BACKOFF_MAX, SPOOL_BACKOFF_BASE * 2 ** (failures - 1))
+                    self.retry_at[chat] = now + delay * random.uniform(0.5, 1.0)
+                    return delivered
+                if result == "ok":
+                    delivered += 1
+                else:
+                    metric_incr("spool_dropped")
+            os.remove(draining)
+            self.failures.pop(chat, None)
+            self.retry_at.pop(chat, None)
+        return delivered
+
+    @staticmethod
+    def _keep(path: str, lines: list[str]) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.writelines(lines)
+        os.replace(tmp, path)
+
+
+_outbound_spool = OutboundSpool(SPOOL_DIR)
+
+
+def _spool_send(entry: dict) -> str:
+    """Deliver a spooled message: "ok", "retry" (unreachable, 429, 5xx) or "drop" (rejected)."""
+    for data in (entry.get("data"), entry.get("fallback")):
+        if not data:
+            break
+        try:
+            with urllib.request.urlopen(_api_request(entry.get("method", "sendMessage"), data), timeout=10):
+                return "ok"
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                return "retry"
+            print(f"Spooled message rejected: {e}")
+        except Exception:
+            return "retry"
+    return "drop"
+
+
+def spool_drain_loop():
+    """Background thread: deliver spooled messages once Telegram is reachable again."""
+    while True:
+        time.sleep(SPOOL_DRAIN_INTERVAL)
+        try:
+            delivered = _outbound_spool.drain(_spool_send)
+            if delivered:
+                print(f"Delivered {delivered} spooled message(s)")
+        except Exception as e:
+            print(f"Spool drain error: {e}")
+
+
+def ensure_webhook(url: str | None = None) -> str:
+    """Point the bot's webhook at a stable URL, calling setWebhook only on drift.
+
+    Returns "unchanged", "set" or "failed". Pending updates are kept, so a
+    restart behind a fixed URL loses nothing.
+    """
+    url = url or WEBHOOK_URL
+    if not url:
+        return "unchanged"
+    info = telegram_api("getWebhookInfo", {})
+    if info and info.get("ok") and (info.get("result") or {}).get("url") == url:
+        return "unchanged"
+    result = telegram_api("setWebhook", {"url": url, "drop_pending_updates": False})
+    if result and result.get("ok"):
+        metric_incr("webhook_resets")
+        return "set"
+    return "failed"
+
+
+def _multipart_stream(boundary: str, fields: dict[str, str], file_field: str,
+                      filename: str, path: str):
+    """Yield a multipart/form-data body, reading the file in fixed-size chunks."""
+    for name, value in fields.items():
+        yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+               f"{value}\r\n").encode()
+    yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{file_field}\"; "
+           f"filename=\"{filename}\"\r\nContent-Type: application/octet-stream\r\n\r\n").encode()
+    with open(path, "rb") as f:
+        while chunk := f.read(STREAM_CHUNK_BYTES):
+            yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def telegram_send_document(chat_id: int, path: str, filename: str, caption: str = "") -> dict | None:
+    """Upload a file with sendDocument, streaming it from disk."""
     if not BOT_TOKEN:
         return None
+    boundary = uuid.uuid4().hex
+    fields = {"chat_id": str(chat_id)}
+    if caption:
+        fields["caption"] = caption
+    # Content-Length lets urllib send the generator body chunk by chunk
+    length = sum(len(part) for part in _multipart_stream(boundary, fields, "document", filename, os.devnull))
+    length += os.path.getsize(path)
     req = urllib.request.Request(
-        f"https://api.telegram.org/bot{BOT_TOKEN}/{method}",
-        data=json.dumps(data).encode(),
-        headers={"Content-Type": "application/json"}
+        f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/sendDocument",
+        data=_multipart_stream(boundary, fields, "document", filename, path),
+        headers={
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(length),
+        },
     )
     try:
-        with urllib.request.urlopen(req, timeout=10) as r:
+        with urllib.request.urlopen(req, timeout=300) as r:
             return json.loads(r.read())
     except Exception as e:
-        print(f"Telegram API error: {e}")
+        print(f"Telegram upload error: {e}")
         return None
 
 
@@ -237,6 +792,232 @@ def tmux_send(text, literal=True):
     subprocess.run(cmd)
 
 
+# Prompts longer than this, or spanning lines, are pasted instead of typed
+PASTE_THRESHOLD = 200
+PASTE_BUFFER = "telegram-bridge"
+_paste_lock = threading.Lock()
+
+
+def tmux_paste(text: str) -> None:
+    """Paste text as one bracketed paste; embedded newlines don't submit the prompt.
+
+    The text goes through stdin (load-buffer -), so argv size is no limit.
+    """
+    with _paste_lock:
+        subprocess.run(["tmux", "load-buffer", "-b", PASTE_BUFFER, "-"], input=text.encode())
+        _tmux_run("paste-buffer", "-p", "-d", "-b", PASTE_BUFFER, "-t", TMUX_SESSION)
+
+
+def tmux_send_prompt(text: str) -> None:
+    """Type a prompt into Claude and submit it."""
+    if len(text) > PASTE_THRESHOLD or "\n" in text:
+        tmux_paste(text)
+    else:
+        tmux_send(text)
+    time.sleep(0.1)
+    tmux_send_enter()
+
+
+class InputCoalescer:
+    """Holds a chat's messages for a short window and submits them as one prompt.
+
+    The window starts at the first message, so no message waits longer than it.
+    """
+
+    def __init__(self, window_ms: int, deliver: Callable[[str], None]):
+        self.window = window_ms / 1000
+        self.deliver = deliver
+        self._lock = threading.Lock()
+        self._pending: dict[int, list[str]] = {}
+
+    def holding(self, chat_id: int) -> bool:
+        with self._lock:
+            return chat_id in self._pending
+
+    def submit(self, chat_id: int, text: str) -> None:
+        if self.window <= 0:
+            self.deliver(text)
+            return
+        with self._lock:
+            batch = self._pending.get(chat_id)
+            if batch is not None:
+                batch.append(text)
+                return
+            self._pending[chat_id] = [text]
+        timer = threading.Timer(self.window, self.flush, args=(chat_id,))
+        timer.daemon = True
+        timer.start()
+
+    def flush(self, chat_id: int) -> None:
+        with self._lock:
+            batch = self._pending.pop(chat_id, None)
+        if batch:
+            self.deliver("\n\n".join(batch))
+
+    def flush_all(self) -> None:
+        with self._lock:
+            chats = list(self._pending)
+        for chat_id in chats:
+            self.flush(chat_id)
+
+
+_input_coalescer = InputCoalescer(INPUT_COALESCE_MS, lambda text: tmux_send_prompt(text))
+
+
+class InboundLimiter:
+    """Per-chat token buckets: up to `burst` messages at once, refilled at `rate_per_min`."""
+
+    def __init__(self, rate_per_min: float, burst: int):
+        self.rate = rate_per_min / 60
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._buckets: dict[int, tuple[float, float]] = {}  # chat -> (tokens, at)
+        self.warned: set[int] = set()  # throttled chats already told so
+
+    def allow(self, chat_id: int, now: float | None = None) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, at = self._buckets.get(chat_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - at) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[chat_id] = (tokens - 1 if allowed else tokens, now)
+            if allowed:
+                self.warned.discard(chat_id)
+            return allowed
+
+
+_inbound_limiter = InboundLimiter(INPUT_RATE_PER_MIN, INPUT_BURST)
+
+# A pending marker older than this is a lost Stop hook, not a busy Claude
+CLAUDE_BUSY_STALE = 1800
+INPUT_QUEUE_POLL = 0.5
+
+
+def claude_busy() -> bool:
+    """True while Claude is answering a Telegram prompt (the Stop hook clears PENDING_FILE)."""
+    try:
+        return time.time() - os.path.getmtime(PENDING_FILE) < CLAUDE_BUSY_STALE
+    except OSError:
+        return False
+
+
+class InputQueue:
+    """Prompts held back while Claude is busy, per target session.
+
+    Each session holds at most `max_depth` messages. `pop_batch` takes the
+    oldest queued message with the ones right behind it from the same chat,
+    joined like the coalescer joins them, so a backlog becomes one turn.
+    """
+
+    def __init__(self, max_depth: int):
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._queues: dict[str, deque[tuple[int, int, str]]] = {}  # session -> (seq, chat, text)
+        self._seq = 0
+
+    def depth(self, session_id: str | None = None) -> int:
+        with self._lock:
+            if session_id is not None:
+                return len(self._queues.get(session_id, ()))
+            return sum(len(q) for q in self._queues.values())
+
+    def submit(self, session_id: str, chat_id: int, text: str) -> int | None:
+        """Queue a message; its position in the session's queue, or None if full."""
+        with self._lock:
+            queue = self._queues.setdefault(session_id, deque())
+            if len(queue) >= self.max_depth:
+                return None
+            self._seq += 1
+            queue.append((self._seq, chat_id, text))
+            return len(queue)
+
+    def drop_chat(self, chat_id: int) -> int:
+        """Forget everything a chat has queued; the number of messages dropped."""
+        with self._lock:
+            dropped = 0
+            for session_id, queue in list(self._queues.items()):
+                kept = deque(item for item in queue if item[1] != chat_id)
+                dropped += len(queue) - len(kept)
+                self._queues[session_id] = kept
+            return dropped
+
+    def clear(self) -> int:
+        with self._lock:
+            dropped = sum(len(q) for q in self._queues.values())
+            self._queues.clear()
+            return dropped
+
+    def take_all(self) -> list[tuple[str, int, str]]:
+        """Remove every queued message; (session, chat, text) oldest first."""
+        with self._lock:
+            items = sorted((seq, sid, chat, text) for sid, queue in self._queues.items()
+                           for seq, chat, text in queue)
+            self._queues.clear()
+        return [(sid, chat, text) for _, sid, chat, text in items]
+
+    def restore(self, items: list[tuple[str, int, str]]) -> None:
+        """Put messages taken over from a predecessor ahead of anything queued since.
+
+        They were already accepted, so the depth limit doesn't apply.
+        """
+        with self._lock:
+            for i, (sid, chat, text) in reversed(list(enumerate(items))):
+                self._queues.setdefault(sid, deque()).appendleft((i - len(items), int(chat), text))
+
+    def pop_batch(self) -> tuple[str, int, str] | None:
+        """(session, chat, text) for the next prompt to submit, or None if nothing is queued."""
+        with self._lock:
+            heads = [(queue[0][0], sid) for sid, queue in self._queues.items() if queue]
+            if not heads:
+                return None
+            session_id = min(heads)[1]
+            queue = self._queues[session_id]
+            chat_id = queue[0][1]
+            texts = []
+            while queue and queue[0][1] == chat_id:
+                texts.append(queue.popleft()[2])
+            return session_id, chat_id, "\n\n".join(texts)
+
+
+_input_queue = InputQueue(INPUT_QUEUE_MAX)
+
+
+def _switch_to_session(session_id: str) -> None:
+    """Resume a session in the pane and record it as current, without touching bindings."""
+    tmux_switch_session(session_id)
+    tmux_set_title(session_id)
+    try:
+        with open(CURRENT_SESSION_FILE, "w") as f:
+            f.write(session_id)
+    except OSError:
+        pass
+
+
+def deliver_input(session_id: str, chat_id: int, text: str) -> None:
+    """Submit a prompt to Claude, through the coalescer, with the typing indicator."""
+    if session_id and _topic_index.topic_for(session_id) and get_current_session_id() != session_id:
+        _switch_to_session(session_id)
+    if not _input_coalescer.holding(chat_id):
+        _start_typing(chat_id)
+    _input_coalescer.submit(chat_id, text)
+
+
+def input_queue_loop() -> None:
+    """Submit queued prompts once Claude has answered the previous one."""
+    while True:
+        time.sleep(INPUT_QUEUE_POLL)
+        try:
+            if get_sync_state() != SYNC_STATE_ACTIVE or claude_busy():
+                continue
+            batch = _input_queue.pop_batch()
+            if batch:
+                deliver_input(*batch)
+        except Exception as e:
+            print(f"Input queue error: {e}")
+
+
 def tmux_send_enter():
     _tmux_run("send-keys", "-t", TMUX_SESSION, "Enter")
 
@@ -258,8 +1039,44 @@ def tmux_get_pane_content(lines=3) -> str:
     return result.stdout.strip() if result.returncode == 0 else ""
 
 
+def tmux_capture_visible() -> str:
+    """Capture the visible tmux pane (no scrollback)."""
+    result = _tmux_run("capture-pane", "-t", TMUX_SESSION, "-p", capture=True, text=True)
+    return result.stdout.rstrip() if result.returncode == 0 else ""
+
+
+def tmux_pane_state() -> str | None:
+    """Classify the pane as shell, claude, other or dead with one display-message call.
+
+    A `node` foreground is only taken for Claude if /proc confirms a claude
+    process under the pane. None if tmux gave no usable answer.
+    """
+    result = _tmux_run("display-message", "-t", TMUX_SESSION, "-p",
+                       "#{pane_dead}\t#{pane_pid}\t#{pane_current_command}", capture=True, text=True)
+    parts = result.stdout.rstrip("\n").split("\t") if result.returncode == 0 and result.stdout else []
+    if len(parts) != 3 or not parts[2]:
+        return None
+    dead, pane_pid, command = parts
+    if dead == "1":
+        return PANE_DEAD
+    state = classify_pane_command(command)
+    if command == "node" and pane_pid.isdigit() and os.path.isdir(PROC_ROOT):
+        return PANE_CLAUDE if find_claude_pid(int(pane_pid)) else PANE_OTHER
+    return state
+
+
 def tmux_is_at_shell() -> bool:
-    """Check if tmux pane is at a shell prompt (Claude exited)."""
+    """Check if the tmux pane is back at a shell (Claude exited).
+
+    A dead pane is respawned into a fresh shell. Falls back to matching the
+    last lines against shell prompts when tmux can't report the pane state.
+    """
+    state = tmux_pane_state()
+    if state == PANE_DEAD:
+        _tmux_run("respawn-pane", "-t", TMUX_SESSION, capture=True)
+        return True
+    if state is not None:
+        return state == PANE_SHELL
     return is_shell_prompt(tmux_get_pane_content(3))
 
 
@@ -297,6 +1114,38 @@ def tmux_cd_and_start(target_path: str, resume_session_id: str | None = None) ->
     time.sleep(2.0)
 
 
+def tmux_resume_in_place(session_id: str, target_path: str | None = None) -> None:
+    """Resume a session with Claude's /resume, restarting Claude if it has exited."""
+    note_pane_switch(session_id)
+    tmux_send_escape()
+    time.sleep(0.3)
+    tmux_send_line(f"/resume {session_id}")
+    time.sleep(2.0)
+
+    # Check if Claude exited (returned to shell prompt)
+    if tmux_is_at_shell():
+        if target_path:
+            tmux_cd_and_start(target_path, resume_session_id=session_id)
+        else:
+            tmux_send_line(f"claude --resume {session_id} --dangerously-skip-permissions")
+            time.sleep(2.0)
+
+
+def tmux_change_project(target_path: str, resume_session_id: str | None = None) -> bool:
+    """Run Claude in another project. True if a warm window already running there was selected.
+
+    Without the warm pool Claude is exited and restarted in place; with it the
+    current window is parked and a warm or fresh window takes over.
+    """
+    if _warm_pool.enabled:
+        if _warm_pool.switch(target_path):
+            return True
+    else:
+        tmux_exit_claude()
+    tmux_cd_and_start(target_path, resume_session_id=resume_session_id)
+    return False
+
+
 def tmux_switch_session(session_id: str) -> None:
     """Switch Claude to a different session, handling cross-project switches."""
     target_path = get_project_path_for_session(session_id)
@@ -306,27 +1155,17 @@ def tmux_switch_session(session_id: str) -> None:
     needs_cd = target_path and current_cwd and os.path.realpath(target_path) != os.path.realpath(current_cwd)
 
     if needs_cd:
-        # Cross-project: must exit Claude, cd, then restart
-        tmux_exit_claude()
-        tmux_cd_and_start(target_path, resume_session_id=session_id)
+        # Cross-project: warm window, or exit Claude, cd, then restart
+        if tmux_change_project(target_path, resume_session_id=session_id):
+            tmux_resume_in_place(session_id, target_path)
     else:
         # Same project: try Claude's built-in /resume first
-        tmux_send_escape()
-        time.sleep(0.3)
-        tmux_send_line(f"/resume {session_id}")
-        time.sleep(2.0)
-
-        # Check if Claude exited (returned to shell prompt)
-        if tmux_is_at_shell():
-            if target_path:
-                tmux_cd_and_start(target_path, resume_session_id=session_id)
-            else:
-                tmux_send_line(f"claude --resume {session_id} --dangerously-skip-permissions")
-                time.sleep(2.0)
+        tmux_resume_in_place(session_id, target_path)
 
 
 def tmux_new_session() -> None:
     """Start a new Claude session, handling both in-process and restart cases."""
+    note_pane_switch(None)
     tmux_send_escape()
     time.sleep(0.3)
     tmux_send_line("/clear")
@@ -352,6 +1191,94 @@ def tmux_get_title() -> str | None:
     return None
 
 
+# --- Warm window pool ---
+
+WARM_POOL_REAP_INTERVAL = 60
+
+
+def tmux_list_windows() -> dict[str, tuple[bool, str, str]]:
+    """window id -> (active, foreground command, cwd) for the bridge's tmux session."""
+    result = _tmux_run("list-windows", "-t", TMUX_SESSION, "-F",
+                       "#{window_id}\t#{window_active}\t#{pane_current_command}\t#{pane_current_path}",
+                       capture=True, text=True)
+    windows = {}
+    if result.returncode == 0:
+        for line in result.stdout.splitlines():
+            parts = line.split("\t")
+            if len(parts) == 4:
+                windows[parts[0]] = (parts[1] == "1", parts[2], parts[3])
+    return windows
+
+
+class WarmPool:
+    """Claude processes left running in background windows of the tmux session.
+
+    Leaving a project parks its window instead of exiting Claude; coming back
+    selects it again. Every tmux command targets the session's active window,
+    so nothing else needs to know which window is in front. At most `size`
+    windows stay parked (least recently used are killed first), and windows
+    parked longer than `idle_seconds` are reaped.
+    """
+
+    def __init__(self, size: int, idle_seconds: float):
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self.parked: dict[str, tuple[str, float]] = {}  # window id -> (realpath, parked at), LRU first
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def switch(self, target_path: str, now: float | None = None) -> bool:
+        """Park the active window and bring up one for target_path. True if it was warm."""
+        now = time.time() if now is None else now
+        target = os.path.realpath(target_path)
+        with self._lock:
+            windows = tmux_list_windows()
+            self.parked = {wid: v for wid, v in self.parked.items() if wid in windows}
+            active = next((wid for wid, (is_active, _, _) in windows.items() if is_active), None)
+            if active:
+                self.parked.pop(active, None)
+                self.parked[active] = (os.path.realpath(windows[active][2]), now)
+            warm = next((wid for wid, (path, _) in self.parked.items()
+                         if path == target and windows[wid][1] not in SHELL_COMMANDS), None)
+            if warm:
+                del self.parked[warm]
+                _tmux_run("select-window", "-t", warm, capture=True)
+            else:
+                _tmux_run("new-window", "-t", f"{TMUX_SESSION}:", "-c", target_path, capture=True)
+            while len(self.parked) > self.size:
+                self._kill(next(iter(self.parked)))
+        return warm is not None
+
+    def reap(self, now: float | None = None) -> list[str]:
+        """Kill windows parked for longer than the idle limit."""
+        now = time.time() if now is None else now
+        with self._lock:
+            stale = [wid for wid, (_, parked_at) in self.parked.items() if now - parked_at > self.idle_seconds]
+            for wid in stale:
+                self._kill(wid)
+        return stale
+
+    def _kill(self, window_id: str) -> None:
+        self.parked.pop(window_id, None)
+        _tmux_run("kill-window", "-t", window_id, capture=True)
+
+
+_warm_pool = WarmPool(WARM_POOL_SIZE, WARM_POOL_IDLE_MINUTES * 60)
+
+
+def warm_pool_loop():
+    """Background thread: reap idle warm windows."""
+    while True:
+        time.sleep(WARM_POOL_REAP_INTERVAL)
+        try:
+            _warm_pool.reap()
+        except Exception as e:
+            print(f"Warm pool error: {e}")
+
+
 
 def _get_projects_dir() -> Path | None:
     """Return ~/.claude/projects if it exists, else None."""
@@ -359,71 +1286,130 @@ def _get_projects_dir() -> Path | None:
     return d if d.exists() else None
 
 
-def is_valid_session(jsonl_path: Path, max_age_days: int = 30) -> bool:
-    """Check if a session file is valid and recoverable."""
+def _is_recent_session_stat(size: int, mtime: float, now: float, max_age_days: int = 30) -> bool:
+    """Cheap stat-only check: non-empty and modified within max_age_days."""
+    return size > 0 and (now - mtime) / 86400 <= max_age_days
+
+
+def _has_json_first_line(jsonl_path: Path | str) -> bool:
+    """Verify a session file starts with a valid JSON line."""
     try:
-        stat = jsonl_path.stat()
-        # Skip empty files
-        if stat.st_size == 0:
-            return False
-        # Skip files older than max_age_days
-        age_days = (time.time() - stat.st_mtime) / 86400
-        if age_days > max_age_days:
-            return False
-        # Verify it has at least one valid JSON line
         with open(jsonl_path) as f:
             first_line = f.readline().strip()
-            if not first_line:
-                return False
-            json.loads(first_line)
+        if not first_line:
+            return False
+        json.loads(first_line)
         return True
-    except (OSError, json.JSONDecodeError):
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
         return False
 
 
-def get_recent_sessions_from_files(limit=10):
-    """Get recent sessions directly from session files (more reliable)."""
-    projects_dir = _get_projects_dir()
-    if not projects_dir:
-        return []
-    all_sessions = []
-    for jsonl in projects_dir.glob("*/*.jsonl"):
-        if not is_valid_session(jsonl):
-            continue
-        try:
-            stat = jsonl.stat()
-            all_sessions.append({
-                "session_id": jsonl.stem,
-                "project_dir": jsonl.parent.name,
-                "mtime": stat.st_mtime,
-                "display": f"{jsonl.parent.name}:{jsonl.stem}"
-            })
-        except OSError:
-            continue
-    all_sessions.sort(key=lambda x: x["mtime"], reverse=True)
-    return all_sessions[:limit]
+def is_valid_session(jsonl_path: Path, max_age_days: int = 30) -> bool:
+    """Check if a session file is valid and recoverable."""
+    try:
+        stat = jsonl_path.stat()
+    except OSError:
+        return False
+    if not _is_recent_session_stat(stat.st_size, stat.st_mtime, time.time(), max_age_days):
+        return False
+    return _has_json_first_line(jsonl_path)
+
+
+def _scan_session_files(directory: str, now: float) -> list[tuple[float, str]]:
+    """One scandir pass over a project dir: (mtime, path) of recent non-empty *.jsonl."""
+    found = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".jsonl"):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if _is_recent_session_stat(st.st_size, st.st_mtime, now):
+                    found.append((st.st_mtime, entry.path))
+    except OSError:
+        pass
+    return found
+
+
+def _iter_project_dirs(projects_dir: Path):
+    """Yield DirEntry for each project directory."""
+    try:
+        with os.scandir(projects_dir) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        yield entry
+                except OSError:
+                    continue
+    except OSError:
+        return
 
 
-def get_projects(limit=10):
-    """Get project list with session counts and latest modification time."""
+def _pop_newest_valid(heap: list, count: int) -> list:
+    """Pop heap items (keyed on -mtime) newest first, keeping the first `count` valid sessions.
+
+    Only popped candidates have their first line read, so a page costs
+    O(n + k log n) with k file opens instead of a full sort and n opens.
+    """
+    heapq.heapify(heap)
+    result = []
+    while heap and len(result) < count:
+        item = heapq.heappop(heap)
+        if _has_json_first_line(item[1]):
+            result.append(item)
+    return result
+
+
+def get_recent_sessions_from_files(limit=10, offset=0):
+    """Get recent sessions directly from session files (more reliable)."""
     projects_dir = _get_projects_dir()
     if not projects_dir:
         return []
+    now = time.time()
+    heap = []
+    for project in _iter_project_dirs(projects_dir):
+        for mtime, path in _scan_session_files(project.path, now):
+            heap.append((-mtime, path, project.name))
+    sessions = []
+    for neg_mtime, path, project_name in _pop_newest_valid(heap, offset + limit)[offset:]:
+        session_id = os.path.basename(path)[:-len(".jsonl")]
+        sessions.append({
+            "session_id": session_id,
+            "project_dir": project_name,
+            "mtime": -neg_mtime,
+            "display": f"{project_name}:{session_id}"
+        })
+    return sessions
+
+
+def get_projects(limit=10, offset=0):
+    """Get project list with session counts and latest modification time.
+
+    session_count counts recent non-empty transcripts from the scandir stat
+    results; only each project's newest transcript is opened and validated.
+    """
+    projects_dir = _get_projects_dir()
+    if not projects_dir:
+        return []
+    now = time.time()
     projects = []
-    for project_dir in projects_dir.iterdir():
-        if not project_dir.is_dir():
-            continue
-        jsonls = [j for j in project_dir.glob("*.jsonl") if is_valid_session(j)]
-        if not jsonls:
+    for project in _iter_project_dirs(projects_dir):
+        candidates = [(-mtime, path) for mtime, path in _scan_session_files(project.path, now)]
+        session_count = len(candidates)
+        latest = _pop_newest_valid(candidates, 1)
+        if not latest:
             continue
-        latest = max(jsonls, key=lambda p: p.stat().st_mtime)
         projects.append({
-            "encoded_name": project_dir.name,
-            "session_count": len(jsonls),
-            "mtime": latest.stat().st_mtime,
+            "encoded_name": project.name,
+            "session_count": session_count,
+            "mtime": -latest[0][0],
         })
-    projects.sort(key=lambda x: x["mtime"], reverse=True)
-    return projects[:limit]
+    return heapq.nlargest(offset + limit, projects, key=lambda x: x["mtime"])[offset:]
 
 
 def resolve_project_dir(encoded_name: str) -> Path | None:
@@ -441,24 +1427,316 @@ def resolve_project_dir(encoded_name: str) -> Path | None:
     return None
 
 
-def get_sessions_for_project(encoded_name: str, limit=10):
+def get_sessions_for_project(encoded_name: str, limit=10, offset=0):
     """Get sessions for a specific project."""
     project_dir = resolve_project_dir(encoded_name)
     if not project_dir:
         return []
-    sessions = []
-    for jsonl in project_dir.glob("*.jsonl"):
-        if not is_valid_session(jsonl):
-            continue
+    heap = [(-mtime, path) for mtime, path in _scan_session_files(str(project_dir), time.time())]
+    return [
+        {"session_id": os.path.basename(path)[:-len(".jsonl")], "mtime": -neg_mtime}
+        for neg_mtime, path in _pop_newest_valid(heap, offset + limit)[offset:]
+    ]
+
+
+def iter_appended_lines(path: str, offset: int = 0):
+    """Yield (line, end_offset) for each complete line written after offset.
+
+    A trailing partial line (transcript still being written) is left for
+    the next call, so callers can persist end_offset and resume from it.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            yield raw.decode("utf-8", errors="replace"), offset
+
+
+def extract_message_text(entry: dict) -> tuple[str, str] | None:
+    """Return (role, text) for user prompts and assistant text, else None."""
+    role = entry.get("type")
+    if role not in ("user", "assistant") or entry.get("isMeta"):
+        return None
+    content = (entry.get("message") or {}).get("content")
+    if isinstance(content, str):
+        text = content
+    elif isinstance(content, list):
+        text = "\n".join(
+            block.get("text", "") for block in content
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+    else:
+        return None
+    text = text.strip()
+    return (role, text) if text else None
+
+
+class SearchIndex:
+    """Incremental full-text index over session transcripts (SQLite FTS5).
+
+    Each transcript's indexed byte offset is stored alongside the text, so
+    an update only parses bytes appended since the previous one. Rows of
+    transcripts that were deleted are purged. Updates run on a background
+    thread (refresh_async) and commit per file, so searches are never held up
+    by a first full build. Falls back to a plain table with LIKE matching when
+    SQLite lacks FTS5.
+    """
+
+    def __init__(self):
+        self._conn: sqlite3.Connection | None = None
+        self._path: str | None = None
+        self.fts = True
+        self._lock = threading.Lock()
+        self._updating = threading.Lock()
+        self.ready = threading.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None and self._path == SEARCH_INDEX_FILE:
+            return self._conn
+        if self._conn is not None:
+            self._conn.close()
+        self._path = SEARCH_INDEX_FILE
+        conn = sqlite3.connect(SEARCH_INDEX_FILE, check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, offset INTEGER NOT NULL)")
         try:
-            sessions.append({
-                "session_id": jsonl.stem,
-                "mtime": jsonl.stat().st_mtime,
-            })
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5("
+                "session_id UNINDEXED, project UNINDEXED, role UNINDEXED, ts UNINDEXED, text)"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs (session_id TEXT, project TEXT, role TEXT, ts TEXT, text TEXT)"
+            )
+            self.fts = False
+        self._conn = conn
+        return conn
+
+    def is_ready(self) -> bool:
+        """True once an update has finished, or an index from an earlier run has rows."""
+        if not self.ready.is_set():
+            with self._lock:
+                if self._connect().execute("SELECT 1 FROM files LIMIT 1").fetchone():
+                    self.ready.set()
+        return self.ready.is_set()
+
+    def refresh_async(self) -> bool:
+        """Run update() on a background thread; False if one is already running."""
+        if not self._updating.acquire(blocking=False):
+            return False
+
+        def run() -> None:
+            try:
+                self.update()
+            except Exception as e:
+                print(f"Search index error: {e}")
+            finally:
+                self._updating.release()
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def update(self) -> int:
+        """Index newly appended transcript lines and purge deleted ones; return rows added."""
+        projects_dir = _get_projects_dir()
+        if not projects_dir:
+            self.ready.set()
+            return 0
+        added = 0
+        with self._lock:
+            offsets = dict(self._connect().execute("SELECT path, offset FROM files"))
+        seen = set()
+        for project in _iter_project_dirs(projects_dir):
+            try:
+                entries = list(os.scandir(project.path))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.name.endswith(".jsonl"):
+                    continue
+                seen.add(entry.path)
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                offset = offsets.get(entry.path, 0)
+                if size == offset:
+                    continue
+                # One transaction per file: searches interleave with a long first build
+                with self._lock:
+                    conn = self._connect()
+                    with conn:
+                        added += self._index_file(conn, entry.path, project.name, offset, size)
+        gone = [path for path in offsets if path not in seen]
+        if gone:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    for path in gone:
+                        conn.execute("DELETE FROM docs WHERE session_id = ?", (os.path.basename(path)[:-len(".jsonl")],))
+                        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.ready.set()
+        return added
+
+    def _index_file(self, conn: sqlite3.Connection, path: str, project: str, offset: int, size: int) -> int:
+        session_id = os.path.basename(path)[:-len(".jsonl")]
+        if size < offset:
+            # Transcript was rewritten: drop its rows and start over
+            conn.execute("DELETE FROM docs WHERE session_id = ?", (session_id,))
+            offset = 0
+        rows = []
+        new_offset = offset
+        try:
+            for line, new_offset in iter_appended_lines(path, offset):
+                if '"content"' not in line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    extracted = extract_message_text(entry)
+                except (json.JSONDecodeError, AttributeError):
+                    continue
+                if extracted:
+                    role, text = extracted
+                    rows.append((session_id, project, role, entry.get("timestamp", ""), text))
+        except OSError:
+            return 0
+        conn.executemany("INSERT INTO docs (session_id, project, role, ts, text) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO files (path, offset) VALUES (?, ?)", (path, new_offset))
+        return len(rows)
+
+    def search(self, query: str, limit: int = SEARCH_RESULT_LIMIT) -> list[dict]:
+        """Return up to `limit` sessions matching all query words, best match first."""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        with self._lock:
+            conn = self._connect()
+            if self.fts:
+                match = " ".join('"' + w.replace('"', '""') + '"' for w in words)
+                rows = conn.execute(
+                    "SELECT session_id, project, ts, snippet(docs, 4, '', '', '…', 10) FROM docs "
+                    "WHERE docs MATCH ? ORDER BY rank LIMIT ?",
+                    (match, limit * 20),
+                ).fetchall()
+            else:
+                clause = " AND ".join("text LIKE ?" for _ in words)
+                rows = conn.execute(
+                    f"SELECT session_id, project, ts, substr(text, 1, 80) FROM docs WHERE {clause} "
+                    "ORDER BY ts DESC LIMIT ?",
+                    [f"%{w}%" for w in words] + [limit * 20],
+                ).fetchall()
+        results: dict[str, dict] = {}
+        for session_id, project, ts, snippet in rows:
+            if session_id not in results:
+                results[session_id] = {
+                    "session_id": session_id, "project_dir": project,
+                    "timestamp": ts, "snippet": " ".join(snippet.split()),
+                }
+                if len(results) >= limit:
+                    break
+        return list(results.values())
+
+
+_search_index = SearchIndex()
+
+
+def find_session_file(session_id: str) -> Path | None:
+    """Locate <session_id>.jsonl (or a unique prefix match) under ~/.claude/projects."""
+    projects_dir = _get_projects_dir()
+    if not projects_dir or not session_id or "/" in session_id:
+        return None
+    matches = []
+    for project in _iter_project_dirs(projects_dir):
+        exact = os.path.join(project.path, f"{session_id}.jsonl")
+        if os.path.exists(exact):
+            return Path(exact)
+        try:
+            with os.scandir(project.path) as it:
+                matches += [e.path for e in it if e.name.startswith(session_id) and e.name.endswith(".jsonl")]
         except OSError:
             continue
-    sessions.sort(key=lambda x: x["mtime"], reverse=True)
-    return sessions[:limit]
+    return Path(matches[0]) if len(matches) == 1 else None
+
+
+def render_transcript_markdown(jsonl_path: Path | str, out) -> int:
+    """Stream a session transcript into `out` as Markdown; return messages written.
+
+    Reads one line at a time so memory stays flat regardless of transcript size.
+    """
+    session_id = os.path.basename(str(jsonl_path))[:-len(".jsonl")]
+    out.write(f"# Claude session {session_id}\n\n")
+    count = 0
+    for line, _ in iter_appended_lines(str(jsonl_path)):
+        if '"content"' not in line:
+            continue
+        try:
+            entry = json.loads(line)
+            extracted = extract_message_text(entry)
+        except (json.JSONDecodeError, AttributeError):
+            continue
+        if not extracted:
+            continue
+        role, text = extracted
+        heading = "🧑 You" if role == "user" else "🤖 Claude"
+        ts = entry.get("timestamp", "")
+        out.write(f"## {heading}" + (f" · {ts[:19].replace('T', ' ')}" if ts else "") + f"\n\n{text}\n\n")
+        count += 1
+    return count
+
+
+def export_session(jsonl_path: Path | str, dest_dir: str) -> tuple[str, str, int]:
+    """Render a transcript to dest_dir, gzipping it when large.
+
+    Returns (file path, upload filename, message count).
+    """
+    session_id = os.path.basename(str(jsonl_path))[:-len(".jsonl")]
+    md_path = os.path.join(dest_dir, f"{session_id}.md")
+    with open(md_path, "w", encoding="utf-8") as out:
+        count = render_transcript_markdown(jsonl_path, out)
+    if os.path.getsize(md_path) <= EXPORT_COMPRESS_BYTES:
+        return md_path, f"{session_id}.md", count
+    gz_path = md_path + ".gz"
+    with open(md_path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+        while chunk := src.read(STREAM_CHUNK_BYTES):
+            dst.write(chunk)
+    os.remove(md_path)
+    return gz_path, f"{session_id}.md.gz", count
+
+
+def parse_usage_line(line: str) -> dict | None:
+    """Extract token usage from one transcript line.
+
+    Returns {"model", "timestamp", "input", "output", "cache_read",
+    "cache_write"} for assistant entries carrying usage, else None.
+    """
+    if '"usage"' not in line:
+        return None
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if entry.get("type") != "assistant":
+        return None
+    msg = entry.get("message", {})
+    usage = msg.get("usage")
+    if not usage:
+        return None
+    model = msg.get("model", "")
+    if model == "<synthetic>":
+        return None
+    ts = entry.get("timestamp", "")
+    if not ts:
+        return None
+    return {
+        "model": model,
+        "timestamp": ts,
+        "input": usage.get("input_tokens", 0),
+        "output": usage.get("output_tokens", 0),
+        "cache_read": usage.get("cache_read_input_tokens", 0),
+        "cache_write": usage.get("cache_creation_input_tokens", 0),
+    }
 
 
 def scan_token_usage(days: int = 30) -> dict:
@@ -514,32 +1792,15 @@ def scan_token_usage(days: int = 30) -> dict:
         try:
             with open(jsonl_path) as f:
                 for line in f:
-                    if '"usage"' not in line:
-                        continue
-                    try:
-                        entry = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-                    if entry.get("type") != "assistant":
-                        continue
-                    msg = entry.get("message", {})
-                    usage = msg.get("usage")
+                    usage = parse_usage_line(line)
                     if not usage:
                         continue
-                    model = msg.get("model", "")
-                    if model == "<synthetic>":
-                        continue
-
-                    input_tokens = usage.get("input_tokens", 0)
-                    output_tokens = usage.get("output_tokens", 0)
+                    model = usage["model"]
+                    input_tokens = usage["input"]
+                    output_tokens = usage["output"]
                     total = input_tokens + output_tokens
-
-                    # Get timestamp for day bucketing
-                    ts = entry.get("timestamp", "")
-                    if not ts:
-                        continue
                     # ts is ISO format like "2026-02-11T..."
-                    day = ts[:10]  # "YYYY-MM-DD"
+                    day = usage["timestamp"][:10]  # "YYYY-MM-DD"
 
                     if day >= day30_str:
                         totals["30d"]["input"] += input_tokens
@@ -569,8 +1830,8 @@ def scan_token_usage(days: int = 30) -> dict:
                         by_project[project_name] = by_project.get(project_name, 0) + total
                         by_session[session_id] = by_session.get(session_id, 0) + total
                         session_project[session_id] = project_name
-                        cache_today["read"] += usage.get("cache_read_input_tokens", 0)
-                        cache_today["creation"] += usage.get("cache_creation_input_tokens", 0)
+                        cache_today["read"] += usage["cache_read"]
+                        cache_today["creation"] += usage["cache_write"]
         except OSError:
             continue
 
@@ -748,6 +2009,843 @@ def format_token_report(data: dict) -> str:
     return "\n".join(lines)
 
 
+# --- Hourly usage rollup ---
+
+ROLLUP_FIELDS = ("input", "output", "cache_read", "cache_write")
+_ROLLUP_MAGIC = b"CCR1"
+
+
+_utc_hour_cache: dict[str, int] = {}
+
+
+def _utc_hour(timestamp: str) -> int | None:
+    """Map an ISO UTC timestamp to hours since the epoch (memoised per hour prefix)."""
+    key = timestamp[:13]
+    hour = _utc_hour_cache.get(key)
+    if hour is None:
+        try:
+            hour = calendar.timegm(time.strptime(key, "%Y-%m-%dT%H")) // 3600
+        except ValueError:
+            return None
+        _utc_hour_cache[key] = hour
+    return hour
+
+
+class UsageRollup:
+    """Array-backed hourly token counters per (model, project).
+
+    Every series is an array('Q') of len(ROLLUP_FIELDS) counters per hour
+    starting at a shared base hour. Transcripts are ingested from their
+    last-seen byte offset, so refreshing only reads appended lines, and the
+    whole store is persisted as one zlib-compressed blob.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.base_hour: int | None = None
+        self.series: dict[tuple[str, str], array] = {}
+        self.offsets: dict[str, int] = {}
+        self._loaded_from: str | None = None
+
+    @property
+    def hours(self) -> int:
+        width = len(ROLLUP_FIELDS)
+        return max((len(a) // width for a in self.series.values()), default=0)
+
+    def add(self, model: str, project: str, hour: int, counts: tuple[int, ...]) -> None:
+        """Accumulate counts (in ROLLUP_FIELDS order) into one hour bucket."""
+        width = len(ROLLUP_FIELDS)
+        if self.base_hour is None:
+            self.base_hour = hour
+        if hour < self.base_hour:
+            pad = array("Q", bytes(8 * width * (self.base_hour - hour)))
+            for key, arr in self.series.items():
+                self.series[key] = pad + arr
+            self.base_hour = hour
+        arr = self.series.setdefault((model, project), array("Q"))
+        idx = (hour - self.base_hour) * width
+        if idx + width > len(arr):
+            arr.extend(array("Q", bytes(8 * (idx + width - len(arr)))))
+        for i, n in enumerate(counts):
+            arr[idx + i] += n
+
+    def ingest_file(self, path: str, project: str) -> int:
+        """Add usage from lines appended to a transcript since the last ingest."""
+        added = 0
+        offset = self.offsets.get(path, 0)
+        try:
+            if os.path.getsize(path) < offset:
+                offset = 0  # rewritten transcript; counts may double but never vanish
+            for line, offset in iter_appended_lines(path, offset):
+                usage = parse_usage_line(line)
+                if not usage:
+                    continue
+                hour = _utc_hour(usage["timestamp"])
+                if hour is None:
+                    continue
+                self.add(usage["model"], project, hour, tuple(usage[f] for f in ROLLUP_FIELDS))
+                added += 1
+        except OSError:
+            pass
+        self.offsets[path] = offset
+        return added
+
+    def refresh(self) -> int:
+        """Load from disk if needed, ingest appended transcript bytes, and save."""
+        with self._lock:
+            self.load()
+            projects_dir = _get_projects_dir()
+            added = 0
+            changed = self._loaded_from is None
+            if projects_dir:
+                for project in _iter_project_dirs(projects_dir):
+                    try:
+                        entries = list(os.scandir(project.path))
+                    except OSError:
+                        continue
+                    for entry in entries:
+                        if not entry.name.endswith(".jsonl"):
+                            continue
+                        try:
+                            size = entry.stat().st_size
+                        except OSError:
+                            continue
+                        if size != self.offsets.get(entry.path, 0):
+                            added += self.ingest_file(entry.path, project.name)
+                            changed = True
+            if changed:
+                self.save()
+            return added
+
+    def save(self) -> None:
+        keys = list(self.series)
+        header = json.dumps({
+            "base_hour": self.base_hour,
+            "keys": [list(k) for k in keys],
+            "lengths": [len(self.series[k]) for k in keys],
+            "offsets": self.offsets,
+        }, separators=(",", ":")).encode()
+        blob = zlib.compress(header + b"".join(self.series[k].tobytes() for k in keys), 6)
+        tmp = USAGE_ROLLUP_FILE + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_ROLLUP_MAGIC + struct.pack("<I", len(header)) + blob)
+            os.replace(tmp, USAGE_ROLLUP_FILE)
+            self._loaded_from = USAGE_ROLLUP_FILE
+        except OSError as e:
+            print(f"Failed to save usage rollup: {e}")
+
+    def load(self) -> None:
+        if self._loaded_from == USAGE_ROLLUP_FILE:
+            return
+        self._reset()
+        try:
+            with open(USAGE_ROLLUP_FILE, "rb") as f:
+                raw = f.read()
+            if raw[:4] != _ROLLUP_MAGIC:
+                return
+            header_len = struct.unpack("<I", raw[4:8])[0]
+            data = zlib.decompress(raw[8:])
+            header = json.loads(data[:header_len])
+            pos = header_len
+            for key, length in zip(header["keys"], header["lengths"]):
+                arr = array("Q")
+                arr.frombytes(data[pos:pos + length * 8])
+                self.series[tuple(key)] = arr
+                pos += length * 8
+            self.base_hour = header["base_hour"]
+            self.offsets = header["offsets"]
+            self._loaded_from = USAGE_ROLLUP_FILE
+        except (OSError, ValueError, KeyError, zlib.error, struct.error):
+            self._reset()
+
+    def _hour_range(self, start_hour: int, end_hour: int) -> range:
+        if self.base_hour is None:
+            return range(0)
+        return range(max(start_hour, self.base_hour) - self.base_hour,
+                     min(end_hour, self.base_hour + self.hours) - self.base_hour)
+
+    def summarize(self, start_ts: float, end_ts: float) -> dict:
+        """Aggregate [start_ts, end_ts) into totals, by_model and by_project."""
+        width = len(ROLLUP_FIELDS)
+        totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+        by_model: dict[str, dict[str, int]] = {}
+        by_project: dict[str, int] = {}
+        hours = self._hour_range(int(start_ts // 3600), int(-(-end_ts // 3600)))
+        lo, hi = hours.start * width, hours.stop * width
+        for (model, project), arr in self.series.items():
+            sums = [sum(arr[lo + i:hi:width]) for i in range(width)]
+            if not any(sums):
+                continue
+            for field, n in zip(ROLLUP_FIELDS, sums):
+                totals[field] += n
+            m = by_model.setdefault(model, {"input": 0, "output": 0})
+            m["input"] += sums[0]
+            m["output"] += sums[1]
+            by_project[project] = by_project.get(project, 0) + sums[0] + sums[1]
+        return {"totals": totals, "by_model": by_model, "by_project": by_project}
+
+    def hourly_totals(self, start_hour: int, end_hour: int) -> list[int]:
+        """Input+output tokens for each UTC hour in [start_hour, end_hour)."""
+        width = len(ROLLUP_FIELDS)
+        result = [0] * max(0, end_hour - start_hour)
+        if self.base_hour is None:
+            return result
+        hours = self._hour_range(start_hour, end_hour)
+        shift = self.base_hour - start_hour
+        for arr in self.series.values():
+            for h in hours:
+                i = h * width
+                if i + 1 >= len(arr):
+                    break
+                result[h + shift] += arr[i] + arr[i + 1]
+        return result
+
+
+_usage_rollup = UsageRollup()
+
+
+# --- Spend watchdog ---
+
+
+def _parse_amounts(value: str) -> list[float]:
+    """'5, 10,20' -> [5.0, 10.0, 20.0]; invalid or non-positive entries are skipped."""
+    amounts = []
+    for part in value.split(","):
+        try:
+            amount = float(part)
+        except ValueError:
+            continue
+        if amount > 0:
+            amounts.append(amount)
+    return sorted(amounts)
+
+
+# Estimated USD: alert thresholds (comma lists), daily hard cap and what the cap does
+SPEND_DAILY_ALERTS = _parse_amounts(_config_value("SPEND_DAILY_ALERTS"))
+SPEND_SESSION_ALERTS = _parse_amounts(_config_value("SPEND_SESSION_ALERTS"))
+SPEND_DAILY_CAP = max(_parse_amounts(_config_value("SPEND_DAILY_CAP")), default=0.0)
+SPEND_CAP_ACTIONS = frozenset(a.strip() for a in _config_value("SPEND_CAP_ACTION").split(",") if a.strip())
+SPEND_POLL_INTERVAL = 5.0
+
+_local_day_cache: dict[int, str] = {}
+
+
+def _local_day(timestamp: str) -> str | None:
+    """Local YYYY-MM-DD of an ISO UTC timestamp (hour resolution, memoised)."""
+    hour = _utc_hour(timestamp)
+    if hour is None:
+        return None
+    day = _local_day_cache.get(hour)
+    if day is None:
+        day = _local_day_cache[hour] = time.strftime("%Y-%m-%d", time.localtime(hour * 3600))
+    return day
+
+
+class SpendWatchdog:
+    """Running cost estimates per local day and per session, from transcript tails.
+
+    Each poll reads only the bytes appended to transcripts touched today and
+    prices usage lines with _estimate_cost. An alert threshold fires once per
+    day (daily) or once per session; the cap fires once per day and applies
+    SPEND_CAP_ACTIONS ("pause" sync, "escape" to interrupt Claude). Thresholds
+    already crossed when the bridge starts are not announced again, but a cap
+    already reached is still enforced once.
+    """
+
+    def __init__(self, daily_alerts: list[float], session_alerts: list[float],
+                 daily_cap: float = 0.0, cap_actions: frozenset[str] = frozenset()):
+        self.daily_alerts = daily_alerts
+        self.session_alerts = session_alerts
+        self.daily_cap = daily_cap
+        self.cap_actions = cap_actions
+        self._lock = threading.Lock()
+        self.offsets: dict[str, int] = {}
+        self.daily: dict[str, float] = {}
+        self.sessions: dict[str, float] = {}
+        self.fired: set[tuple] = set()
+        self._primed = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.daily_alerts or self.session_alerts or self.daily_cap)
+
+    def today(self, now: float | None = None) -> float:
+        return self.daily.get(time.strftime("%Y-%m-%d", time.localtime(now)), 0.0)
+
+    def ingest_file(self, path: str) -> bool:
+        """Price lines appended since the last poll; True if any cost was added."""
+        session_id = os.path.basename(path)[:-len(".jsonl")]
+        offset = self.offsets.get(path, 0)
+        added = False
+        try:
+            if os.path.getsize(path) < offset:
+                offset = 0
+            for line, offset in iter_appended_lines(path, offset):
+                usage = parse_usage_line(line)
+                if not usage:
+                    continue
+                cost = _estimate_cost(usage["model"], usage["input"], usage["output"])
+                day = _local_day(usage["timestamp"])
+                if not cost or day is None:
+                    continue
+                self.daily[day] = self.daily.get(day, 0.0) + cost
+                self.sessions[session_id] = self.sessions.get(session_id, 0.0) + cost
+                added = True
+        except OSError:
+            pass
+        self.offsets[path] = offset
+        return added
+
+    def poll(self, now: float | None = None) -> list[tuple[str | None, str]]:
+        """Ingest appended usage; return new alerts as (session_id or None, text)."""
+        now = time.time() if now is None else now
+        midnight = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        with self._lock:
+            changed = []
+            projects_dir = _get_projects_dir()
+            for project in _iter_project_dirs(projects_dir) if projects_dir else ():
+                try:
+                    entries = list(os.scandir(project.path))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if not entry.name.endswith(".jsonl"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if st.st_mtime < midnight or st.st_size == self.offsets.get(entry.path, 0):
+                        continue
+                    if self.ingest_file(entry.path):
+                        changed.append(entry.name[:-len(".jsonl")])
+            alerts = self._check(now, changed, announce=self._primed)
+            self._primed = True
+            return alerts
+
+    def _fire(self, key: tuple) -> bool:
+        if key in self.fired:
+            return False
+        self.fired.add(key)
+        return True
+
+    def _check(self, now: float, changed: list[str], announce: bool = True) -> list[tuple[str | None, str]]:
+        """Fire crossed thresholds; announce=False (priming) marks alerts fired without sending them."""
+        alerts: list[tuple[str | None, str]] = []
+        day = time.strftime("%Y-%m-%d", time.localtime(now))
+        spent = self.daily.get(day, 0.0)
+        for threshold in self.daily_alerts:
+            if spent >= threshold and self._fire(("daily", day, threshold)) and announce:
+                alerts.append((None, f"💸 Spend today ~${spent:.2f} (alert at ${threshold:g})"))
+        for session_id in changed:
+            cost = self.sessions[session_id]
+            for threshold in self.session_alerts:
+                if cost >= threshold and self._fire(("session", session_id, threshold)) and announce:
+                    alerts.append((session_id, f"💸 Session {session_id[:8]} ~${cost:.2f} (alert at ${threshold:g})"))
+        if self.daily_cap and spent >= self.daily_cap and self._fire(("cap", day)):
+            # A cap already reached at startup is still enforced: a restart must not lift it
+            done = self._apply_cap_actions()
+            if announce or done:
+                alerts.append((None, f"🛑 Daily cap ${self.daily_cap:g} reached (~${spent:.2f})"
+                                     + "".join(f"\n{d}" for d in done)))
+        return alerts
+
+    def _apply_cap_actions(self) -> list[str]:
+        done = []
+        if "escape" in self.cap_actions and tmux_exists():
+            tmux_send_escape()
+            done.append("Claude interrupted (Escape)")
+        if "pause" in self.cap_actions:
+            try:
+                with open(SYNC_PAUSED_FILE, "w") as f:
+                    f.write(str(int(time.time())))
+                done.append("🟡 Sync paused. Use /start, /resume, or /continue to resume.")
+            except OSError as e:
+                print(f"Failed to pause sync at spend cap: {e}")
+        return done
+
+
+_spend_watchdog = SpendWatchdog(SPEND_DAILY_ALERTS, SPEND_SESSION_ALERTS, SPEND_DAILY_CAP, SPEND_CAP_ACTIONS)
+
+
+def _alert_chat(session_id: str | None) -> str | None:
+    """Session alerts go to the session's owner; everything else to the last active chat."""
+    if session_id:
+        owner = get_chat_id_for_session(session_id)
+        if owner:
+            return owner
+    try:
+        with open(CHAT_ID_FILE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def spend_watchdog_loop(interval: float = SPEND_POLL_INTERVAL) -> None:
+    """Background loop: poll transcript tails and push spend alerts."""
+    while True:
+        try:
+            for session_id, text in _spend_watchdog.poll():
+                chat_id = _alert_chat(session_id)
+                if chat_id:
+                    telegram_api("sendMessage", {"chat_id": chat_id, "text": text})
+        except Exception as e:
+            print(f"Spend watchdog error: {e}")
+        time.sleep(interval)
+
+
+def parse_report_range(arg: str, now: datetime | None = None) -> tuple[str, float, float] | None:
+    """Parse a /report argument: '90d', '2026-09' or '2026-09-15' (local time).
+
+    Returns (label, start_ts, end_ts) or None if unrecognised.
+    """
+    now = now or datetime.now()
+    m = re.fullmatch(r"(\d{1,4})d", arg)
+    if m:
+        days = int(m.group(1))
+        if days < 1:
+            return None
+        start = (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return f"Last {days}d", start.timestamp(), now.timestamp()
+    try:
+        if re.fullmatch(r"\d{4}-\d{2}", arg):
+            start = datetime.strptime(arg, "%Y-%m")
+            end = (start + timedelta(days=32)).replace(day=1)
+        elif re.fullmatch(r"\d{4}-\d{2}-\d{2}", arg):
+            start = datetime.strptime(arg, "%Y-%m-%d")
+            end = start + timedelta(days=1)
+        else:
+            return None
+    except ValueError:
+        return None
+    return arg, start.timestamp(), min(end, now).timestamp()
+
+
+def format_range_report(label: str, summary: dict) -> str:
+    """Format a UsageRollup.summarize() result."""
+    totals = summary["totals"]
+    total = totals["input"] + totals["output"]
+    cost = _total_cost(summary["by_model"])
+    lines = [f"📊 Token Usage: {label}", ""]
+    lines.append(
+        f"Total: {_format_tokens(total)} (in:{_format_tokens(totals['input'])}"
+        f" out:{_format_tokens(totals['output'])})" + (f" ~${cost:.2f}" if cost > 0 else "")
+    )
+    if totals["cache_read"] or totals["cache_write"]:
+        lines.append(f"Cache: read {_format_tokens(totals['cache_read'])}, write {_format_tokens(totals['cache_write'])}")
+    by_model = summary["by_model"]
+    if by_model:
+        lines += ["", "📦 By Model"]
+        grand = total or 1
+        for model, c in sorted(by_model.items(), key=lambda x: x[1]["input"] + x[1]["output"], reverse=True):
+            count = c["input"] + c["output"]
+            m_cost = _estimate_cost(model, c["input"], c["output"])
+            lines.append(f"  {shorten_model_name(model)}: {_format_tokens(count)} {_bar(count / grand)}"
+                         + (f" ~${m_cost:.2f}" if m_cost > 0 else ""))
+    by_project = summary["by_project"]
+    if by_project:
+        lines += ["", "📁 By Project (top 5)"]
+        grand = sum(by_project.values()) or 1
+        for proj, count in sorted(by_project.items(), key=lambda x: x[1], reverse=True)[:5]:
+            lines.append(f"  {_short_project_name(proj, 2)}: {_format_tokens(count)} {_bar(count / grand)}")
+    return "\n".join(lines)
+
+
+def format_burn_report(rollup: UsageRollup, now_ts: float | None = None) -> str:
+    """Hourly burn rate over the last 24h with a sparkline."""
+    now_ts = now_ts or time.time()
+    end_hour = int(now_ts // 3600) + 1
+    hourly = rollup.hourly_totals(end_hour - 24, end_hour)
+    ticks = " ▁▂▃▄▅▆▇█"
+    peak = max(hourly) or 1
+    spark = "".join(ticks[min(8, -(-n * 8 // peak))] for n in hourly)
+    recent = sum(hourly[-3:]) / 3
+    summary = rollup.summarize((end_hour - 3) * 3600, now_ts)
+    cost_rate = _total_cost(summary["by_model"]) / 3
+    return "\n".join([
+        "🔥 Burn rate (last 24h)",
+        "",
+        f"<code>{spark}</code>",
+        f"Last 3h: {_format_tokens(int(recent))}/h" + (f" ~${cost_rate:.2f}/h" if cost_rate > 0 else ""),
+        f"24h total: {_format_tokens(sum(hourly))}, peak hour {_format_tokens(max(hourly))}",
+    ])
+
+
+def format_heatmap_report(rollup: UsageRollup, now: datetime | None = None, days: int = 7) -> str:
+    """Day x hour-of-day heatmap (local time) for the last `days` days."""
+    now = now or datetime.now()
+    first_day = (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    start_hour = int(first_day.timestamp() // 3600)
+    hourly = rollup.hourly_totals(start_hour, start_hour + days * 24)
+    peak = max(hourly) or 1
+    shades = " ░▒▓█"
+    lines = ["🗓 Usage heatmap (hour of day)", "", "<code>       0     6     12    18"]
+    for d in range(days):
+        day = first_day + timedelta(days=d)
+        row = hourly[d * 24:(d + 1) * 24]
+        cells = "".join(shades[min(4, -(-n * 4 // peak))] for n in row)
+        lines.append(f"{day.strftime('%a')} {day.day:>2} {cells}")
+    lines[-1] += "</code>"
+    lines.append(f"Peak hour: {_format_tokens(max(hourly))}")
+    return "\n".join(lines)
+
+
+# --- /perf probes ---
+#
+# Each probe times one dependency the way the bridge or the hooks use it. A
+# run's medians are kept in PERF_BASELINE_FILE; the median of the last
+# PERF_HISTORY runs is the baseline the next run is compared against.
+
+PERF_SAMPLES = 5
+PERF_HISTORY = 10
+PERF_SLOW_RATIO = 2.0
+# The transcript probe parses at most this much of the newest transcript's end
+PERF_TRANSCRIPT_TAIL = 256 * 1024
+
+
+def _probe_bot_api() -> None:
+    with urllib.request.urlopen(_api_request("getMe", {}), timeout=API_TIMEOUT_MAX) as r:
+        r.read()
+
+
+def _probe_tmux() -> None:
+    if _tmux_run("display-message", "-p", "-t", TMUX_SESSION, "#{pane_id}", capture=True).returncode:
+        raise RuntimeError("tmux session not found")
+
+
+def _probe_transcript(path: str) -> Callable[[], None]:
+    """Read and parse the transcript's last PERF_TRANSCRIPT_TAIL bytes, as a tail reader does."""
+    def read() -> None:
+        with open(path, "rb") as f:
+            start = max(0, os.fstat(f.fileno()).st_size - PERF_TRANSCRIPT_TAIL)
+            f.seek(start)
+            lines = f.read().split(b"\n")
+        for line in lines[1:] if start else lines:  # the first line of a tail is cut
+            if line.strip():
+                json.loads(line)
+    return read
+
+
+def _probe_log_append(path: str) -> Callable[[], None]:
+    """Open-append-close, as the hooks log every message."""
+    def append() -> None:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"[{time.strftime('%H:%M:%S')}] perf probe\n")
+    return append
+
+
+def perf_probes() -> list[tuple[str, Callable[[], None] | None]]:
+    """(name, probe) in report order; None when there is nothing to time here."""
+    newest = get_recent_sessions_from_files(limit=1)
+    transcript = find_session_file(newest[0]["session_id"]) if newest else None
+    os.makedirs(LOG_DIR, exist_ok=True)
+    return [
+        ("Bot API round-trip", _probe_bot_api if BOT_TOKEN else None),
+        ("tmux round-trip", _probe_tmux),
+        ("Project catalog scan", lambda: get_projects(limit=PAGE_SIZE)),
+        ("Transcript read", _probe_transcript(str(transcript)) if transcript else None),
+        ("Log append", _probe_log_append(os.path.join(LOG_DIR, ".perf_probe.log"))),
+    ]
+
+
+def run_perf_probes(samples: int = PERF_SAMPLES) -> dict[str, float | str]:
+    """Median milliseconds per probe, or why it could not run."""
+    results: dict[str, float | str] = {}
+    for name, probe in perf_probes():
+        if probe is None:
+            results[name] = "n/a"
+            continue
+        timings = []
+        try:
+            for _ in range(samples):
+                start = time.perf_counter()
+                probe()
+                timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            results[name] = f"failed ({e})"
+            continue
+        results[name] = statistics.median(timings)
+    try:
+        os.remove(os.path.join(LOG_DIR, ".perf_probe.log"))
+    except OSError:
+        pass
+    return results
+
+
+def load_perf_history() -> dict[str, list[float]]:
+    try:
+        with open(PERF_BASELINE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_perf_run(results: dict[str, float | str]) -> dict[str, float]:
+    """Append this run's medians to the history; the baselines from before it."""
+    history = load_perf_history()
+    baselines = {name: statistics.median(runs) for name, runs in history.items() if runs}
+    for name, value in results.items():
+        if isinstance(value, float):
+            history[name] = (history.get(name, []) + [round(value, 3)])[-PERF_HISTORY:]
+    try:
+        with open(PERF_BASELINE_FILE, "w") as f:
+            json.dump(history, f)
+    except OSError:
+        pass
+    return baselines
+
+
+_perf_lock = threading.Lock()
+
+
+def start_perf_run(reply: Callable[[str], None]) -> bool:
+    """Run the probes on a background thread and reply with the report; False if a run is in progress.
+
+    The probes take seconds (Bot API round-trips), so they must not hold up
+    the webhook handler.
+    """
+    if not _perf_lock.acquire(blocking=False):
+        return False
+
+    def run() -> None:
+        try:
+            results = run_perf_probes()
+            reply(format_perf_report(results, record_perf_run(results)))
+        except Exception as e:
+            print(f"Perf probes error: {e}")
+        finally:
+            _perf_lock.release()
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def format_perf_report(results: dict[str, float | str], baselines: dict[str, float]) -> str:
+    lines = [f"⏱ Perf (median of {PERF_SAMPLES})"]
+    for name, value in results.items():
+        if not isinstance(value, float):
+            lines.append(f"{name}: {value}")
+            continue
+        line = f"{name}: {value:.1f} ms"
+        base = baselines.get(name)
+        if base:
+            ratio = value / base
+            flag = " ⚠️" if ratio >= PERF_SLOW_RATIO else ""
+            line += f" (usual {base:.1f}, ×{ratio:.1f}){flag}"
+        lines.append(line)
+    if not baselines:
+        lines.append("\nFirst run: saved as the baseline.")
+    return "\n".join(lines)
+
+
+# --- Conversation log archive ---
+#
+# Closed days of cc_MMDDYYYY.log are appended to a monthly archive
+# (archive/cc_YYYYMM.log.gz) as independent gzip members, one per hour of
+# log entries. archive/cc_YYYYMM.idx.json maps each day to
+# [[hour, offset, length], ...] so any time range can be read by seeking to
+# the matching members without decompressing the rest of the month. It also
+# records the [size, mtime_ns] of every archived source log, so a log whose
+# removal was interrupted is not archived twice.
+
+_LOG_ENTRY_RE = re.compile(r"^\[(\d{2}):\d{2}\] ")
+
+
+def _log_archive_dir() -> str:
+    return os.path.join(LOG_DIR, "archive")
+
+
+def _archive_paths(month: str) -> tuple[str, str]:
+    """Return (gzip path, index path) for a YYYYMM month key."""
+    base = os.path.join(_log_archive_dir(), f"cc_{month}")
+    return base + ".log.gz", base + ".idx.json"
+
+
+def _load_archive_index(idx_path: str) -> dict[str, dict[str, list]]:
+    """Return {"days": {day: members}, "sources": {log name: [size, mtime_ns, inode]}}."""
+    try:
+        with open(idx_path) as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        index = {}
+    if index and "days" not in index:
+        index = {"days": index}  # written before sources were recorded
+    index.setdefault("days", {})
+    index.setdefault("sources", {})
+    return index
+
+
+def _save_archive_index(idx_path: str, index: dict) -> None:
+    tmp = idx_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp, idx_path)
+
+
+def _split_log_by_hour(text: str) -> list[tuple[int, str]]:
+    """Split a daily log into (hour, text) chunks on its [HH:MM] entry headers."""
+    chunks: list[list] = []  # [hour | None, lines]
+    for line in text.splitlines(keepends=True):
+        m = _LOG_ENTRY_RE.match(line)
+        hour = int(m.group(1)) if m else None
+        if not chunks:
+            chunks.append([hour, []])
+        elif hour is not None and chunks[-1][0] is None:
+            chunks[-1][0] = hour  # leading blank lines belong to the first entry
+        elif hour is not None and hour != chunks[-1][0]:
+            chunks.append([hour, []])
+        chunks[-1][1].append(line)
+    return [(hour or 0, "".join(lines)) for hour, lines in chunks]
+
+
+def _parse_log_day(filename: str) -> date | None:
+    """Extract the date from a cc_<LOG_DATE_FORMAT>.log filename."""
+    if not (filename.startswith("cc_") and filename.endswith(".log")):
+        return None
+    try:
+        return datetime.strptime(filename[3:-4], LOG_DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def archive_logs(today: date | None = None) -> int:
+    """Compress every closed (before today) daily log into its monthly archive.
+
+    Source logs are removed once their members and index entry are written;
+    a log the index already records is only removed, and one that grew after
+    being indexed contributes only the bytes added since, so rerunning after
+    an interrupted run never archives a day twice. Returns the number of
+    days archived.
+    """
+    today = today or date.today()
+    try:
+        names = sorted(os.listdir(LOG_DIR))
+    except OSError:
+        return 0
+    archived = 0
+    for name in names:
+        day = _parse_log_day(name)
+        if not day or day >= today:
+            continue
+        src = os.path.join(LOG_DIR, name)
+        os.makedirs(_log_archive_dir(), exist_ok=True)
+        gz_path, idx_path = _archive_paths(day.strftime("%Y%m"))
+        index = _load_archive_index(idx_path)
+        previous = index["sources"].get(name) or []
+        with open(src, "rb") as f:
+            st = os.fstat(f.fileno())
+            source = [st.st_size, st.st_mtime_ns, st.st_ino]
+            if previous[:2] == source[:2]:
+                text = None
+            else:
+                # A late write to a log indexed but not yet removed: archive only what was added
+                if len(previous) > 2 and previous[2] == st.st_ino and previous[0] <= st.st_size:
+                    f.seek(previous[0])
+                text = f.read().decode("utf-8", errors="replace")
+        if text is None:
+            os.remove(src)  # indexed by a run that stopped before removing it
+            continue
+        members = []
+        with open(gz_path, "a+b") as out:
+            # Drop members an interrupted run wrote without indexing them
+            offset = max((o + n for ms in index["days"].values() for _, o, n in ms), default=0)
+            out.truncate(offset)
+            out.seek(offset)
+            for hour, chunk in _split_log_by_hour(text):
+                data = gzip.compress(chunk.encode("utf-8"), mtime=0)
+                out.write(data)
+                members.append([hour, offset, len(data)])
+                offset += len(data)
+        # Extend rather than replace so a late write to an archived day is kept
+        index["days"].setdefault(day.isoformat(), []).extend(members)
+        index["sources"][name] = source
+        _save_archive_index(idx_path, index)
+        os.remove(src)
+        archived += 1
+    return archived
+
+
+def read_archived_logs(start: datetime, end: datetime) -> str:
+    """Return archived log text for hours overlapping [start, end].
+
+    Only the hourly members inside the range are read and decompressed.
+    """
+    parts = []
+    month_start = date(start.year, start.month, 1)
+    while month_start <= end.date():
+        gz_path, idx_path = _archive_paths(month_start.strftime("%Y%m"))
+        days = _load_archive_index(idx_path)["days"]
+        if days:
+            with open(gz_path, "rb") as f:
+                for day_key in sorted(days):
+                    day = date.fromisoformat(day_key)
+                    for hour, offset, length in days[day_key]:
+                        chunk_start = datetime(day.year, day.month, day.day, hour)
+                        if chunk_start + timedelta(hours=1) <= start or chunk_start > end:
+                            continue
+                        f.seek(offset)
+                        parts.append(gzip.decompress(f.read(length)).decode("utf-8", errors="replace"))
+        month_start = (month_start + timedelta(days=32)).replace(day=1)
+    return "".join(parts)
+
+
+def prune_log_archive(retention_days: int | None = None, today: date | None = None) -> int:
+    """Delete monthly archives whose newest day is older than the retention window."""
+    retention_days = LOG_ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    removed = 0
+    try:
+        names = os.listdir(_log_archive_dir())
+    except OSError:
+        return 0
+    for name in names:
+        if not name.endswith(".idx.json"):
+            continue
+        gz_path, idx_path = _archive_paths(name[3:-len(".idx.json")])
+        days = _load_archive_index(idx_path)["days"]
+        if days and date.fromisoformat(max(days)) >= cutoff:
+            continue
+        for fp in (gz_path, idx_path):
+            if os.path.exists(fp):
+                os.remove(fp)
+        removed += 1
+    return removed
+
+
+def rotate_debug_log(max_bytes: int | None = None) -> bool:
+    """Rotate debug.log to debug.log.1.gz once it exceeds max_bytes."""
+    max_bytes = DEBUG_LOG_MAX_BYTES if max_bytes is None else max_bytes
+    path = os.path.join(LOG_DIR, "debug.log")
+    try:
+        if os.path.getsize(path) <= max_bytes:
+            return False
+        rotated = path + ".1"
+        os.replace(path, rotated)
+        with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+            while chunk := src.read(1 << 16):
+                dst.write(chunk)
+        os.remove(rotated)
+        return True
+    except OSError:
+        return False
+
+
+def log_maintenance_loop(interval: float = 3600) -> None:
+    """Background loop: archive closed days, apply retention, rotate debug.log."""
+    while True:
+        try:
+            archive_logs()
+            prune_log_archive()
+            rotate_debug_log()
+        except Exception as e:
+            print(f"Log maintenance error: {e}")
+        time.sleep(interval)
+
+
 def decode_project_path(encoded_name: str, exists_fn=os.path.isdir) -> str | None:
     """Decode project directory name back to path (best effort).
 
@@ -803,90 +2901,774 @@ def get_project_path_for_session(session_id: str) -> str | None:
     return None
 
 
+# --- Pane process tree (Linux /proc) ---
+
+PROC_ROOT = "/proc"
+# How deep below the pane's shell to look for the claude process
+PANE_SEARCH_DEPTH = 4
+_SESSION_ID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+_RESUME_FLAGS = ("--resume", "-r", "--session-id")
+
+
+def encode_project_path(path: str) -> str:
+    """Claude Code's project directory name for a cwd: /Users/foo/my.app -> -Users-foo-my-app."""
+    return re.sub(r"[^A-Za-z0-9]", "-", path)
+
+
+def tmux_get_pane_pid() -> int | None:
+    """PID of the process tmux started in the pane (usually the shell)."""
+    result = _tmux_run("display-message", "-t", TMUX_SESSION, "-p", "#{pane_pid}", capture=True, text=True)
+    try:
+        return int(result.stdout.strip()) if result.returncode == 0 else None
+    except ValueError:
+        return None
+
+
+def _proc_read(pid: int, name: str) -> str | None:
+    try:
+        with open(f"{PROC_ROOT}/{pid}/{name}") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _proc_stat_fields(pid: int) -> list[str] | None:
+    """/proc/<pid>/stat fields from state (field 3) on; comm may contain spaces."""
+    stat = _proc_read(pid, "stat")
+    return stat[stat.rfind(")") + 2:].split() if stat else None
+
+
+def _proc_children(pid: int) -> list[int]:
+    children = _proc_read(pid, f"task/{pid}/children")
+    if children is not None:
+        return [int(c) for c in children.split()]
+    # Kernels without CONFIG_PROC_CHILDREN: scan every process's parent
+    found = []
+    try:
+        pids = [int(e) for e in os.listdir(PROC_ROOT) if e.isdigit()]
+    except OSError:
+        return []
+    for child in pids:
+        fields = _proc_stat_fields(child)
+        if fields and len(fields) > 1 and fields[1] == str(pid):
+            found.append(child)
+    return found
+
+
+def _proc_cmdline(pid: int) -> list[str]:
+    raw = _proc_read(pid, "cmdline")
+    return [a for a in raw.split("\0") if a] if raw else []
+
+
+def _is_claude_cmdline(cmdline: list[str]) -> bool:
+    """The native `claude` binary, or node running Claude Code's cli.js."""
+    for arg in cmdline[:2]:
+        if os.path.basename(arg) == "claude" or arg.endswith("claude-code/cli.js"):
+            return True
+    return False
+
+
+def find_claude_pid(pane_pid: int, max_depth: int = PANE_SEARCH_DEPTH) -> int | None:
+    """Breadth-first search below the pane's process for a claude process."""
+    level = [pane_pid]
+    for _ in range(max_depth + 1):
+        for pid in level:
+            if _is_claude_cmdline(_proc_cmdline(pid)):
+                return pid
+        level = [c for pid in level for c in _proc_children(pid)]
+        if not level:
+            break
+    return None
+
+
+_boot_time: float | None = None
+
+
+def _proc_start_time(pid: int) -> float | None:
+    """Process start as epoch seconds (stat starttime + boot time)."""
+    global _boot_time
+    fields = _proc_stat_fields(pid)
+    if not fields or len(fields) < 20:
+        return None
+    if _boot_time is None:
+        try:
+            with open(f"{PROC_ROOT}/stat") as f:
+                _boot_time = next(float(line.split()[1]) for line in f if line.startswith("btime "))
+        except (OSError, StopIteration, ValueError, IndexError):
+            return None
+    return _boot_time + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+
+
+# claude pid -> (start time, project dir, session id from argv); validated by start time
+_claude_proc_cache: dict[int, tuple[float, str | None, str | None]] = {}
+
+
+def _claude_proc_info(pid: int) -> tuple[float, str | None, str | None] | None:
+    start = _proc_start_time(pid)
+    if start is None:
+        return None
+    cached = _claude_proc_cache.get(pid)
+    if cached and cached[0] == start:
+        return cached
+    projects_dir = _get_projects_dir()
+    try:
+        cwd = os.readlink(f"{PROC_ROOT}/{pid}/cwd")
+    except OSError:
+        cwd = None
+    project_dir = str(projects_dir / encode_project_path(cwd)) if projects_dir and cwd else None
+    argv_sid = None
+    cmdline = _proc_cmdline(pid)
+    for i, arg in enumerate(cmdline):
+        flag, _, value = arg.partition("=")
+        if flag in _RESUME_FLAGS:
+            value = value or (cmdline[i + 1] if i + 1 < len(cmdline) else "")
+            if _SESSION_ID_RE.match(value):
+                argv_sid = value
+    info = (start, project_dir, argv_sid)
+    _claude_proc_cache.clear()  # one pane, one claude: keep only the live entry
+    _claude_proc_cache[pid] = info
+    return info
+
+
+# (claude start time, when, session id or None for /clear) of the bridge's last
+# in-process /clear or /resume; from then on that process's argv is stale
+_pane_switch: tuple[float, float, str | None] | None = None
+
+
+def _pane_claude() -> tuple[int, tuple[float, str | None, str | None]] | None:
+    """(pid, process info) of the claude process running in the tmux pane."""
+    if not os.path.isdir(PROC_ROOT):
+        return None
+    pane_pid = tmux_get_pane_pid()
+    pid = find_claude_pid(pane_pid) if pane_pid else None
+    info = _claude_proc_info(pid) if pid else None
+    return (pid, info) if info else None
+
+
+def note_pane_switch(session_id: str | None) -> None:
+    """Record that the bridge is switching the pane's claude to another session in-process."""
+    global _pane_switch
+    pane = _pane_claude()
+    _pane_switch = (pane[1][0], time.time(), session_id) if pane else None
+
+
+def _open_transcript(pid: int) -> str | None:
+    """Session whose transcript the process holds open, if any."""
+    projects_dir = str(_get_projects_dir() or "")
+    try:
+        fds = os.listdir(f"{PROC_ROOT}/{pid}/fd")
+    except OSError:
+        return None
+    for fd in fds:
+        try:
+            target = os.readlink(f"{PROC_ROOT}/{pid}/fd/{fd}")
+        except OSError:
+            continue
+        if projects_dir and target.startswith(projects_dir) and target.endswith(".jsonl"):
+            return os.path.basename(target)[:-len(".jsonl")]
+    return None
+
+
+def _newest_transcript_since(project_dir: str, since: float) -> str | None:
+    newest, newest_mtime = None, since
+    try:
+        with os.scandir(project_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".jsonl"):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if mtime >= newest_mtime:
+                    newest, newest_mtime = entry.name[:-len(".jsonl")], mtime
+    except OSError:
+        return None
+    return newest
+
+
+def detect_pane_session() -> str | None:
+    """Session of the claude process running in the tmux pane (Linux /proc only).
+
+    Walks from #{pane_pid} to the claude process, then asks, in order: which
+    transcript it holds open (exact, but Claude rarely keeps it open); which
+    session its --resume/--session-id argument named (a new --session-id has
+    no transcript yet), unless the bridge has since run /clear or /resume in
+    that process, which leaves the argument stale. Otherwise it guesses: the
+    newest transcript in its project directory written since it started (or
+    since that switch, falling back to the /resume target), a heuristic that
+    can pick another Claude's session in the same project. Per-process facts
+    are cached.
+    """
+    pane = _pane_claude()
+    if pane is None:
+        return None
+    pid, (start, project_dir, argv_sid) = pane
+    open_sid = _open_transcript(pid)
+    if open_sid:
+        return open_sid
+    switch = _pane_switch
+    if switch and switch[0] == start:
+        newest = _newest_transcript_since(project_dir, switch[1]) if project_dir else None
+        return newest or switch[2]
+    if argv_sid:
+        return argv_sid
+    return _newest_transcript_since(project_dir, start) if project_dir else None
+
+
+def get_current_session_id():
+    """Get current session ID with cross-validation for reliability."""
+    # Exact answer from the pane's claude process where /proc is available
+    pane_sid = detect_pane_session()
+    if pane_sid:
+        return pane_sid
+
+    title_sid = tmux_get_title()
+    file_sid = None
+
+    # Read from current session file
+    if os.path.exists(CURRENT_SESSION_FILE):
+        try:
+            with open(CURRENT_SESSION_FILE) as f:
+                file_sid = f.read().strip()
+        except OSError:
+            pass
+
+    # If both match, high confidence
+    if title_sid and title_sid == file_sid:
+        return title_sid
+
+    # Get most recently modified session file as ground truth
+    projects_dir = _get_projects_dir()
+    recent_sid = None
+    if projects_dir:
+        all_jsonls = list(projects_dir.glob("*/*.jsonl"))
+        if all_jsonls:
+            most_recent = max(all_jsonls, key=lambda p: p.stat().st_mtime)
+            recent_sid = most_recent.stem
+
+    # Prefer tmux title if it matches recent file
+    if title_sid and title_sid == recent_sid:
+        return title_sid
+
+    # Prefer file_sid if it matches recent file
+    if file_sid and file_sid == recent_sid:
+        return file_sid
+
+    # Fallback: use recent file (most reliable ground truth)
+    if recent_sid:
+        return recent_sid
+
+    # Last resort: use whatever we have
+    return title_sid or file_sid
+
+
+def load_session_chat_map() -> dict[str, Any]:
+    """Load session-to-chat mapping from file.
+
+    Values are either an owner chat ID string or {"owner": ..., "watchers": [...]}.
+    """
+    if not os.path.exists(SESSION_CHAT_MAP_FILE):
+        return {}
+    try:
+        with open(SESSION_CHAT_MAP_FILE) as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+
+def save_session_chat_map(mapping: dict[str, Any]) -> None:
+    """Save session-to-chat mapping to file."""
+    try:
+        with open(SESSION_CHAT_MAP_FILE, "w") as f:
+            json.dump(mapping, f, indent=2)
+    except OSError as e:
+        print(f"Failed to save session-chat map: {e}")
+
+
+def _parse_binding(value: Any) -> tuple[str | None, list[str]]:
+    """Split a session_chat_map value into (owner, watchers)."""
+    if isinstance(value, dict):
+        owner = value.get("owner")
+        return (str(owner) if owner else None), [str(w) for w in value.get("watchers", [])]
+    return (str(value) if value else None), []
+
+
+def _format_binding(owner: str | None, watchers: list[str]) -> Any:
+    """Inverse of _parse_binding; plain owner strings stay plain for old hooks."""
+    if not watchers:
+        return owner
+    return {"owner": owner, "watchers": watchers}
+
+
+def bind_session_to_chat(session_id: str, chat_id: int) -> None:
+    """Bind a session ID to a Telegram chat ID as its owner, keeping other watchers."""
+    if not session_id:
+        return
+    mapping = load_session_chat_map()
+    _, watchers = _parse_binding(mapping.get(session_id))
+    mapping[session_id] = _format_binding(str(chat_id), [w for w in watchers if w != str(chat_id)])
+    save_session_chat_map(mapping)
+    # Also save current session ID for hooks to use
+    try:
+        with open(CURRENT_SESSION_FILE, "w") as f:
+            f.write(session_id)
+    except OSError:
+        pass
+
+
+def get_chat_id_for_session(session_id: str) -> str | None:
+    """Get the owner chat ID bound to a session."""
+    if not session_id:
+        return None
+    mapping = load_session_chat_map()
+    return _parse_binding(mapping.get(session_id))[0]
+
+
+def get_session_watchers(session_id: str) -> list[str]:
+    """Read-only observer chat IDs of a session."""
+    if not session_id:
+        return []
+    return _parse_binding(load_session_chat_map().get(session_id))[1]
+
+
+def get_session_recipients(session_id: str) -> list[str]:
+    """Owner first, then watchers: every chat that receives a session's output."""
+    owner, watchers = _parse_binding(load_session_chat_map().get(session_id)) if session_id else (None, [])
+    return ([owner] if owner else []) + watchers
+
+
+def set_session_watcher(session_id: str, chat_id: int, watching: bool) -> bool:
+    """Add or remove a read-only watcher; returns False if nothing changed."""
+    if not session_id:
+        return False
+    mapping = load_session_chat_map()
+    owner, watchers = _parse_binding(mapping.get(session_id))
+    cid = str(chat_id)
+    if watching == (cid in watchers) or (watching and cid == owner):
+        return False
+    watchers = watchers + [cid] if watching else [w for w in watchers if w != cid]
+    mapping[session_id] = _format_binding(owner, watchers)
+    save_session_chat_map(mapping)
+    return True
+
+
+class TopicIndex:
+    """In-memory (chat, thread) <-> session index over group_project_map.json.
+
+    The file maps a forum group to a project and each session to a topic:
+    {chat_id: {"project_path", "title", "topics": {session_id: {"thread_id", "name", "created"}}}}.
+    It is re-read only when its mtime changes, so routing an update is one stat
+    plus a dict lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path: str | None = None
+        self._mtime: int | None = None
+        self.groups: dict[str, dict[str, Any]] = {}
+        self._by_thread: dict[tuple[str, int], str] = {}
+        self._by_session: dict[str, tuple[str, int]] = {}
+        # chat_id -> (thread_id, name) of a topic whose new session hasn't been detected yet
+        self.pending: dict[str, tuple[int, str]] = {}
+
+    def _refresh(self) -> None:
+        path = GROUP_PROJECT_MAP_FILE
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if path == self._path and mtime == self._mtime:
+            return
+        groups: Any = {}
+        if mtime is not None:
+            try:
+                with open(path) as f:
+                    groups = json.load(f)
+            except (OSError, ValueError):
+                groups = {}
+        self._path, self._mtime = path, mtime
+        self.groups = groups if isinstance(groups, dict) else {}
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._by_thread, self._by_session = {}, {}
+        for chat, group in self.groups.items():
+            topics = group.get("topics", {}) if isinstance(group, dict) else None
+            if not isinstance(topics, dict):
+                print(f"Group-project map: skipping malformed group {chat}")
+                continue
+            for sid, topic in topics.items():
+                try:
+                    key = (str(chat), int(topic["thread_id"]))
+                except (TypeError, KeyError, ValueError):
+                    print(f"Group-project map: skipping malformed topic {sid} in group {chat}")
+                    continue
+                self._by_thread[key] = sid
+                self._by_session[sid] = key
+
+    def _save(self) -> None:
+        try:
+            with open(GROUP_PROJECT_MAP_FILE, "w") as f:
+                json.dump(self.groups, f, indent=2)
+            self._mtime = os.stat(GROUP_PROJECT_MAP_FILE).st_mtime_ns
+        except OSError as e:
+            print(f"Failed to save group-project map: {e}")
+        self._reindex()
+
+    def group(self, chat_id: int | str) -> dict[str, Any] | None:
+        with self._lock:
+            self._refresh()
+            return self.groups.get(str(chat_id))
+
+    def lookup(self, chat_id: int | str, thread_id: int | None) -> str | None:
+        """Session bound to a forum topic, if any."""
+        if thread_id is None:
+            return None
+        with self._lock:
+            self._refresh()
+            return self._by_thread.get((str(chat_id), int(thread_id)))
+
+    def topic_for(self, session_id: str) -> tuple[str, int] | None:
+        with self._lock:
+            self._refresh()
+            return self._by_session.get(session_id)
+
+    def link_group(self, chat_id: int | str, project_path: str, title: str = "") -> None:
+        with self._lock:
+            self._refresh()
+            group = self.groups.setdefault(str(chat_id), {"topics": {}})
+            group.update({"project_path": project_path, "title": title})
+            self._save()
+
+    def unlink_group(self, chat_id: int | str) -> bool:
+        with self._lock:
+            self._refresh()
+            if self.groups.pop(str(chat_id), None) is None:
+                return False
+            self.pending.pop(str(chat_id), None)
+            self._save()
+            return True
+
+    def add_topic(self, chat_id: int | str, session_id: str, thread_id: int, name: str) -> None:
+        with self._lock:
+            self._refresh()
+            group = self.groups.get(str(chat_id))
+            if group is None:
+                return
+            group.setdefault("topics", {})[session_id] = {
+                "thread_id": int(thread_id), "name": name,
+                "created": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._save()
+
+    def add_pending(self, chat_id: int | str, thread_id: int, name: str) -> None:
+        with self._lock:
+            self.pending[str(chat_id)] = (int(thread_id), name)
+
+    def claim_pending(self, session_id: str) -> tuple[str, int] | None:
+        """Attach a newly detected session to a topic of its project that is waiting for one.
+
+        Both the session's and the group's project path must be known and match,
+        so a session of another project never lands in the topic.
+        """
+        project_path = get_project_path_for_session(session_id)
+        if not project_path:
+            return None
+        with self._lock:
+            self._refresh()
+            if session_id in self._by_session:
+                return None
+            for chat, (thread, name) in self.pending.items():
+                group = self.groups.get(chat)
+                group_path = group.get("project_path") if isinstance(group, dict) else None
+                if not group_path or os.path.realpath(project_path) != os.path.realpath(group_path):
+                    continue
+                del self.pending[chat]
+                break
+            else:
+                return None
+        self.add_topic(chat, session_id, thread, name)
+        return chat, thread
+
+
+_topic_index = TopicIndex()
+
+
+def _html_escape(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class PaneWatcher:
+    """Mirror the tmux pane into one Telegram message, editing it only on change.
+
+    The capture interval halves toward WATCH_MIN_INTERVAL while many lines
+    change, and doubles toward WATCH_MAX_INTERVAL while the pane is static.
+    The watcher stops itself after WATCH_IDLE_TIMEOUT seconds without change.
+    """
+
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        self.message_id: int | None = None
+        self.last_lines: list[str] | None = None
+        self.interval = WATCH_MIN_INTERVAL
+        self.last_change = time.monotonic()
+        self.stop_event = threading.Event()
+
+    @staticmethod
+    def _render(lines: list[str]) -> str:
+        # Budget the escaped text (entities can grow it ~5x), never cutting an entity in half
+        body = _html_escape("\n".join(lines))
+        cut = max(len(body) - 3800, 0)
+        amp = body.rfind("&", max(cut - 8, 0), cut)
+        if amp != -1 and ";" not in body[amp:cut]:
+            cut = body.index(";", amp) + 1
+        return f"<pre>{body[cut:] or ' '}</pre>"
+
+    def step(self, now: float | None = None) -> bool:
+        """Capture once, update Telegram if changed; return False when the watch should end."""
+        now = time.monotonic() if now is None else now
+        lines = tmux_capture_visible().splitlines()[-WATCH_LINES:]
+        if lines == self.last_lines:
+            self.interval = min(self.interval * 2, WATCH_MAX_INTERVAL)
+            if now - self.last_change > WATCH_IDLE_TIMEOUT:
+                self._publish(self._render(lines) + "\n⏹ Watch stopped (idle)")
+                return False
+            return True
+        previous = self.last_lines or []
+        changed = sum(1 for a, b in zip(lines, previous) if a != b) + abs(len(lines) - len(previous))
+        self.interval = WATCH_MIN_INTERVAL if changed > 3 else max(WATCH_MIN_INTERVAL, self.interval / 2)
+        self.last_lines = lines
+        self.last_change = now
+        self._publish(self._render(lines))
+        return True
+
+    def _publish(self, html: str) -> None:
+        if self.message_id is None:
+            result = telegram_api("sendMessage", {"chat_id": self.chat_id, "text": html, "parse_mode": "HTML"},
+                                  spool=False)
+            if result and isinstance(result.get("result"), dict):
+                self.message_id = result["result"].get("message_id")
+        else:
+            telegram_api("editMessageText", {
+                "chat_id": self.chat_id, "message_id": self.message_id, "text": html, "parse_mode": "HTML",
+            })
+        metric_incr("watch_frames")
+
+    def run(self) -> None:
+        try:
+            if not self.step():
+                return
+            while not self.stop_event.wait(self.interval):
+                if not self.step():
+                    break
+        finally:
+            with _watchers_lock:
+                if _watchers.get(self.chat_id) is self:
+                    del _watchers[self.chat_id]
+
+
+_watchers: dict[int, PaneWatcher] = {}
+_watchers_lock = threading.Lock()
 
-def get_current_session_id():
-    """Get current session ID with cross-validation for reliability."""
-    title_sid = tmux_get_title()
-    file_sid = None
 
-    # Read from current session file
-    if os.path.exists(CURRENT_SESSION_FILE):
-        try:
-            with open(CURRENT_SESSION_FILE) as f:
-                file_sid = f.read().strip()
-        except OSError:
-            pass
+def start_watch(chat_id: int) -> PaneWatcher:
+    """Start (or restart) the pane mirror for a chat."""
+    stop_watch(chat_id)
+    watcher = PaneWatcher(chat_id)
+    with _watchers_lock:
+        _watchers[chat_id] = watcher
+    threading.Thread(target=watcher.run, daemon=True).start()
+    return watcher
 
-    # If both match, high confidence
-    if title_sid and title_sid == file_sid:
-        return title_sid
 
-    # Get most recently modified session file as ground truth
-    projects_dir = _get_projects_dir()
-    recent_sid = None
-    if projects_dir:
-        all_jsonls = list(projects_dir.glob("*/*.jsonl"))
-        if all_jsonls:
-            most_recent = max(all_jsonls, key=lambda p: p.stat().st_mtime)
-            recent_sid = most_recent.stem
+def stop_watch(chat_id: int) -> bool:
+    """Stop the pane mirror for a chat; return True if one was running."""
+    with _watchers_lock:
+        watcher = _watchers.pop(chat_id, None)
+    if watcher:
+        watcher.stop_event.set()
+    return watcher is not None
 
-    # Prefer tmux title if it matches recent file
-    if title_sid and title_sid == recent_sid:
-        return title_sid
 
-    # Prefer file_sid if it matches recent file
-    if file_sid and file_sid == recent_sid:
-        return file_sid
+class PermissionBroker:
+    """Hand decisions from Telegram permission buttons to hook processes blocked on the socket."""
 
-    # Fallback: use recent file (most reliable ground truth)
-    if recent_sid:
-        return recent_sid
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: dict[str, dict[str, Any]] = {}
 
-    # Last resort: use whatever we have
-    return title_sid or file_sid
+    def register(self, request_id: str, timeout: float, conn: socket.socket | None = None) -> dict[str, Any]:
+        slot = {"event": threading.Event(), "decision": None, "conn": conn, "deadline": time.time() + timeout}
+        with self._lock:
+            self._pending[request_id] = slot
+        return slot
 
+    def await_slot(self, request_id: str, slot: dict[str, Any]) -> str | None:
+        """Block until the request is resolved, handed over or its deadline passes."""
+        try:
+            slot["event"].wait(max(0.0, slot["deadline"] - time.time()))
+        finally:
+            with self._lock:
+                if self._pending.get(request_id) is slot:
+                    del self._pending[request_id]
+        return slot["decision"]
+
+    def wait(self, request_id: str, timeout: float) -> str | None:
+        """Block until the request is resolved or the timeout passes."""
+        return self.await_slot(request_id, self.register(request_id, timeout))
+
+    def resolve(self, request_id: str, decision: str) -> bool:
+        """Deliver a decision; False if nobody is waiting (expired or already answered)."""
+        with self._lock:
+            slot = self._pending.pop(request_id, None)
+        if not slot:
+            return False
+        slot["decision"] = decision
+        slot["event"].set()
+        return True
 
-def load_session_chat_map() -> dict[str, str]:
-    """Load session-to-chat mapping from file."""
-    if not os.path.exists(SESSION_CHAT_MAP_FILE):
-        return {}
-    try:
-        with open(SESSION_CHAT_MAP_FILE) as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {}
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def hand_over(self) -> list[dict[str, Any]]:
+        """Waiting hook connections for a reload successor: [{"id", "fd", "deadline"}].
+
+        Each fd is a duplicate the caller closes once the successor has inherited it.
+        """
+        with self._lock:
+            return [{"id": rid, "fd": os.dup(slot["conn"].fileno()), "deadline": slot["deadline"]}
+                    for rid, slot in self._pending.items() if slot["conn"] is not None]
+
+    def release(self, request_ids: list[str]) -> None:
+        """Stop waiting on requests a successor now answers; this process sends them nothing."""
+        with self._lock:
+            slots = [self._pending.pop(rid, None) for rid in request_ids]
+        for slot in slots:
+            if slot:
+                slot["decision"] = PERMISSION_HANDED_OVER
+                slot["event"].set()
+
+
+PERMISSION_HANDED_OVER = "handed_over"
+_permission_broker = PermissionBroker()
+_permission_server: socket.socket | None = None
+# Cleared while a reload hands the listener and waiting hooks to the successor
+_permission_accepting = threading.Event()
+_permission_gate = threading.Condition()
+_permission_reading = 0  # accepted connections whose request line is not read yet
+
+
+def _answer_permission(conn: socket.socket, request_id: str, slot: dict[str, Any]) -> None:
+    """Wait for the request's decision and send {"decision": ...} back to the hook."""
+    with conn:
+        decision = _permission_broker.await_slot(request_id, slot)
+        if decision == PERMISSION_HANDED_OVER:
+            return
+        try:
+            conn.settimeout(5)
+            conn.sendall((json.dumps({"decision": decision}) + "\n").encode())
+        except OSError:
+            pass
 
 
-def save_session_chat_map(mapping: dict[str, str]) -> None:
-    """Save session-to-chat mapping to file."""
+def _serve_permission_client(conn: socket.socket) -> None:
+    """Read one {"id", "timeout"} request line, answer with {"decision": ...} when decided."""
+    global _permission_reading
+    request_id, slot = "", None
     try:
-        with open(SESSION_CHAT_MAP_FILE, "w") as f:
-            json.dump(mapping, f, indent=2)
-    except OSError as e:
-        print(f"Failed to save session-chat map: {e}")
+        conn.settimeout(5)
+        with conn.makefile("r", encoding="utf-8") as f:
+            request = json.loads(f.readline() or "{}")
+        request_id = str(request.get("id", ""))
+        if request_id:
+            timeout = min(float(request.get("timeout", 110)), PERMISSION_MAX_WAIT)
+            slot = _permission_broker.register(request_id, timeout, conn)
+    except (OSError, ValueError, TypeError, AttributeError):
+        pass
+    finally:
+        # Registered (or dropped) before a reload snapshots the waiting hooks
+        with _permission_gate:
+            _permission_reading -= 1
+            _permission_gate.notify_all()
+    if slot is None:
+        conn.close()
+        return
+    _answer_permission(conn, request_id, slot)
 
 
-def bind_session_to_chat(session_id: str, chat_id: int) -> None:
-    """Bind a session ID to a Telegram chat ID."""
-    if not session_id:
-        return
-    mapping = load_session_chat_map()
-    mapping[session_id] = str(chat_id)
-    save_session_chat_map(mapping)
-    # Also save current session ID for hooks to use
-    try:
-        with open(CURRENT_SESSION_FILE, "w") as f:
-            f.write(session_id)
-    except OSError:
-        pass
+def start_permission_server(path: str | None = None, listen_fd: int | None = None) -> socket.socket | None:
+    """Listen on a Unix socket for blocked PermissionRequest hooks.
 
+    With listen_fd, adopt the listener a reloading predecessor passed on instead
+    of replacing the socket file.
+    """
+    global _permission_server
+    path = path or PERMISSION_SOCKET_FILE
+    if listen_fd is not None:
+        server = socket.socket(fileno=listen_fd)
+    else:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        try:
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(path)
+            os.chmod(path, 0o600)
+            server.listen(16)
+        except OSError as e:
+            print(f"Permission socket unavailable: {e}")
+            return None
+    # Non-blocking: during a reload the successor may take a connection first
+    server.setblocking(False)
 
-def get_chat_id_for_session(session_id: str) -> str | None:
-    """Get the chat ID bound to a session."""
-    if not session_id:
-        return None
-    mapping = load_session_chat_map()
-    return mapping.get(session_id)
+    def accept_loop():
+        global _permission_reading
+        while True:
+            _permission_accepting.wait()
+            try:
+                readable, _, _ = select.select([server], [], [], 0.2)
+            except (OSError, ValueError):
+                return
+            if not readable:
+                continue
+            with _permission_gate:
+                if not _permission_accepting.is_set():
+                    continue
+                try:
+                    conn, _ = server.accept()
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    return
+                _permission_reading += 1
+            threading.Thread(target=_serve_permission_client, args=(conn,), daemon=True).start()
+
+    _permission_server = server
+    _permission_accepting.set()
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return server
+
+
+def pause_permission_server(timeout: float = 6.0) -> None:
+    """Stop accepting hook connections; wait until accepted ones have registered."""
+    _permission_accepting.clear()
+    with _permission_gate:
+        _permission_gate.wait_for(lambda: _permission_reading == 0, timeout)
+
+
+def adopt_permission_waits(waits: list[dict[str, Any]]) -> None:
+    """Answer hook connections a reloading predecessor handed over."""
+    for wait in waits:
+        try:
+            request_id, deadline = str(wait["id"]), float(wait["deadline"])
+            conn = socket.socket(fileno=int(wait["fd"]))
+        except (OSError, KeyError, TypeError, ValueError):
+            continue
+        slot = _permission_broker.register(request_id, deadline - time.time(), conn)
+        threading.Thread(target=_answer_permission, args=(conn, request_id, slot), daemon=True).start()
 
 
 class Handler(BaseHTTPRequestHandler):
@@ -894,7 +3676,12 @@ class Handler(BaseHTTPRequestHandler):
         body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
         try:
             update = json.loads(body)
-            if "callback_query" in update:
+            update_id = update.get("update_id")
+            record_first_update()
+            record_update(update)
+            if isinstance(update_id, int) and not _update_tracker.check_and_mark(update_id):
+                metric_incr("duplicate_updates")
+            elif "callback_query" in update:
                 self.handle_callback(update["callback_query"])
             elif "message" in update:
                 self.handle_message(update)
@@ -940,13 +3727,110 @@ class Handler(BaseHTTPRequestHandler):
         project_path = decode_project_path(real_name)
         return encoded_name, real_name, project_path
 
+    # --- Paged pickers ---
+
+    @staticmethod
+    def _page_nav(prefix: str, offset: int, has_next: bool) -> list:
+        """Build the prev/next row for a paged keyboard (empty if single page)."""
+        row = []
+        if offset > 0:
+            row.append({"text": "◀️ Prev", "callback_data": f"{prefix}{max(0, offset - PAGE_SIZE)}"})
+        if has_next:
+            row.append({"text": "Next ▶️", "callback_data": f"{prefix}{offset + PAGE_SIZE}"})
+        return [row] if row else []
+
+    def resume_page(self, offset: int) -> tuple[str, list] | None:
+        """Build (text, keyboard) for one page of /resume, or None if empty."""
+        sessions = get_recent_sessions_from_files(limit=PAGE_SIZE + 1, offset=offset)
+        if not sessions:
+            return None
+        has_next = len(sessions) > PAGE_SIZE
+        kb = [[{"text": "▶️ Continue most recent", "callback_data": CB_CONTINUE_RECENT}]] if offset == 0 else []
+        for s in sessions[:PAGE_SIZE]:
+            sid = s["session_id"]
+            proj_decoded = decode_project_path(s["project_dir"]) or s["project_dir"]
+            kb.append([{"text": f"📁 {proj_decoded}\n{sid}", "callback_data": f"{CB_RESUME}{sid}"}])
+        kb += self._page_nav(CB_RESUME_PAGE, offset, has_next)
+        return "Select session to resume:", kb
+
+    def projects_page(self, offset: int) -> tuple[str, list] | None:
+        """Build (text, keyboard) for one page of /projects, or None if empty."""
+        projects = get_projects(limit=PAGE_SIZE + 1, offset=offset)
+        if not projects:
+            return None
+        has_next = len(projects) > PAGE_SIZE
+        kb = []
+        for p in projects[:PAGE_SIZE]:
+            name = p["encoded_name"]
+            ph = project_hash(name)
+            decoded = decode_project_path(name)
+            display = decoded if decoded else name
+            kb.append([{"text": f"📁 {display} ({p['session_count']})", "callback_data": f"{CB_PROJECT}{ph}"}])
+        kb += self._page_nav(CB_PROJECTS_PAGE, offset, has_next)
+        return "Select a project:", kb
+
+    def project_sessions_page(self, encoded_name: str, title: str, offset: int) -> tuple[str, list] | None:
+        """Build (text, keyboard) for one page of a project's sessions, or None if empty."""
+        sessions = get_sessions_for_project(encoded_name, limit=PAGE_SIZE + 1, offset=offset)
+        if not sessions:
+            return None
+        has_next = len(sessions) > PAGE_SIZE
+        nph = project_hash(encoded_name)
+        kb = [[{"text": "🆕 New session", "callback_data": f"{CB_NEW_IN_PROJECT}{nph}"}]] if offset == 0 else []
+        for s in sessions[:PAGE_SIZE]:
+            sid = s["session_id"]
+            ts = datetime.fromtimestamp(s["mtime"]).strftime("%m-%d %H:%M")
+            kb.append([{"text": f"{sid} | {ts}", "callback_data": f"{CB_RESUME}{sid}"}])
+        kb += self._page_nav(f"{CB_SESSIONS_PAGE}{nph}:", offset, has_next)
+        return f"{title}\n\nSessions:", kb
+
+    def handle_page_callback(self, chat_id: int, message_id: int | None, data: str) -> None:
+        """Render the requested page and edit the picker message in place."""
+        prefix = next(p for p in (CB_RESUME_PAGE, CB_PROJECTS_PAGE, CB_SESSIONS_PAGE) if data.startswith(p))
+        cursor = parse_callback_data(data, prefix)
+        if not cursor:
+            return
+        if prefix == CB_SESSIONS_PAGE:
+            ph, _, cursor = cursor.partition(":")
+            result = self.resolve_project_hash(ph, chat_id)
+            if not result:
+                return
+            encoded_name, real_name, project_path = result
+        try:
+            offset = max(0, int(cursor))
+        except ValueError:
+            return
+        if prefix == CB_RESUME_PAGE:
+            page = self.resume_page(offset)
+        elif prefix == CB_PROJECTS_PAGE:
+            page = self.projects_page(offset)
+        else:
+            page = self.project_sessions_page(encoded_name, f"📁 {project_path or real_name}", offset)
+        if not page:
+            self.reply(chat_id, "No more entries")
+            return
+        if message_id:
+            self.edit_keyboard(chat_id, message_id, *page)
+        else:
+            self.reply_keyboard(chat_id, *page)
+
     # --- Callback handler ---
 
     def handle_callback(self, cb: dict[str, Any]) -> None:
         chat_id = cb.get("message", {}).get("chat", {}).get("id")
         data = cb.get("data", "")
+        thread_id = cb.get("message", {}).get("message_thread_id")
+        self._reply_thread = (chat_id, thread_id) if thread_id else None
         telegram_api("answerCallbackQuery", {"callback_query_id": cb.get("id")})
 
+        if data.startswith((CB_RESUME_PAGE, CB_PROJECTS_PAGE, CB_SESSIONS_PAGE)):
+            self.handle_page_callback(chat_id, cb.get("message", {}).get("message_id"), data)
+            return
+
+        if data.startswith(CB_PERMISSION):
+            self.handle_permission_callback(chat_id, cb.get("message", {}).get("message_id"), data)
+            return
+
         if not tmux_exists():
             self.reply(chat_id, "tmux session not found")
             return
@@ -971,18 +3855,11 @@ class Handler(BaseHTTPRequestHandler):
             if not result:
                 return
             encoded_name, real_name, project_path = result
-            sessions = get_sessions_for_project(encoded_name, limit=8)
-            if not sessions:
+            page = self.project_sessions_page(encoded_name, f"📁 {project_path or real_name}", 0)
+            if not page:
                 self.reply(chat_id, "No sessions in this project")
                 return
-            header = f"📁 {project_path or real_name}\n\nSessions:"
-            nph = project_hash(encoded_name)
-            kb = [[{"text": "🆕 New session", "callback_data": f"{CB_NEW_IN_PROJECT}{nph}"}]]
-            for s in sessions:
-                sid = s["session_id"]
-                ts = datetime.fromtimestamp(s["mtime"]).strftime("%m-%d %H:%M")
-                kb.append([{"text": f"{sid} | {ts}", "callback_data": f"{CB_RESUME}{sid}"}])
-            self.reply_keyboard(chat_id, header, kb)
+            self.reply_keyboard(chat_id, *page)
 
         elif data.startswith(CB_ASK_ANSWER):
             idx_str = parse_callback_data(data, CB_ASK_ANSWER)
@@ -1014,14 +3891,27 @@ class Handler(BaseHTTPRequestHandler):
             if project_path:
                 current_cwd = tmux_get_cwd()
                 if current_cwd and os.path.realpath(project_path) != os.path.realpath(current_cwd):
-                    tmux_exit_claude()
-                    tmux_cd_and_start(project_path)
+                    if tmux_change_project(project_path):
+                        tmux_new_session()
                 else:
                     tmux_new_session()
             else:
                 tmux_new_session()
             self.start_new_and_bind(chat_id, project_path)
 
+    def handle_permission_callback(self, chat_id: int, message_id: int | None, data: str) -> None:
+        request_id, _, decision = (parse_callback_data(data, CB_PERMISSION) or "").rpartition(":")
+        if not request_id or decision not in PERMISSION_DECISIONS:
+            return
+        if not _permission_broker.resolve(request_id, decision):
+            self.reply(chat_id, "⚠️ Permission request expired")
+            return
+        if message_id:
+            telegram_api("editMessageReplyMarkup", {
+                "chat_id": chat_id, "message_id": message_id, "reply_markup": {"inline_keyboard": []},
+            })
+        self.reply(chat_id, PERMISSION_DECISIONS[decision])
+
     # --- Command handlers ---
 
     def _cmd_status(self, chat_id: int, text: str) -> None:
@@ -1034,14 +3924,39 @@ class Handler(BaseHTTPRequestHandler):
         msg += f"\nSync: {sync_status}"
         if current_sid:
             msg += f"\nSession: {current_sid}"
+            watchers = get_session_watchers(current_sid)
             if bound_chat == str(chat_id):
                 msg += f"\n✅ Bound to this chat"
+            elif str(chat_id) in watchers:
+                msg += f"\n👀 Observing (owner: {bound_chat})"
             elif bound_chat:
                 msg += f"\n⚠️ Bound to different chat: {bound_chat}"
             else:
                 msg += f"\n⚠️ Not bound. Use /bind to connect"
+            if watchers:
+                msg += f"\nObservers: {len(watchers)}"
         else:
             msg += "\n⚠️ No active session"
+        duplicates = get_metrics().get("duplicate_updates", 0)
+        if duplicates:
+            msg += f"\nDuplicate updates dropped: {duplicates}"
+        if _spend_watchdog.enabled:
+            cap = f" (cap ${_spend_watchdog.daily_cap:g})" if _spend_watchdog.daily_cap else ""
+            msg += f"\nSpend today: ~${_spend_watchdog.today():.2f}{cap}"
+        open_methods = _api_breaker.open_methods()
+        if open_methods:
+            msg += f"\n⚠️ Bot API circuit open: {', '.join(open_methods)}"
+        queued = _input_queue.depth()
+        if queued:
+            msg += f"\nQueued input: {queued}"
+        spooled = _outbound_spool.count()
+        if spooled:
+            msg += f"\nSpooled messages: {spooled}"
+        if _warm_pool.enabled:
+            msg += f"\nWarm windows: {len(_warm_pool.parked)}/{_warm_pool.size}"
+        first_update_ms = get_metrics().get("first_update_ms")
+        if first_update_ms is not None:
+            msg += f"\nStartup to first update: {first_update_ms / 1000:.1f}s"
         self.reply(chat_id, msg)
 
     def _cmd_start(self, chat_id: int, text: str) -> None:
@@ -1069,7 +3984,8 @@ class Handler(BaseHTTPRequestHandler):
             tmux_send("C-c", literal=False)
         if os.path.exists(PENDING_FILE):
             os.remove(PENDING_FILE)
-        self.reply(chat_id, "Interrupted")
+        dropped = _input_queue.drop_chat(chat_id)
+        self.reply(chat_id, f"Interrupted, dropped {dropped} queued" if dropped else "Interrupted")
 
     def _cmd_terminate(self, chat_id: int, text: str) -> None:
         try:
@@ -1078,6 +3994,7 @@ class Handler(BaseHTTPRequestHandler):
             for fp in (SYNC_PAUSED_FILE, PENDING_FILE):
                 if os.path.exists(fp):
                     os.remove(fp)
+            _input_queue.clear()
             self.reply(chat_id, "🔴 Sync terminated.\n\nUse /start to reconnect.")
         except OSError as e:
             self.reply(chat_id, f"Failed to terminate: {e}")
@@ -1133,35 +4050,171 @@ class Handler(BaseHTTPRequestHandler):
 
     def _cmd_resume(self, chat_id: int, text: str) -> None:
         clear_sync_flags()
-        sessions = get_recent_sessions_from_files(limit=8)
-        if not sessions:
+        page = self.resume_page(0)
+        if not page:
             self.reply(chat_id, "No sessions found")
             return
-        kb = [[{"text": "▶️ Continue most recent", "callback_data": CB_CONTINUE_RECENT}]]
-        for s in sessions:
-            sid = s["session_id"]
-            proj_decoded = decode_project_path(s["project_dir"]) or s["project_dir"]
-            kb.append([{"text": f"📁 {proj_decoded}\n{sid}", "callback_data": f"{CB_RESUME}{sid}"}])
-        self.reply_keyboard(chat_id, "Select session to resume:", kb)
+        self.reply_keyboard(chat_id, *page)
 
     def _cmd_projects(self, chat_id: int, text: str) -> None:
-        projects = get_projects(limit=8)
-        if not projects:
+        page = self.projects_page(0)
+        if not page:
             self.reply(chat_id, "No projects found")
             return
-        kb = []
-        for p in projects:
-            name = p["encoded_name"]
-            ph = project_hash(name)
-            decoded = decode_project_path(name)
-            display = decoded if decoded else name
-            kb.append([{"text": f"📁 {display} ({p['session_count']})", "callback_data": f"{CB_PROJECT}{ph}"}])
-        self.reply_keyboard(chat_id, "Select a project:", kb)
+        self.reply_keyboard(chat_id, *page)
 
     def _cmd_report(self, chat_id: int, text: str) -> None:
-        self.reply(chat_id, "Scanning sessions...")
-        data = scan_token_usage()
-        self.reply(chat_id, format_token_report(data))
+        parts = text.split(maxsplit=1)
+        if len(parts) < 2:
+            self.reply(chat_id, "Scanning sessions...")
+            data = scan_token_usage()
+            self.reply(chat_id, format_token_report(data))
+            return
+        arg = parts[1].strip().lower()
+        _usage_rollup.refresh()
+        if arg == "burn":
+            self.reply_html(chat_id, format_burn_report(_usage_rollup))
+        elif arg == "heatmap":
+            self.reply_html(chat_id, format_heatmap_report(_usage_rollup))
+        else:
+            parsed = parse_report_range(arg)
+            if not parsed:
+                self.reply(chat_id, "Usage: /report [90d | 2026-09 | 2026-09-15 | burn | heatmap]")
+                return
+            label, start_ts, end_ts = parsed
+            self.reply(chat_id, format_range_report(label, _usage_rollup.summarize(start_ts, end_ts)))
+
+    def _cmd_perf(self, chat_id: int, text: str) -> None:
+        if _perf_lock.locked():
+            self.reply(chat_id, "⏱ /perf is already running")
+            return
+        self.reply(chat_id, "⏱ Running probes...")
+        start_perf_run(lambda report: self.reply(chat_id, report))
+
+    def _cmd_search(self, chat_id: int, text: str) -> None:
+        parts = text.split(maxsplit=1)
+        if len(parts) < 2:
+            self.reply(chat_id, "Usage: /search <query>")
+            return
+        query = parts[1]
+        if not _search_index.is_ready():
+            _search_index.refresh_async()
+            self.reply(chat_id, "🔍 Indexing sessions… try again in a moment.")
+            return
+        results = _search_index.search(query)
+        _search_index.refresh_async()  # pick up new lines for the next search
+        if not results:
+            self.reply(chat_id, f"No sessions match: {query}")
+            return
+        kb = []
+        for r in results:
+            project = _short_project_name(r["project_dir"], 1)
+            kb.append([{
+                "text": f"[{project}] {r['snippet'][:60]}",
+                "callback_data": f"{CB_RESUME}{r['session_id']}",
+            }])
+        self.reply_keyboard(chat_id, f"🔍 Sessions matching: {query}", kb)
+
+    def _cmd_export(self, chat_id: int, text: str) -> None:
+        parts = text.split(maxsplit=1)
+        session_id = parts[1].strip() if len(parts) > 1 else get_current_session_id()
+        jsonl_path = find_session_file(session_id) if session_id else None
+        if not jsonl_path:
+            self.reply(chat_id, "Session not found. Usage: /export [session]")
+            return
+        self.reply(chat_id, f"📤 Exporting {jsonl_path.stem}...")
+        threading.Thread(target=self._export_worker, args=(chat_id, jsonl_path), daemon=True).start()
+
+    def _export_worker(self, chat_id: int, jsonl_path: Path) -> None:
+        """Render and upload a transcript off the request thread."""
+        with tempfile.TemporaryDirectory(prefix="cc-export-") as tmp:
+            try:
+                path, filename, count = export_session(jsonl_path, tmp)
+            except OSError as e:
+                self.reply(chat_id, f"Export failed: {e}")
+                return
+            size = os.path.getsize(path)
+            if size > EXPORT_MAX_UPLOAD_BYTES:
+                self.reply(chat_id, f"Export too large to upload ({size / 1_048_576:.0f} MB compressed)")
+                return
+            result = telegram_send_document(chat_id, path, filename, f"{count} messages")
+            if not result or not result.get("ok"):
+                self.reply(chat_id, "Export upload failed")
+
+    def _cmd_observe(self, chat_id: int, text: str) -> None:
+        current_sid = get_current_session_id()
+        if not current_sid:
+            self.reply(chat_id, "⚠️ No active session")
+            return
+        if get_chat_id_for_session(current_sid) == str(chat_id):
+            self.reply(chat_id, "You already own this session")
+            return
+        set_session_watcher(current_sid, chat_id, True)
+        self.reply(chat_id, f"👀 Observing {current_sid[:8]} (read-only)\nUse /unobserve to stop")
+
+    def _cmd_unobserve(self, chat_id: int, text: str) -> None:
+        current_sid = get_current_session_id()
+        if current_sid and set_session_watcher(current_sid, chat_id, False):
+            self.reply(chat_id, "Stopped observing")
+        else:
+            self.reply(chat_id, "Not observing this session")
+
+    def _cmd_linkgroup(self, chat_id: int, text: str) -> None:
+        if chat_id > 0:
+            self.reply(chat_id, "Use /linkgroup in a forum group (Topics enabled)")
+            return
+        parts = text.split(maxsplit=1)
+        path = os.path.realpath(os.path.expanduser(parts[1].strip())) if len(parts) > 1 else tmux_get_cwd()
+        if not path or not os.path.isdir(path):
+            self.reply(chat_id, "Usage: /linkgroup <project path>")
+            return
+        _topic_index.link_group(chat_id, path, os.path.basename(path))
+        self.reply(chat_id, f"✅ Group linked to {path}\nUse /newtopic <name> to start a session in its own topic")
+
+    def _cmd_unlinkgroup(self, chat_id: int, text: str) -> None:
+        if _topic_index.unlink_group(chat_id):
+            self.reply(chat_id, "Group unlinked")
+        else:
+            self.reply(chat_id, "This group is not linked")
+
+    def _cmd_newtopic(self, chat_id: int, text: str) -> None:
+        group = _topic_index.group(chat_id)
+        if group is None:
+            self.reply(chat_id, "Link this group first: /linkgroup <project path>")
+            return
+        if not tmux_exists():
+            self.reply(chat_id, "tmux not found")
+            return
+        parts = text.split(maxsplit=1)
+        name = (parts[1].strip() if len(parts) > 1 else "") or f"Session {datetime.now():%m-%d %H:%M}"
+        result = telegram_api("createForumTopic", {"chat_id": chat_id, "name": name[:128]})
+        thread_id = ((result or {}).get("result") or {}).get("message_thread_id")
+        if not thread_id:
+            self.reply(chat_id, "⚠️ Could not create a topic (are Topics enabled and the bot an admin?)")
+            return
+        # session_poller attaches the next detected session to this topic
+        _topic_index.add_pending(chat_id, thread_id, name)
+        clear_sync_flags()
+        project_path = group.get("project_path")
+        current_cwd = tmux_get_cwd()
+        if project_path and current_cwd and os.path.realpath(project_path) != os.path.realpath(current_cwd):
+            if tmux_change_project(project_path):
+                tmux_new_session()
+        else:
+            tmux_new_session()
+        telegram_api("sendMessage", {"chat_id": chat_id, "message_thread_id": thread_id,
+                                     "text": "⚡ New session starting. Write here to talk to it."}, spool=False)
+
+    def _cmd_watch(self, chat_id: int, text: str) -> None:
+        parts = text.split(maxsplit=1)
+        if len(parts) > 1 and parts[1].strip().lower() in ("off", "stop"):
+            stopped = stop_watch(chat_id)
+            self.reply(chat_id, "⏹ Watch stopped" if stopped else "No active watch")
+            return
+        if not tmux_exists():
+            self.reply(chat_id, "tmux not found")
+            return
+        start_watch(chat_id)
 
     _COMMANDS: dict[str, Any] = {
         "/status": _cmd_status,
@@ -1176,6 +4229,15 @@ class Handler(BaseHTTPRequestHandler):
         "/resume": _cmd_resume,
         "/projects": _cmd_projects,
         "/report": _cmd_report,
+        "/perf": _cmd_perf,
+        "/search": _cmd_search,
+        "/export": _cmd_export,
+        "/watch": _cmd_watch,
+        "/observe": _cmd_observe,
+        "/unobserve": _cmd_unobserve,
+        "/linkgroup": _cmd_linkgroup,
+        "/unlinkgroup": _cmd_unlinkgroup,
+        "/newtopic": _cmd_newtopic,
     }
 
     # --- Message handler ---
@@ -1187,21 +4249,60 @@ class Handler(BaseHTTPRequestHandler):
         if not text or not chat_id:
             return
 
-        with open(CHAT_ID_FILE, "w") as f:
-            f.write(str(chat_id))
+        thread_id = msg.get("message_thread_id") if msg.get("is_topic_message") else None
+        self._reply_thread = (chat_id, thread_id) if thread_id else None
+        linked_group = _topic_index.group(chat_id)
+
+        # Linked forum groups route by topic; they must not become the DM fallback chat
+        if linked_group is None:
+            with open(CHAT_ID_FILE, "w") as f:
+                f.write(str(chat_id))
 
         if text.startswith("/"):
             cmd = text.split()[0].lower()
             handler = self._COMMANDS.get(cmd)
             if handler:
+                queued = _input_queue.depth()
+                if cmd in SHED_COMMANDS and queued >= INPUT_SHED_DEPTH:
+                    metric_incr("commands_shed")
+                    self.reply(chat_id, f"🚦 Busy: {queued} messages queued for Claude. Try {cmd} again later.")
+                    return
                 handler(self, chat_id, text)
                 return
             if cmd in BLOCKED_COMMANDS:
                 self.reply(chat_id, f"'{cmd}' not supported (interactive)")
                 return
 
+        if not _inbound_limiter.allow(chat_id):
+            metric_incr("input_throttled")
+            if chat_id not in _inbound_limiter.warned:
+                _inbound_limiter.warned.add(chat_id)
+                self.reply(chat_id, f"🐢 Too many messages; limit is {INPUT_RATE_PER_MIN:g}/min. "
+                                    "Messages are dropped until it refills.")
+            return
+
+        if linked_group is not None:
+            self._handle_topic_message(chat_id, thread_id, text)
+            return
+
         self._handle_regular_message(chat_id, text)
 
+    def _handle_topic_message(self, chat_id: int, thread_id: int | None, text: str) -> None:
+        """Send text to the session behind a forum topic, resuming it if needed."""
+        session_id = _topic_index.lookup(chat_id, thread_id)
+        if not session_id:
+            self.reply(chat_id, "Use /newtopic <name> to start a session, then write in its topic.")
+            return
+        state = get_sync_state()
+        if state != SYNC_STATE_ACTIVE:
+            self.reply(chat_id, SYNC_STATE_MESSAGES[state])
+            return
+        if not tmux_exists():
+            self.reply(chat_id, "tmux not found. Start a session first.")
+            return
+        # A topic switch resumes the session without touching DM bindings
+        self._submit_input(chat_id, session_id, text)
+
     def _handle_regular_message(self, chat_id: int, text: str) -> None:
         print(f"[{chat_id}] {text[:50]}...")
 
@@ -1221,21 +4322,55 @@ class Handler(BaseHTTPRequestHandler):
                 bind_session_to_chat(current_sid, chat_id)
                 tmux_set_title(current_sid)
             elif bound_chat != str(chat_id):
-                self.reply(chat_id, "⚠️ Session bound to another chat.\nUse /bind to rebind.")
+                if str(chat_id) in get_session_watchers(current_sid):
+                    self.reply(chat_id, "👀 Observing (read-only). Use /unobserve, or /bind to take over.")
+                else:
+                    self.reply(chat_id, "⚠️ Session bound to another chat.\nUse /bind to rebind.")
                 return
 
-        _start_typing(chat_id)
-        tmux_send(text)
-        time.sleep(0.1)
-        tmux_send_enter()
+        self._submit_input(chat_id, current_sid or "", text)
+
+    def _submit_input(self, chat_id: int, session_id: str, text: str) -> None:
+        """Deliver now, or queue behind earlier input while Claude is busy."""
+        if _input_coalescer.holding(chat_id) or (not _input_queue.depth(session_id) and not claude_busy()):
+            deliver_input(session_id, chat_id, text)
+            return
+        position = _input_queue.submit(session_id, chat_id, text)
+        if position is None:
+            metric_incr("input_rejected")
+            self.reply(chat_id, f"🚫 Busy, queue full ({_input_queue.max_depth}). Message dropped; "
+                                "wait for Claude or /escape.")
+            return
+        metric_incr("input_queued")
+        self.reply(chat_id, f"⏳ Busy, queued {position}")
+
+    def _thread_params(self, chat_id: int) -> dict[str, Any]:
+        """message_thread_id for replies to an update that came from a forum topic."""
+        context = getattr(self, "_reply_thread", None)
+        if context and context[0] == chat_id:
+            return {"message_thread_id": context[1]}
+        return {}
 
     def reply(self, chat_id: int, text: str) -> None:
-        telegram_api("sendMessage", {"chat_id": chat_id, "text": text})
+        telegram_api("sendMessage", {"chat_id": chat_id, "text": text, **self._thread_params(chat_id)},
+                     spool=False)
+
+    def reply_html(self, chat_id: int, text: str) -> None:
+        telegram_api("sendMessage", {"chat_id": chat_id, "text": text, "parse_mode": "HTML",
+                                     **self._thread_params(chat_id)}, spool=False)
 
     def reply_keyboard(self, chat_id: int, text: str, keyboard: list) -> None:
         """Send a message with an inline keyboard."""
         telegram_api("sendMessage", {
             "chat_id": chat_id, "text": text,
+            "reply_markup": {"inline_keyboard": keyboard},
+            **self._thread_params(chat_id),
+        }, spool=False)
+
+    def edit_keyboard(self, chat_id: int, message_id: int, text: str, keyboard: list) -> None:
+        """Replace an existing message's text and inline keyboard."""
+        telegram_api("editMessageText", {
+            "chat_id": chat_id, "message_id": message_id, "text": text,
             "reply_markup": {"inline_keyboard": keyboard}
         })
 
@@ -1252,7 +4387,9 @@ def session_poller():
             current_sid = get_current_session_id()
             if current_sid and current_sid != last_known_sid:
                 last_known_sid = current_sid
-                if not get_chat_id_for_session(current_sid):
+                if _topic_index.claim_pending(current_sid) or _topic_index.topic_for(current_sid):
+                    tmux_set_title(current_sid)
+                elif not get_chat_id_for_session(current_sid):
                     if os.path.exists(CHAT_ID_FILE):
                         with open(CHAT_ID_FILE) as f:
                             cid = f.read().strip()
@@ -1263,19 +4400,237 @@ def session_poller():
             pass
 
 
+# --- Graceful reload ---
+
+RELOAD_READY_TIMEOUT = 30.0
+_reload_lock = threading.Lock()
+
+
+def make_server(listen_fd: int | None = None) -> HTTPServer:
+    """The webhook server, on a fresh socket or on one inherited from a predecessor."""
+    if listen_fd is None:
+        return HTTPServer(("0.0.0.0", PORT), Handler)
+    server = HTTPServer(("0.0.0.0", PORT), Handler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = socket.socket(fileno=listen_fd)
+    server.server_address = server.socket.getsockname()
+    server.server_name, server.server_port = socket.getfqdn(server.server_address[0]), server.server_address[1]
+    return server
+
+
+def _write_private_json(path: str, data: Any) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+
+
+def _take_json(path: str) -> Any:
+    """Read and delete a one-shot handoff file."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return data
+
+
+def save_reload_state(permission_waits: list[dict[str, Any]] | None = None) -> None:
+    """In-memory state a successor should keep: button hashes, parked warm windows
+    and the hook connections waiting for a permission decision."""
+    _write_private_json(RELOAD_STATE_FILE, {
+        "project_ids": dict(_project_id_cache),
+        "warm_pool": {wid: list(v) for wid, v in _warm_pool.parked.items()},
+        "permission_waits": permission_waits or [],
+    })
+
+
+def restore_reload_state() -> None:
+    state = _take_json(RELOAD_STATE_FILE) or {}
+    _project_id_cache.update(state.get("project_ids") or {})
+    for wid, (path, parked_at) in (state.get("warm_pool") or {}).items():
+        _warm_pool.parked[wid] = (path, parked_at)
+    adopt_permission_waits(state.get("permission_waits") or [])
+
+
+def hand_over_input() -> None:
+    """Once this process has stopped serving: submit held batches, pass queued prompts on."""
+    _input_coalescer.flush_all()
+    items = _input_queue.take_all()
+    if items:
+        _write_private_json(RELOAD_INPUT_FILE, items)
+
+
+def take_over_input() -> None:
+    """Queue the prompts a predecessor handed over (after it has exited)."""
+    items = _take_json(RELOAD_INPUT_FILE) or []
+    _input_queue.restore([tuple(item) for item in items])
+    if items:
+        print(f"Took over {len(items)} queued prompt(s)")
+
+
+_handed_over = threading.Event()
+
+
+def reload_bridge(server: HTTPServer) -> bool:
+    """Hand the listening socket to a fresh bridge process, then stop accepting.
+
+    The successor re-imports bridge.py, so config.env, the code and (when
+    started by --reload) the caller's environment variables are read anew. Both
+    processes accept on the same socket until the successor reports ready, so
+    no webhook request is refused. The permission listener and the hook
+    connections waiting on a decision are inherited too, so a tap on a prompt
+    already shown is answered by the successor. This process then finishes the request in
+    hand, passes queued prompts on (hand_over_input) and exits.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    try:
+        # --reload's caller may set or change variables; the rest carry over
+        env = {**os.environ, **(_take_json(RELOAD_ENV_FILE) or {})}
+        listen_fd = server.socket.fileno()
+        ready_r, ready_w = os.pipe()
+        env.update(BRIDGE_LISTEN_FD=str(listen_fd), BRIDGE_READY_FD=str(ready_w),
+                   BRIDGE_RELOAD_FROM=str(os.getpid()))
+        permission_fds, waits = (), []
+        if _permission_server is not None:
+            pause_permission_server()
+            waits = _permission_broker.hand_over()
+            permission_fds = (_permission_server.fileno(), *(w["fd"] for w in waits))
+            env["BRIDGE_PERMISSION_FD"] = str(_permission_server.fileno())
+        save_reload_state(waits)
+        try:
+            successor = subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env,
+                                         pass_fds=(listen_fd, ready_w, *permission_fds))
+        except OSError as e:
+            print(f"Reload failed: {e}")
+            successor = None
+        finally:
+            os.close(ready_w)
+            for w in waits:
+                os.close(w["fd"])
+        ready = False
+        try:
+            if successor:
+                readable, _, _ = select.select([ready_r], [], [], RELOAD_READY_TIMEOUT)
+                ready = bool(readable) and os.read(ready_r, 16).startswith(b"ready")
+        finally:
+            os.close(ready_r)
+        if not ready:
+            if successor:
+                print("Reload failed: successor did not start; still serving")
+                successor.kill()
+            _permission_accepting.set()
+            return False
+        _permission_broker.release([w["id"] for w in waits])
+        print(f"Reloaded: PID {successor.pid} took over :{PORT}")
+        _handed_over.set()
+        server.shutdown()
+        return True
+    finally:
+        _reload_lock.release()
+
+
+def _wait_for_exit(pid: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return
+        time.sleep(0.1)
+
+
+def start_background_tasks(predecessor: int | None = None) -> None:
+    """Start the background loops, after a reloading predecessor has exited."""
+    if predecessor:
+        # Two spool drainers or pollers at once would double-send
+        _wait_for_exit(predecessor, RELOAD_READY_TIMEOUT)
+        take_over_input()
+    # Command menu registration is not needed to serve updates; don't block on it
+    threading.Thread(target=setup_bot_commands, daemon=True).start()
+    if WEBHOOK_URL:
+        threading.Thread(target=ensure_webhook, daemon=True).start()
+    # Start background session poller
+    threading.Thread(target=session_poller, daemon=True).start()
+    threading.Thread(target=log_maintenance_loop, daemon=True).start()
+    _search_index.refresh_async()
+    if _spend_watchdog.enabled:
+        threading.Thread(target=spend_watchdog_loop, daemon=True).start()
+    if _warm_pool.enabled:
+        threading.Thread(target=warm_pool_loop, daemon=True).start()
+    threading.Thread(target=spool_drain_loop, daemon=True).start()
+    threading.Thread(target=input_queue_loop, daemon=True).start()
+
+
+def request_reload(timeout: float = RELOAD_READY_TIMEOUT) -> int:
+    """`bridge.py --reload`: SIGHUP the running bridge and wait for its successor."""
+    try:
+        with open(BRIDGE_PID_FILE) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        print("No running bridge (PID file missing or stale)")
+        return 1
+    _write_private_json(RELOAD_ENV_FILE, dict(os.environ))
+    os.kill(pid, signal.SIGHUP)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(BRIDGE_PID_FILE) as f:
+                new_pid = int(f.read().strip())
+        except (OSError, ValueError):
+            new_pid = pid
+        if new_pid != pid:
+            print(f"Bridge reloaded: PID {pid} -> {new_pid}")
+            return 0
+        time.sleep(0.1)
+    print(f"Reload did not complete within {timeout:.0f}s; PID {pid} still serving")
+    return 1
+
+
 def main():
     if not BOT_TOKEN:
         print("Error: TELEGRAM_BOT_TOKEN not set")
         return
-    setup_bot_commands()
-    # Start background session poller
-    threading.Thread(target=session_poller, daemon=True).start()
-    print(f"Bridge on :{PORT} | tmux: {TMUX_SESSION}")
+    listen_fd = os.environ.pop("BRIDGE_LISTEN_FD", "")
+    ready_fd = os.environ.pop("BRIDGE_READY_FD", "")
+    permission_fd = os.environ.pop("BRIDGE_PERMISSION_FD", "")
+    predecessor = int(os.environ.pop("BRIDGE_RELOAD_FROM", "") or 0)
+    if predecessor:
+        restore_reload_state()
+    server = make_server(int(listen_fd) if listen_fd else None)
+    threading.Thread(target=start_background_tasks, args=(predecessor,), daemon=True).start()
+    start_permission_server(listen_fd=int(permission_fd) if permission_fd else None)
+    with open(BRIDGE_PID_FILE, "w") as f:
+        f.write(str(os.getpid()))
+    signal.signal(signal.SIGHUP, lambda *_: threading.Thread(
+        target=reload_bridge, args=(server,), daemon=True).start())
+    if ready_fd:
+        os.write(int(ready_fd), b"ready\n")
+        os.close(int(ready_fd))
+    print(f"Bridge on :{PORT} | tmux: {TMUX_SESSION}" + (f" (reloaded from PID {predecessor})" if predecessor else ""))
     try:
-        HTTPServer(("0.0.0.0", PORT), Handler).serve_forever()
+        server.serve_forever()
     except KeyboardInterrupt:
         print("\nStopped")
+    finally:
+        if _handed_over.is_set():
+            hand_over_input()
+        try:
+            with open(BRIDGE_PID_FILE) as f:
+                ours = f.read().strip() == str(os.getpid())
+            if ours:
+                os.unlink(BRIDGE_PID_FILE)
+        except OSError:
+            pass
 
 
 if __name__ == "__main__":
+    if "--reload" in sys.argv[1:]:
+        sys.exit(request_reload())
     main()
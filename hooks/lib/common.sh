@@ -27,7 +27,8 @@ get_chat_id() {
     local session_id="$1"
 
     if [ -n "$session_id" ] && [ -f "$SESSION_CHAT_MAP_FILE" ]; then
-        chat_id=$(jq -r --arg sid "$session_id" '.[$sid] // empty' "$SESSION_CHAT_MAP_FILE" 2>/dev/null)
+        # Value is an owner chat ID, or {"owner": ..., "watchers": [...]}
+        chat_id=$(jq -r --arg sid "$session_id" '.[$sid] // empty | if type == "object" then .owner // empty else . end' "$SESSION_CHAT_MAP_FILE" 2>/dev/null)
     fi
 
     if [ -z "$chat_id" ] && [ -f "$CHAT_ID_FILE" ]; then
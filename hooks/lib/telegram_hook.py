@@ -0,0 +1,658 @@
+"""Claude Code hooks for Telegram, as one module with a small cold start.
+
+    python3 -S hooks/lib/telegram_hook.py stop|input|notification|permission < hook-input.json
+    python3 -S -m telegram_hook <event>     # same, with hooks/lib on PYTHONPATH
+
+The hooks/*.sh wrappers exec the script form (-m adds runpy to every start).
+Only sys and os are imported up front; json, re and http.client are imported when
+an event needs them, so an event that exits early (sync paused, no chat bound)
+costs little more than interpreter startup. Measured by tests/hookbench.py.
+Paths mirror lib/common.sh.
+"""
+
+import os
+import sys
+
+HOME = os.path.expanduser("~")
+CLAUDE_DIR = os.path.join(HOME, ".claude")
+CHAT_ID_FILE = os.path.join(CLAUDE_DIR, "telegram_chat_id")
+PENDING_FILE = os.path.join(CLAUDE_DIR, "telegram_pending")
+SESSION_CHAT_MAP_FILE = os.path.join(CLAUDE_DIR, "session_chat_map.json")
+GROUP_PROJECT_MAP_FILE = os.path.join(CLAUDE_DIR, "group_project_map.json")
+CURRENT_SESSION_FILE = os.path.join(CLAUDE_DIR, "current_session_id")
+SYNC_DISABLED_FILE = os.path.join(CLAUDE_DIR, "telegram_sync_disabled")
+SYNC_PAUSED_FILE = os.path.join(CLAUDE_DIR, "telegram_sync_paused")
+LOG_DIR = os.path.join(CLAUDE_DIR, "logs")
+PERMISSION_SOCKET_FILE = os.path.join(CLAUDE_DIR, "telegram_permission.sock")
+SPOOL_DIR = os.path.join(CLAUDE_DIR, "telegram_spool")
+SPOOL_MAX_BYTES = 5 * 1024 * 1024  # per chat, as in the bridge
+LOG_DATE_FORMAT = "%m%d%Y"
+TRANSCRIPT_SETTLE = 0.3  # Wait for the transcript to be fully written
+MAX_TEXT = 4000
+
+
+# --- Config ---
+
+def _common_sh_token() -> str:
+    """Token that install.sh / start.sh wrote into lib/common.sh."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "common.sh")
+    prefix = 'TELEGRAM_BOT_TOKEN="${TELEGRAM_BOT_TOKEN:-'
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(prefix):
+                    return line[len(prefix):].split("}", 1)[0]
+    except OSError:
+        pass
+    return ""
+
+
+def bot_token() -> str:
+    return os.environ.get("TELEGRAM_BOT_TOKEN") or _common_sh_token()
+
+
+def api_base() -> str:
+    return os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+
+
+def permission_wait() -> float:
+    # Below the PermissionRequest hook timeout (120s)
+    try:
+        return float(os.environ.get("PERMISSION_WAIT") or 110)
+    except ValueError:
+        return 110.0
+
+
+# --- State files ---
+
+def _read(path: str) -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _load_json(path: str):
+    if not os.path.exists(path):
+        return None
+    import json
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def sync_disabled() -> bool:
+    return os.path.exists(SYNC_DISABLED_FILE) or os.path.exists(SYNC_PAUSED_FILE)
+
+
+def get_topic(session_id: str) -> str:
+    """'chat_id:thread_id' of the forum topic a session is routed to ('' if none)."""
+    groups = _load_json(GROUP_PROJECT_MAP_FILE) if session_id else None
+    if isinstance(groups, dict):
+        for chat, group in groups.items():
+            topics = group.get("topics") if isinstance(group, dict) else None
+            topic = topics.get(session_id) if isinstance(topics, dict) else None
+            if not topic:
+                continue
+            try:
+                return f"{chat}:{int(topic['thread_id'])}"
+            except (TypeError, KeyError, ValueError):
+                continue  # malformed entry: fall back to the plain chat
+    return ""
+
+
+def _session_binding(session_id: str) -> list[str]:
+    """[owner, *watchers] bound to a session, or []."""
+    mapping = _load_json(SESSION_CHAT_MAP_FILE) if session_id else None
+    value = mapping.get(session_id) if isinstance(mapping, dict) else None
+    if isinstance(value, dict):
+        chats = [value.get("owner")] + list(value.get("watchers") or [])
+    else:
+        chats = [value]
+    return [str(c) for c in chats if c is not None]
+
+
+def get_chat_id(session_id: str = "") -> str:
+    """Topic, then session owner, then the global chat file."""
+    binding = _session_binding(session_id)
+    return get_topic(session_id) or (binding[0] if binding else "") or _read(CHAT_ID_FILE)
+
+
+def get_chat_ids(session_id: str = "") -> list[str]:
+    """Recipients of a session's output: owner (or its topic) first, then watchers."""
+    topic = get_topic(session_id)
+    chats = _session_binding(session_id)
+    if chats and topic:
+        chats[0] = topic
+    if chats:
+        return chats
+    fallback = topic or get_chat_id()
+    return [fallback] if fallback else []
+
+
+def target(chat: str) -> dict:
+    """'chat_id' or 'chat_id:thread_id' (forum topic) -> sendMessage routing fields."""
+    chat_id, _, thread = str(chat).partition(":")
+    return {"chat_id": chat_id, "message_thread_id": int(thread)} if thread else {"chat_id": chat_id}
+
+
+# --- Logs ---
+
+def _now(fmt: str) -> str:
+    import time
+    return time.strftime(fmt)
+
+
+def log_debug(msg: str) -> None:
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        with open(os.path.join(LOG_DIR, "debug.log"), "a") as f:
+            f.write(f"[{_now('%H:%M:%S')}] {msg}\n")
+    except OSError:
+        pass
+
+
+def log_message(text: str, role: str) -> None:
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        with open(os.path.join(LOG_DIR, f"cc_{_now(LOG_DATE_FORMAT)}.log"), "a", encoding="utf-8") as f:
+            f.write(f"\n[{_now('%H:%M')}] {role}:\n{text}\n")
+            f.write("-" * 40 + "\n")
+    except OSError:
+        pass
+
+
+# --- Telegram ---
+
+# thread id -> keep-alive http.client connection; http.client and urllib are
+# imported on the first send, so events that exit early don't pay for them
+_conns: dict = {}
+
+
+def _split_url(url: str) -> tuple[bool, str, int, str]:
+    scheme, _, rest = url.partition("://")
+    netloc, slash, path = rest.partition("/")
+    host, _, port = netloc.partition(":")
+    https = scheme == "https"
+    return https, host, int(port) if port else (443 if https else 80), (slash + path).rstrip("/")
+
+
+def _proxied(https: bool, host: str) -> bool:
+    """Whether urllib.request.getproxies() sends this host through a proxy."""
+    if sys.platform not in ("darwin", "win32") and not any(
+            k.lower() in ("http_proxy", "https_proxy") and v for k, v in os.environ.items()):
+        return False  # getproxies() only reads the environment here; skip importing urllib
+    import urllib.request
+    return bool(urllib.request.getproxies().get("https" if https else "http")) and not urllib.request.proxy_bypass(host)
+
+
+def _parse_reply(status: int, body: bytes) -> dict:
+    """The API's JSON reply; an edge's non-JSON error page becomes a bare error_code."""
+    import json
+    try:
+        reply = json.loads(body)
+    except ValueError:
+        reply = None
+    if not isinstance(reply, dict):
+        return {"ok": False, "error_code": status} if status >= 400 else {}
+    return reply
+
+
+def _post_via_urllib(url: str, body: bytes) -> dict:
+    """One-shot request through urllib, which routes via HTTP(S)_PROXY."""
+    import urllib.error
+    import urllib.request
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    try:
+        # Short: an unreachable API means spooling, not holding up Claude
+        with urllib.request.build_opener().open(req, timeout=5) as r:
+            return _parse_reply(r.status, r.read())
+    except urllib.error.HTTPError as e:
+        return _parse_reply(e.code, e.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def post(method: str, data: dict) -> dict:
+    """POST to the Bot API on a keep-alive connection owned by the calling thread.
+
+    Returns {} when Telegram could not be reached.
+    """
+    import _thread
+    import http.client
+    import json
+
+    https, host, port, base_path = _split_url(api_base())
+    path = f"{base_path}/bot{bot_token()}/{method}"
+    body = json.dumps(data).encode()
+    if _proxied(https, host):
+        return _post_via_urllib(f"{api_base()}/bot{bot_token()}/{method}", body)
+    key = _thread.get_ident()
+    for _ in range(2):
+        conn = _conns.pop(key, None)
+        reused = conn is not None
+        if conn is None:
+            cls = http.client.HTTPSConnection if https else http.client.HTTPConnection
+            conn = cls(host, port, timeout=5)
+        try:
+            conn.request("POST", path, body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            reply = _parse_reply(resp.status, resp.read())
+            if resp.will_close:
+                conn.close()
+            else:
+                _conns[key] = conn
+            return reply
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:  # only a stale kept-alive connection is worth one retry
+                break
+    return {}
+
+
+def fan_out(deliver, chat_ids: list[str]) -> list:
+    """Deliver to every recipient concurrently; the owner (first) is never queued behind others."""
+    if len(chat_ids) <= 1:
+        return [deliver(c) for c in chat_ids]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(8, len(chat_ids))) as pool:
+        return list(pool.map(deliver, chat_ids))
+
+
+def send_message(chat: str, text: str, reply_markup: dict | None = None, parse_mode: str | None = None) -> bool:
+    data = {**target(chat), "text": text}
+    if parse_mode:
+        data["parse_mode"] = parse_mode
+    if reply_markup:
+        data["reply_markup"] = reply_markup
+    return bool(post("sendMessage", data).get("ok"))
+
+
+# --- Spool ---
+# Messages that can't reach Telegram are appended to a per-chat file that the
+# bridge drains in order (bridge.OutboundSpool). Format and paths mirror it.
+
+def spool_file(chat: str) -> str:
+    return os.path.join(SPOOL_DIR, chat.split(":")[0] + ".jsonl")
+
+
+def spooled(chat: str) -> bool:
+    """Older messages for this chat are still queued, so new ones must queue behind them."""
+    path = spool_file(chat)
+    return os.path.exists(path) or os.path.exists(path + ".draining")
+
+
+def spool(chat: str, data: dict, fallback: dict | None = None) -> bool:
+    import json
+    import time
+
+    path = spool_file(chat)
+    try:
+        if os.path.getsize(path) >= SPOOL_MAX_BYTES:
+            log_debug(f"[{chat}] Spool full, message dropped")
+            return False
+    except OSError:
+        pass
+    entry = {"ts": time.time(), "method": "sendMessage", "data": data}
+    if fallback:
+        entry["fallback"] = fallback
+    try:
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, (json.dumps(entry) + "\n").encode())  # one write: appends don't interleave
+        finally:
+            os.close(fd)
+    except OSError:
+        return False
+    log_debug(f"[{chat}] Telegram unavailable, message spooled")
+    return True
+
+
+def _retryable(reply: dict) -> bool:
+    """Unreachable, rate-limited or failing: the bridge's drainer retries these, so spool them."""
+    code = reply.get("error_code") or 0
+    return not reply or code == 429 or code >= 500
+
+
+def send_or_spool(chat: str, text: str, parse_mode: str | None = None, plain: str | None = None) -> bool:
+    """Send a message, queueing it when Telegram is unreachable, answers 429 or 5xx, or
+    earlier ones are queued.
+
+    plain is a plain-text fallback for when Telegram rejects the formatted text.
+    """
+    data = {**target(chat), "text": text}
+    if parse_mode:
+        data["parse_mode"] = parse_mode
+    fallback = {**target(chat), "text": plain} if plain is not None else None
+    if spooled(chat):
+        return spool(chat, data, fallback)
+    reply = post("sendMessage", data)
+    if _retryable(reply):
+        return spool(chat, data, fallback)
+    if reply.get("ok"):
+        return True
+    if fallback:
+        log_debug(f"[{chat}] HTML send failed, trying plain text")
+        reply = post("sendMessage", fallback)
+        if _retryable(reply):
+            return spool(chat, fallback)
+        return bool(reply.get("ok"))
+    return False
+
+
+# --- Formatting ---
+
+def _esc(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def markdown_to_html(text: str) -> str:
+    """Claude's Markdown -> Telegram HTML (code, bold, italic)."""
+    import re
+
+    blocks, inlines = [], []
+    text = re.sub(r"```(\w*)\n?(.*?)```",
+                  lambda m: (blocks.append((m.group(1) or "", m.group(2))), f"\x00B{len(blocks)-1}\x00")[1],
+                  text, flags=re.DOTALL)
+    text = re.sub(r"`([^`\n]+)`", lambda m: (inlines.append(m.group(1)), f"\x00I{len(inlines)-1}\x00")[1], text)
+    text = _esc(text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
+    text = re.sub(r"(?<!\*)\*([^*]+)\*(?!\*)", r"<i>\1</i>", text)
+    for i, (lang, code) in enumerate(blocks):
+        text = text.replace(f"\x00B{i}\x00", f'<pre><code class="language-{lang}">{_esc(code.strip())}</code></pre>'
+                            if lang else f"<pre>{_esc(code.strip())}</pre>")
+    for i, code in enumerate(inlines):
+        text = text.replace(f"\x00I{i}\x00", f"<code>{_esc(code)}</code>")
+    return text
+
+
+def format_questions(questions: list[dict], header_style: str = "block") -> list[tuple[str, dict | None]]:
+    """AskUserQuestion -> [(message, inline keyboard)] with askq:<n> callbacks.
+
+    Option indexes run on across questions, matching the bridge's Down+Enter navigation.
+    """
+    messages = []
+    option_index = 0
+    for q in questions:
+        question_text = q.get("question", "")
+        header = q.get("header", "")
+        options = q.get("options", [])
+        if header_style == "inline":
+            msg = f"❓ [{header}] {question_text}\n" if header else f"❓ {question_text}\n"
+        else:
+            msg = f"❓ {header}\n\n{question_text}\n" if header else f"❓ {question_text}\n"
+        buttons = []
+        for i, opt in enumerate(options):
+            label = opt.get("label", f"Option {i+1}")
+            desc = opt.get("description", "")
+            msg += f"\n{i+1}. {label}"
+            if desc:
+                msg += f"\n   {desc}"
+            buttons.append([{"text": f"{i+1}. {label}", "callback_data": f"askq:{option_index + i}"}])
+        option_index += len(options)
+        messages.append((msg, {"inline_keyboard": buttons} if buttons else None))
+    return messages
+
+
+def format_permission(tool_name: str, tool_input: dict) -> str:
+    if tool_name in ("Edit", "Write"):
+        return f"\U0001f510 {tool_name}: {tool_input.get('file_path', 'unknown')}"
+    if tool_name == "Bash":
+        command = tool_input.get("command", "")
+        if len(command) > 300:
+            command = command[:300] + "..."
+        return f"\U0001f510 Bash:\n{command}"
+    return f"\U0001f510 Permission: {tool_name}"
+
+
+# --- Transcript ---
+
+def last_assistant_text(transcript_path: str) -> str | None:
+    """Assistant text written since the last user entry (None if there is no user entry)."""
+    import json
+
+    try:
+        with open(transcript_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    pos = data.rfind(b'"type":"user"')
+    if pos < 0:
+        return None
+    texts = []
+    for line in data[data.rfind(b"\n", 0, pos) + 1:].splitlines():
+        if b'"type":"assistant"' not in line:
+            continue
+        try:
+            content = json.loads(line).get("message", {}).get("content", [])
+        except ValueError:
+            continue
+        if isinstance(content, list):
+            texts += [b.get("text", "") for b in content if isinstance(b, dict) and b.get("type") == "text"]
+    return "\n\n".join(texts)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# --- Events ---
+
+def on_stop(hook_input: dict) -> int:
+    """Stop: send Claude's response to the session's chats."""
+    transcript_path = hook_input.get("transcript_path") or ""
+    log_debug("=== Hook triggered ===")
+    log_debug(f"TRANSCRIPT_PATH: {transcript_path}")
+
+    import time
+    time.sleep(TRANSCRIPT_SETTLE)
+
+    if not os.path.isfile(transcript_path):
+        log_debug("EXIT: TRANSCRIPT_PATH not found")
+        return 0
+
+    session_id = os.path.splitext(os.path.basename(transcript_path))[0]
+    chat_ids = get_chat_ids(session_id)
+    log_debug(f"SESSION_ID: {session_id}, recipients: {','.join(chat_ids)}")
+    if not chat_ids:
+        log_debug("EXIT: No CHAT_ID found")
+        return 0
+
+    raw = last_assistant_text(transcript_path)
+    if raw is None:
+        log_debug("EXIT: No user message found")
+        _remove(PENDING_FILE)
+        return 0
+    text = raw.strip()
+    if not text:
+        log_debug("EXIT: No text content extracted")
+        _remove(PENDING_FILE)
+        return 0
+
+    # Always log, conditionally send
+    log_message(text, "Claude")
+    if sync_disabled():
+        log_debug("Sync disabled/paused, logged only (skipping Telegram send)")
+    else:
+        html = markdown_to_html(text[:MAX_TEXT] + "\n..." if len(text) > MAX_TEXT else text)
+        plain = raw[:4096]
+
+        def deliver(chat):
+            sent = send_or_spool(chat, html, parse_mode="HTML", plain=plain)
+            log_debug(f"[{chat}] Message sent successfully" if sent else f"[{chat}] ERROR: Failed to send message")
+            return sent
+
+        log_debug(f"Sending message, length: {len(html)}, recipients: {len(chat_ids)}")
+        fan_out(deliver, chat_ids)
+
+    _remove(PENDING_FILE)
+    return 0
+
+
+def on_input(hook_input: dict) -> int:
+    """UserPromptSubmit: log the prompt; mirror desktop prompts to Telegram."""
+    prompt = hook_input.get("prompt") or ""
+    session_id = _read(CURRENT_SESSION_FILE)
+    chat_ids = get_chat_ids(session_id)
+    if not prompt or not chat_ids:
+        return 0
+    if len(prompt) > MAX_TEXT:
+        prompt = prompt[:MAX_TEXT] + "..."
+    log_message(prompt, "You")
+    if sync_disabled():
+        return 0
+    # From desktop: everyone gets it. From Telegram: the owner typed it, so only
+    # read-only watchers need a copy.
+    recipients = chat_ids[1:] if os.path.exists(PENDING_FILE) else chat_ids
+    text = f"📝 You:\n{prompt}"
+    fan_out(lambda chat: send_or_spool(chat, text), recipients)
+    return 0
+
+
+def on_notification(hook_input: dict) -> int:
+    """Notification (elicitation_dialog): forward the last AskUserQuestion's options."""
+    transcript_path = hook_input.get("transcript_path") or ""
+    if not os.path.isfile(transcript_path):
+        return 0
+    import time
+    time.sleep(TRANSCRIPT_SETTLE)
+
+    session_id = os.path.splitext(os.path.basename(transcript_path))[0]
+    chat_id = get_chat_id(session_id)
+    if not chat_id or sync_disabled():
+        return 0
+
+    import json
+    try:
+        with open(transcript_path) as f:
+            lines = f.readlines()[-30:]
+    except OSError:
+        return 0
+    # Search backwards for the last AskUserQuestion tool_use
+    for line in reversed(lines):
+        if '"AskUserQuestion"' not in line:
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get("type") != "assistant":
+            continue
+        for block in entry.get("message", {}).get("content", []):
+            if block.get("type") != "tool_use" or block.get("name") != "AskUserQuestion":
+                continue
+            questions = [q for q in block.get("input", {}).get("questions", []) if q.get("options")]
+            if questions:
+                msg, kb = format_questions(questions[:1], header_style="inline")[0]
+                send_message(chat_id, msg, kb)
+                return 0
+    return 0
+
+
+def on_permission(hook_input: dict) -> int:
+    """PermissionRequest: Telegram buttons; the decision comes back over the bridge socket.
+
+    Without the bridge, buttons fall back to askq: keystroke answers and Claude Code
+    shows its own dialog.
+    """
+    tool_name = hook_input.get("tool_name") or ""
+    tool_input = hook_input.get("tool_input") or {}
+    if not tool_name:
+        return 0
+    chat_id = get_chat_id(_read(CURRENT_SESSION_FILE))
+    if not chat_id or sync_disabled():
+        return 0
+
+    if tool_name == "AskUserQuestion":
+        for msg, kb in format_questions(tool_input.get("questions", [])):
+            send_message(chat_id, msg, kb)
+        return 0
+
+    import json
+    import socket
+
+    wait = permission_wait()
+    # Register with the bridge before posting buttons so an early tap is not lost
+    request_id = os.urandom(16).hex()
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.settimeout(2)
+        conn.connect(PERMISSION_SOCKET_FILE)
+        conn.sendall((json.dumps({"id": request_id, "timeout": wait}) + "\n").encode())
+    except OSError:
+        conn.close()
+        conn = None
+
+    # 3-button inline keyboard: Yes / Yes to all / No
+    if conn:
+        choices = [("Yes", "allow"), ("Yes to all", "allow_all"), ("No", "deny")]
+        buttons = [[{"text": label, "callback_data": f"perm:{request_id}:{d}"}] for label, d in choices]
+    else:
+        buttons = [
+            [{"text": "Yes", "callback_data": "askq:0"}],
+            [{"text": "Yes to all", "callback_data": "askq:1"}],
+            [{"text": "No", "callback_data": "askq:2"}],
+        ]
+    sent = send_message(chat_id, format_permission(tool_name, tool_input), {"inline_keyboard": buttons})
+    if conn is None or not sent:
+        if conn:
+            conn.close()
+        return 0
+
+    try:
+        conn.settimeout(wait + 5)
+        with conn.makefile("r", encoding="utf-8") as f:
+            reply = json.loads(f.readline() or "{}")
+    except (OSError, ValueError):
+        reply = {}
+    finally:
+        conn.close()
+
+    decision = reply.get("decision")
+    if decision in ("allow", "allow_all"):
+        result = {"behavior": "allow"}
+        if decision == "allow_all" and hook_input.get("permission_suggestions"):
+            result["updatedPermissions"] = hook_input["permission_suggestions"]
+    elif decision == "deny":
+        result = {"behavior": "deny", "message": "Denied from Telegram"}
+    else:
+        return 0  # timed out: Claude Code shows its own dialog
+
+    print(json.dumps({"hookSpecificOutput": {"hookEventName": "PermissionRequest", "decision": result}}))
+    return 0
+
+
+EVENTS = {
+    "stop": on_stop,
+    "input": on_input,
+    "notification": on_notification,
+    "permission": on_permission,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    handler = EVENTS.get(argv[0] if argv else "")
+    if handler is None:
+        print(f"usage: python3 -m telegram_hook {{{'|'.join(EVENTS)}}}", file=sys.stderr)
+        return 2
+    raw = sys.stdin.read()
+    if not raw.strip():
+        return 0
+    import json
+    try:
+        hook_input = json.loads(raw)
+    except ValueError:
+        return 0
+    return handler(hook_input if isinstance(hook_input, dict) else {})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
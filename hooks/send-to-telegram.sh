@@ -1,148 +1,10 @@
 #!/bin/bash
 # Claude Code Stop hook - sends response back to Telegram
 # Install: copy to ~/.claude/hooks/ and add to ~/.claude/settings.json
+#
+# The work is done by lib/telegram_hook.py: python3 -S skips site-packages, and
+# the module reads the hook JSON from stdin itself (no common.sh, jq or date).
 
-source "$(dirname "$0")/lib/common.sh"
-
-INPUT=$(cat)
-TRANSCRIPT_PATH=$(echo "$INPUT" | jq -r '.transcript_path')
-
-DEBUG_LOG="$LOG_DIR/debug.log"
-
-log_debug() {
-    echo "[$(date '+%H:%M:%S')] $1" >> "$DEBUG_LOG"
-}
-
-log_debug "=== Hook triggered ==="
-log_debug "TRANSCRIPT_PATH: $TRANSCRIPT_PATH"
-
-# Wait for transcript to be fully written
-sleep 0.3
-
-# Check required files
-if [ ! -f "$TRANSCRIPT_PATH" ]; then
-    log_debug "EXIT: TRANSCRIPT_PATH not found"
-    exit 0
-fi
-
-# Extract session ID from transcript path (filename without extension)
-SESSION_ID=$(basename "$TRANSCRIPT_PATH" .jsonl)
-log_debug "SESSION_ID: $SESSION_ID"
-
-CHAT_ID=$(get_chat_id "$SESSION_ID")
-log_debug "CHAT_ID: $CHAT_ID"
-
-if [ -z "$CHAT_ID" ]; then
-    log_debug "EXIT: No CHAT_ID found"
-    exit 0
-fi
-
-log_debug "Using CHAT_ID: $CHAT_ID"
-
-LAST_USER_LINE=$(grep -n '"type":"user"' "$TRANSCRIPT_PATH" | tail -1 | cut -d: -f1)
-if [ -z "$LAST_USER_LINE" ]; then
-    log_debug "EXIT: No user message found"
-    rm -f "$PENDING_FILE"
-    exit 0
-fi
-log_debug "LAST_USER_LINE: $LAST_USER_LINE"
-
-TMPFILE=$(mktemp)
-tail -n "+$LAST_USER_LINE" "$TRANSCRIPT_PATH" | \
-  grep '"type":"assistant"' | \
-  jq -rs '[.[].message.content[] | select(.type == "text") | .text] | join("\n\n")' > "$TMPFILE" 2>/dev/null
-
-if [ ! -s "$TMPFILE" ]; then
-    log_debug "EXIT: No text content extracted"
-    rm -f "$TMPFILE" "$PENDING_FILE"
-    exit 0
-fi
-log_debug "Text extracted, size: $(wc -c < "$TMPFILE") bytes"
-
-# Check sync state after content extraction (always log, conditionally send)
-SYNC_DISABLED=0
-if get_sync_disabled; then
-    SYNC_DISABLED=1
-fi
-
-python3 - "$TMPFILE" "$CHAT_ID" "$TELEGRAM_BOT_TOKEN" "$LOG_FILE" "$DEBUG_LOG" "$SYNC_DISABLED" << 'PYEOF'
-import sys, re, json, urllib.request
-from datetime import datetime
-
-tmpfile, chat_id, token, log_file, debug_log, sync_disabled = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5], sys.argv[6]
-
-def log_debug(msg):
-    try:
-        with open(debug_log, "a") as f:
-            f.write(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}\n")
-    except:
-        pass
-
-with open(tmpfile) as f:
-    text = f.read().strip()
-
-if not text or text == "null":
-    log_debug("EXIT: Empty text in Python")
-    sys.exit(0)
-
-# Save original text for logging
-original_text = text
-
-if len(text) > 4000:
-    text = text[:4000] + "\n..."
-
-def esc(s):
-    return s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-
-blocks, inlines = [], []
-text = re.sub(r'```(\w*)\n?(.*?)```', lambda m: (blocks.append((m.group(1) or '', m.group(2))), f"\x00B{len(blocks)-1}\x00")[1], text, flags=re.DOTALL)
-text = re.sub(r'`([^`\n]+)`', lambda m: (inlines.append(m.group(1)), f"\x00I{len(inlines)-1}\x00")[1], text)
-text = esc(text)
-text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', r'<i>\1</i>', text)
-
-for i, (lang, code) in enumerate(blocks):
-    text = text.replace(f"\x00B{i}\x00", f'<pre><code class="language-{lang}">{esc(code.strip())}</code></pre>' if lang else f'<pre>{esc(code.strip())}</pre>')
-for i, code in enumerate(inlines):
-    text = text.replace(f"\x00I{i}\x00", f'<code>{esc(code)}</code>')
-
-def send(txt, mode=None):
-    data = {"chat_id": chat_id, "text": txt}
-    if mode:
-        data["parse_mode"] = mode
-    try:
-        req = urllib.request.Request(f"https://api.telegram.org/bot{token}/sendMessage", json.dumps(data).encode(), {"Content-Type": "application/json"})
-        return json.loads(urllib.request.urlopen(req, timeout=10).read()).get("ok")
-    except:
-        return False
-
-def log_message(text, role="Claude"):
-    try:
-        time_str = datetime.now().strftime("%H:%M")
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(f"\n[{time_str}] {role}:\n{text}\n")
-            f.write("-" * 40 + "\n")
-    except:
-        pass
-
-# Always log the message
-log_message(original_text)
-
-# Only send to Telegram if sync is not disabled/paused
-if sync_disabled == "1":
-    log_debug("Sync disabled/paused, logged only (skipping Telegram send)")
-else:
-    log_debug(f"Sending message, length: {len(text)}")
-    sent = send(text, "HTML")
-    if not sent:
-        log_debug("HTML send failed, trying plain text")
-        with open(tmpfile) as f:
-            sent = send(f.read()[:4096])
-    if sent:
-        log_debug("Message sent successfully")
-    else:
-        log_debug("ERROR: Failed to send message")
-PYEOF
-
-rm -f "$TMPFILE" "$PENDING_FILE"
-exit 0
+HOOK_LIB="${0%/*}/lib"
+[ "$HOOK_LIB" = "$0/lib" ] && HOOK_LIB=./lib
+exec python3 -S "$HOOK_LIB/telegram_hook.py" stop
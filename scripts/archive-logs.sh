@@ -0,0 +1,37 @@
+#!/bin/bash
+# Archive Claude Code Telegram logs into compressed, indexed monthly files
+# Usage: ./scripts/archive-logs.sh                    # Archive closed days, apply retention, rotate debug.log
+#        ./scripts/archive-logs.sh --read START [END] # Print archived logs for a time range
+# Example: ./scripts/archive-logs.sh --read 2026-09-01T09:00 2026-09-01T18:00
+# Retention: LOG_ARCHIVE_RETENTION_DAYS (default from config.env)
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
+source "$SCRIPT_DIR/lib/common.sh"
+
+if [ ! -d "$LOG_DIR" ]; then
+    echo "Log directory not found: $LOG_DIR"
+    exit 0
+fi
+
+PYTHONPATH="$PROJECT_DIR" python3 - "$@" << 'PYEOF'
+import sys
+from datetime import datetime
+
+import bridge
+
+args = sys.argv[1:]
+if args and args[0] == "--read":
+    if len(args) < 2:
+        print("Usage: archive-logs.sh --read START [END]")
+        sys.exit(1)
+    start = datetime.fromisoformat(args[1])
+    end = datetime.fromisoformat(args[2]) if len(args) > 2 else datetime.now()
+    sys.stdout.write(bridge.read_archived_logs(start, end))
+    sys.exit(0)
+
+print(f"Archived {bridge.archive_logs()} day(s) into {bridge.LOG_DIR}/archive")
+print(f"Pruned {bridge.prune_log_archive()} month(s) older than {bridge.LOG_ARCHIVE_RETENTION_DAYS} days")
+if bridge.rotate_debug_log():
+    print("Rotated debug.log")
+PYEOF
@@ -214,7 +214,7 @@ setup_hooks() {
 
     # Copy hooks common library
     if [ -d "$PROJECT_DIR/hooks/lib" ]; then
-        cp "$PROJECT_DIR/hooks/lib/common.sh" ~/.claude/hooks/lib/
+        cp "$PROJECT_DIR/hooks/lib/common.sh" "$PROJECT_DIR/hooks/lib/telegram_hook.py" ~/.claude/hooks/lib/
     fi
 
     # Replace token placeholder in common library
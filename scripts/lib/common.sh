@@ -31,19 +31,40 @@ SYNC_DISABLED_FILE=~/.claude/telegram_sync_disabled
 SYNC_PAUSED_FILE=~/.claude/telegram_sync_paused
 LOG_DIR=~/.claude/logs
 LOG_FILE="$LOG_DIR/cc_$(date +${DEFAULT_LOG_DATE_FORMAT}).log"
+TUNNEL_STATE_FILE=~/.claude/telegram_tunnel
+BRIDGE_PID_FILE=~/.claude/telegram_bridge.pid
 
 print_status() { echo -e "${GREEN}✓${NC} $1"; }
 print_error() { echo -e "${RED}✗${NC} $1"; }
 print_warning() { echo -e "${YELLOW}!${NC} $1"; }
 print_info() { echo -e "${BLUE}→${NC} $1"; }
 
+# Retry a command with bounded backoff (0.1s doubling, capped at 1s)
+# Args: $1 = deadline in seconds, rest = command. Returns 1 if the deadline passes.
+wait_until() {
+    local deadline=$1
+    shift
+    local delay=0.1 waited=0
+    until "$@" >/dev/null 2>&1; do
+        if awk "BEGIN { exit !($waited >= $deadline) }"; then
+            return 1
+        fi
+        sleep "$delay"
+        waited=$(awk "BEGIN { print $waited + $delay }")
+        delay=$(awk "BEGIN { d = $delay * 2; print (d > 1) ? 1 : d }")
+    done
+}
+
+bridge_gone() { ! pgrep -f "python.*bridge.py" >/dev/null 2>&1; }
+cloudflared_gone() { ! pgrep -f "cloudflared tunnel" >/dev/null 2>&1; }
+
 kill_bridge() {
     local pids
     pids=$(pgrep -f "python.*bridge.py" 2>/dev/null || true)
     if [ -n "$pids" ]; then
         print_warning "Killing bridge processes..."
         pkill -9 -f "python.*bridge.py" 2>/dev/null || true
-        sleep 1
+        wait_until 3 bridge_gone || true
         print_status "Bridge processes killed"
     else
         print_info "No bridge processes running"
@@ -56,7 +77,7 @@ kill_cloudflared() {
     if [ -n "$pids" ]; then
         print_warning "Killing cloudflared processes..."
         pkill -9 -f "cloudflared tunnel" 2>/dev/null || true
-        sleep 1
+        wait_until 3 cloudflared_gone || true
         print_status "Cloudflared processes killed"
     else
         print_info "No cloudflared processes running"
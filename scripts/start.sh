@@ -6,6 +6,7 @@
 # Usage:
 #   ./scripts/start.sh              - Start bridge (default)
 #   ./scripts/start.sh --new        - Create new tmux session + Claude, then start
+#   ./scripts/start.sh --fresh-tunnel - Start without reusing a running tunnel
 #   ./scripts/start.sh --new <path> - Create session for specific project
 #   ./scripts/start.sh --attach     - Attach to Claude tmux session
 #   ./scripts/start.sh --detach     - Detach from tmux (run from another terminal)
@@ -14,6 +15,7 @@
 #   ./scripts/start.sh --setup-hook - Setup hook configuration
 #   ./scripts/start.sh --sync       - Show how to sync desktop and Telegram
 #   ./scripts/start.sh --terminate  - Stop all bridge processes and disable sync
+#   ./scripts/start.sh --reload     - Restart the bridge in place (new code/config, no downtime)
 #   ./scripts/start.sh --stop-sync  - Pause sync locally (no bridge needed)
 #   ./scripts/start.sh --resume-sync - Resume sync locally
 #   ./scripts/start.sh --help       - Show this help
@@ -28,6 +30,8 @@ source "$SCRIPT_DIR/lib/common.sh"
 
 PORT=${PORT:-$DEFAULT_PORT}
 TMUX_SESSION=${TMUX_SESSION:-$DEFAULT_TMUX_SESSION}
+WEBHOOK_URL=${WEBHOOK_URL:-$DEFAULT_WEBHOOK_URL}
+CLOUDFLARE_TUNNEL_NAME=${CLOUDFLARE_TUNNEL_NAME:-$DEFAULT_CLOUDFLARE_TUNNEL_NAME}
 CHECK_ONLY=false
 NEW_SESSION=false
 NEW_PROJECT_PATH=""
@@ -40,6 +44,8 @@ DETACH_SESSION=false
 TERMINATE_ALL=false
 STOP_SYNC=false
 RESUME_SYNC=false
+FRESH_TUNNEL=false
+RELOAD_BRIDGE=false
 
 # Parse arguments
 while [[ $# -gt 0 ]]; do
@@ -63,6 +69,8 @@ while [[ $# -gt 0 ]]; do
         --terminate) TERMINATE_ALL=true; shift ;;
         --stop-sync) STOP_SYNC=true; shift ;;
         --resume-sync) RESUME_SYNC=true; shift ;;
+        --fresh-tunnel) FRESH_TUNNEL=true; shift ;;
+        --reload) RELOAD_BRIDGE=true; shift ;;
         *) shift ;;
     esac
 done
@@ -85,14 +93,18 @@ show_help() {
     echo "  --setup-hook  Setup Claude Stop hook for Telegram"
     echo "  --sync        Show how to sync desktop and Telegram sessions"
     echo "  --terminate   Stop all bridge processes and disable sync"
+    echo "  --reload      Restart the bridge in place: re-reads config.env and code, no dropped updates"
     echo "  --stop-sync   Pause sync locally (no bridge needed)"
     echo "  --resume-sync Resume sync locally"
+    echo "  --fresh-tunnel Start a new tunnel even if a registered one is still running"
     echo "  --help, -h    Show this help"
     echo ""
     echo "Environment Variables:"
     echo "  TELEGRAM_BOT_TOKEN  (required) Bot token from @BotFather"
     echo "  TMUX_SESSION        tmux session name (default: claude)"
     echo "  PORT                Bridge port (default: 8080)"
+    echo "  WEBHOOK_URL         Stable public URL (named tunnel or own proxy); skips quick tunnels"
+    echo "  CLOUDFLARE_TUNNEL_NAME  Named cloudflared tunnel serving WEBHOOK_URL"
     echo ""
     echo "Examples:"
     echo "  ./scripts/start.sh                          # Start bridge"
@@ -158,6 +170,19 @@ if $SHOW_SYNC; then
     exit 0
 fi
 
+# ============================================
+# Reload (hand the port to a fresh bridge process)
+# ============================================
+if $RELOAD_BRIDGE; then
+    [ -f .venv/bin/activate ] && source .venv/bin/activate
+    if python3 bridge.py --reload; then
+        print_status "Bridge reloaded"
+        exit 0
+    fi
+    print_error "Reload failed (is the bridge running? start it with ./scripts/start.sh)"
+    exit 1
+fi
+
 # ============================================
 # Terminate All (stop bridge and disable sync)
 # ============================================
@@ -166,6 +191,7 @@ if $TERMINATE_ALL; then
 
     kill_bridge
     kill_cloudflared
+    rm -f "$TUNNEL_STATE_FILE"
 
     # Create disabled flag file
     echo "$(date +%s)" > "$SYNC_DISABLED_FILE"
@@ -365,7 +391,7 @@ setup_hook() {
 
     # Copy hooks common library
     if [ -d "hooks/lib" ]; then
-        cp hooks/lib/common.sh ~/.claude/hooks/lib/
+        cp hooks/lib/common.sh hooks/lib/telegram_hook.py ~/.claude/hooks/lib/
         print_status "Hook library copied"
     fi
 
@@ -633,13 +659,122 @@ kill_port() {
 
 cleanup() {
     echo -e "\n${YELLOW}Shutting down...${NC}"
-    kill $BRIDGE_PID 2>/dev/null
-    kill $TUNNEL_PID 2>/dev/null
-    rm -f /tmp/tunnel_output.log
+    # After a --reload the bridge serving the port is a successor, listed in the PID file
+    kill $BRIDGE_PID $(cat "$BRIDGE_PID_FILE" 2>/dev/null) 2>/dev/null
+    if [ -f "$TUNNEL_STATE_FILE" ] || [ -n "$WEBHOOK_URL" ]; then
+        # Keep a registered tunnel alive so the next start can reuse it
+        print_info "Tunnel left running for fast restart (--terminate stops it)"
+    else
+        kill $TUNNEL_PID 2>/dev/null
+        rm -f /tmp/tunnel_output.log
+    fi
     rm -f "$PENDING_FILE"
     exit 0
 }
 
+# Block while a bridge is serving. After a --reload the serving bridge is the
+# old one's child, not ours, so follow the PID file rather than `wait`.
+wait_for_bridge() {
+    local pid
+    while true; do
+        pid=$(cat "$BRIDGE_PID_FILE" 2>/dev/null || true)
+        kill -0 "${pid:-$BRIDGE_PID}" 2>/dev/null || break
+        sleep 1 &
+        wait $!
+    done
+}
+
+# Tunnel reuse: a tunnel from a previous run is reused when its process is
+# alive and Telegram's webhook still points at its URL.
+tunnel_reusable() {
+    [ -f "$TUNNEL_STATE_FILE" ] || return 1
+    local pid url current
+    read -r pid url < "$TUNNEL_STATE_FILE"
+    [ -n "$pid" ] && [ -n "$url" ] || return 1
+    kill -0 "$pid" 2>/dev/null || return 1
+    current=$(curl -s --max-time 5 "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/getWebhookInfo" | jq -r '.result.url // empty' 2>/dev/null)
+    [ "$current" = "$url" ] || return 1
+    TUNNEL_PID=$pid
+    TUNNEL_URL=$url
+}
+
+bridge_ready() { curl -s -o /dev/null --max-time 1 "http://localhost:$PORT/"; }
+
+tunnel_url_ready() {
+    kill -0 $TUNNEL_PID 2>/dev/null || return 0  # died: stop waiting, checked below
+    TUNNEL_URL=$(grep -oE 'https://[a-zA-Z0-9-]+\.trycloudflare\.com' "$TUNNEL_LOG" 2>/dev/null | head -1)
+    [ -n "$TUNNEL_URL" ]
+}
+
+# Reaching the bridge through the public URL proves DNS, tunnel and origin are up
+tunnel_reachable() {
+    [ "$(curl -s -o /dev/null -w '%{http_code}' --max-time 3 "$TUNNEL_URL/")" = "200" ]
+}
+
+# Register TUNNEL_URL as the webhook, retrying with bounded backoff
+# (DNS may still be propagating on Telegram's side)
+set_webhook() {
+    local delay=1 attempt result
+    for attempt in 1 2 3 4 5; do
+        print_info "Setting webhook (attempt $attempt)..."
+        result=$(curl -s "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/setWebhook?url=${TUNNEL_URL}")
+        if echo "$result" | jq -e '.ok == true' >/dev/null 2>&1; then
+            print_status "Webhook set successfully"
+            return 0
+        fi
+        if [ $attempt -lt 5 ]; then
+            print_warning "Webhook failed, retrying in ${delay} seconds..."
+            sleep $delay
+            delay=$((delay * 2 > 8 ? 8 : delay * 2))
+        fi
+    done
+    print_error "Failed to set webhook after 5 attempts"
+    echo "$result" | jq .
+    return 1
+}
+
+# Stable URL: only call setWebhook when getWebhookInfo shows drift
+ensure_webhook() {
+    local current
+    current=$(curl -s --max-time 5 "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/getWebhookInfo" | jq -r '.result.url // empty' 2>/dev/null)
+    if [ "$current" = "$TUNNEL_URL" ]; then
+        print_status "Webhook already registered: $TUNNEL_URL"
+        return 0
+    fi
+    print_warning "Webhook is '${current:-unset}', re-registering"
+    set_webhook
+}
+
+start_named_tunnel() {
+    TUNNEL_PID=$(pgrep -f "cloudflared tunnel.* run $CLOUDFLARE_TUNNEL_NAME\$" 2>/dev/null | head -1 || true)
+    if [ -n "$TUNNEL_PID" ]; then
+        print_status "Named tunnel '$CLOUDFLARE_TUNNEL_NAME' already running (PID $TUNNEL_PID)"
+        return 0
+    fi
+    print_info "Starting named tunnel '$CLOUDFLARE_TUNNEL_NAME'..."
+    TUNNEL_LOG="/tmp/tunnel_output.log"
+    if command -v setsid &>/dev/null; then
+        setsid cloudflared tunnel --url http://localhost:$PORT run "$CLOUDFLARE_TUNNEL_NAME" >> "$TUNNEL_LOG" 2>&1 &
+    else
+        cloudflared tunnel --url http://localhost:$PORT run "$CLOUDFLARE_TUNNEL_NAME" >> "$TUNNEL_LOG" 2>&1 &
+    fi
+    TUNNEL_PID=$!
+}
+
+start_tunnel() {
+    TUNNEL_URL=""
+    TUNNEL_LOG="/tmp/tunnel_output.log"
+    rm -f "$TUNNEL_LOG" "$TUNNEL_STATE_FILE"
+    touch "$TUNNEL_LOG"
+    # New session (where available) so Ctrl+C on this script doesn't take the tunnel down
+    if command -v setsid &>/dev/null; then
+        setsid cloudflared tunnel --url http://localhost:$PORT >> "$TUNNEL_LOG" 2>&1 &
+    else
+        cloudflared tunnel --url http://localhost:$PORT >> "$TUNNEL_LOG" 2>&1 &
+    fi
+    TUNNEL_PID=$!
+}
+
 # ============================================
 # New Session Mode
 # ============================================
@@ -738,7 +873,24 @@ echo -e "\n${BLUE}=== Cleaning Up ===${NC}\n"
 
 kill_bridge
 kill_port
-kill_cloudflared
+
+REUSE_TUNNEL=false
+if [ -n "$WEBHOOK_URL" ]; then
+    # Stable URL: quick-tunnel state doesn't apply; keep a running named tunnel
+    rm -f "$TUNNEL_STATE_FILE"
+    if $FRESH_TUNNEL || [ -z "$CLOUDFLARE_TUNNEL_NAME" ]; then
+        kill_cloudflared
+    fi
+elif [ -n "$CLOUDFLARE_TUNNEL_NAME" ]; then
+    print_error "CLOUDFLARE_TUNNEL_NAME requires WEBHOOK_URL (the tunnel's public hostname)"
+    exit 1
+elif ! $FRESH_TUNNEL && tunnel_reusable; then
+    REUSE_TUNNEL=true
+    print_status "Reusing running tunnel (PID $TUNNEL_PID)"
+else
+    kill_cloudflared
+    rm -f "$TUNNEL_STATE_FILE"
+fi
 
 # Remove disabled flag (starting bridge re-enables sync)
 if [ -f "$SYNC_DISABLED_FILE" ]; then
@@ -758,101 +910,81 @@ trap cleanup SIGINT SIGTERM
 # Activate venv
 source .venv/bin/activate
 
-# Start bridge
+# Start bridge and (if needed) tunnel together; readiness is polled with backoff
 print_info "Starting bridge server..."
 python3 bridge.py &
 BRIDGE_PID=$!
-sleep 2
 
-if ! kill -0 $BRIDGE_PID 2>/dev/null; then
-    print_error "Bridge failed to start"
-    exit 1
-fi
-print_status "Bridge running on :$PORT"
-
-# Start tunnel
-print_info "Starting cloudflared tunnel..."
-
-TUNNEL_URL=""
-TUNNEL_LOG="/tmp/tunnel_output.log"
-rm -f "$TUNNEL_LOG"
-touch "$TUNNEL_LOG"
-
-# Start cloudflared and redirect output to log file
-cloudflared tunnel --url http://localhost:$PORT >> "$TUNNEL_LOG" 2>&1 &
-TUNNEL_PID=$!
-
-print_info "Waiting for tunnel URL..."
-for i in {1..20}; do
-    sleep 1
-    # Check if tunnel process is still running
-    if ! kill -0 $TUNNEL_PID 2>/dev/null; then
-        print_error "Cloudflared process died"
-        cat "$TUNNEL_LOG"
-        cleanup
-        exit 1
+if [ -n "$WEBHOOK_URL" ]; then
+    TUNNEL_URL="$WEBHOOK_URL"
+    if [ -n "$CLOUDFLARE_TUNNEL_NAME" ]; then
+        start_named_tunnel
     fi
-    # Try to extract URL (format: https://xxx-xxx-xxx-xxx.trycloudflare.com)
-    TUNNEL_URL=$(grep -oE 'https://[a-zA-Z0-9-]+\.trycloudflare\.com' "$TUNNEL_LOG" 2>/dev/null | head -1)
-    if [ -n "$TUNNEL_URL" ]; then
-        break
-    fi
-    echo -n "."
-done
-echo ""
+elif ! $REUSE_TUNNEL; then
+    print_info "Starting cloudflared tunnel..."
+    start_tunnel
+fi
 
-if [ -z "$TUNNEL_URL" ]; then
-    print_error "Failed to get tunnel URL after 20 seconds"
-    echo "Tunnel log:"
-    cat "$TUNNEL_LOG"
+if ! wait_until 10 bridge_ready || ! kill -0 $BRIDGE_PID 2>/dev/null; then
+    print_error "Bridge failed to start"
     cleanup
     exit 1
 fi
+print_status "Bridge running on :$PORT"
 
-print_status "Tunnel URL: $TUNNEL_URL"
-
-# Wait for tunnel to be fully registered
-print_info "Waiting for tunnel to be fully established..."
-for i in {1..10}; do
-    if grep -q "Registered tunnel connection" "$TUNNEL_LOG" 2>/dev/null; then
-        break
+if [ -n "$WEBHOOK_URL" ]; then
+    # ============================================
+    # Stable URL: webhook is registered once, re-set only on drift
+    # ============================================
+    if ! wait_until 15 tunnel_reachable; then
+        print_warning "$WEBHOOK_URL not reachable yet (Telegram will retry delivery)"
+    fi
+    ensure_webhook || { cleanup; exit 1; }
+else
+    if $REUSE_TUNNEL && ! wait_until 5 tunnel_reachable; then
+        print_warning "Reused tunnel not reachable, starting a fresh one..."
+        kill $TUNNEL_PID 2>/dev/null
+        REUSE_TUNNEL=false
+        start_tunnel
     fi
-    sleep 1
-    echo -n "."
-done
-echo ""
-print_status "Tunnel established"
-
-# Wait for DNS propagation (cloudflare quick tunnels need time)
-print_info "Waiting for DNS propagation (10 seconds)..."
-sleep 10
 
-# ============================================
-# Set Webhook
-# ============================================
-echo -e "\n${BLUE}=== Setting Webhook ===${NC}\n"
+    if ! $REUSE_TUNNEL; then
+        print_info "Waiting for tunnel URL..."
+        wait_until 20 tunnel_url_ready || true
+        if ! kill -0 $TUNNEL_PID 2>/dev/null; then
+            print_error "Cloudflared process died"
+            cat "$TUNNEL_LOG"
+            cleanup
+            exit 1
+        fi
+        if [ -z "$TUNNEL_URL" ]; then
+            print_error "Failed to get tunnel URL after 20 seconds"
+            echo "Tunnel log:"
+            cat "$TUNNEL_LOG"
+            cleanup
+            exit 1
+        fi
+        print_status "Tunnel URL: $TUNNEL_URL"
 
-# Retry webhook setup (DNS may take a moment to propagate)
-for attempt in {1..5}; do
-    print_info "Setting webhook (attempt $attempt)..."
+        # Quick tunnels need DNS propagation; poll the public URL instead of sleeping
+        print_info "Waiting for tunnel to become reachable..."
+        if wait_until 30 tunnel_reachable; then
+            print_status "Tunnel established"
+        else
+            print_warning "Tunnel not reachable yet, setting webhook anyway"
+        fi
 
-    WEBHOOK_RESULT=$(curl -s "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/setWebhook?url=${TUNNEL_URL}")
+        # ============================================
+        # Set Webhook
+        # ============================================
+        echo -e "\n${BLUE}=== Setting Webhook ===${NC}\n"
 
-    if echo "$WEBHOOK_RESULT" | jq -e '.ok == true' >/dev/null 2>&1; then
-        print_status "Webhook set successfully"
-        break
+        set_webhook || { cleanup; exit 1; }
+        echo "$TUNNEL_PID $TUNNEL_URL" > "$TUNNEL_STATE_FILE"
     else
-        if [ $attempt -lt 5 ]; then
-            print_warning "Webhook failed, retrying in 5 seconds..."
-            sleep 5
-        else
-            print_error "Failed to set webhook after 5 attempts"
-            echo "$WEBHOOK_RESULT" | jq .
-            cleanup
-            exit 1
-        fi
+        print_status "Tunnel URL: $TUNNEL_URL (webhook already registered)"
     fi
-done
+fi
 
 # ============================================
 # Running
@@ -907,4 +1039,4 @@ echo -e "    ${GREEN}./scripts/start.sh --view${NC}    View Claude output"
 echo -e "    ${RED}Ctrl+C${NC}              Stop bridge"
 echo ""
 
-wait
+wait_for_bridge
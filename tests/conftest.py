@@ -2,9 +2,10 @@
 
 import json
 import os
+import socket
 import time
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -26,6 +27,19 @@ def tmp_claude_dir(tmp_path, monkeypatch):
     monkeypatch.setattr(bridge, "CURRENT_SESSION_FILE", str(claude_dir / "current_session_id"))
     monkeypatch.setattr(bridge, "SYNC_DISABLED_FILE", str(claude_dir / "telegram_sync_disabled"))
     monkeypatch.setattr(bridge, "SYNC_PAUSED_FILE", str(claude_dir / "telegram_sync_paused"))
+    monkeypatch.setattr(bridge, "UPDATE_STATE_FILE", str(claude_dir / "telegram_update_state.json"))
+    monkeypatch.setattr(bridge, "SEARCH_INDEX_FILE", str(claude_dir / "telegram_search.db"))
+    monkeypatch.setattr(bridge, "_search_index", bridge.SearchIndex())
+    monkeypatch.setattr(bridge, "LOG_DIR", str(claude_dir / "logs"))
+    monkeypatch.setattr(bridge, "USAGE_ROLLUP_FILE", str(claude_dir / "telegram_usage_rollup.bin"))
+    monkeypatch.setattr(bridge, "GROUP_PROJECT_MAP_FILE", str(claude_dir / "group_project_map.json"))
+    monkeypatch.setattr(bridge, "PERMISSION_SOCKET_FILE", str(claude_dir / "telegram_permission.sock"))
+    monkeypatch.setattr(bridge, "SPOOL_DIR", str(claude_dir / "telegram_spool"))
+    monkeypatch.setattr(bridge, "PERF_BASELINE_FILE", str(claude_dir / "telegram_perf_baseline.json"))
+    monkeypatch.setattr(bridge, "_outbound_spool", bridge.OutboundSpool(str(claude_dir / "telegram_spool")))
+    monkeypatch.setattr(bridge, "_api_breaker", bridge.ApiBreaker())
+    monkeypatch.setattr(bridge, "_inbound_limiter", bridge.InboundLimiter(bridge.INPUT_RATE_PER_MIN, bridge.INPUT_BURST))
+    monkeypatch.setattr(bridge, "_input_queue", bridge.InputQueue(bridge.INPUT_QUEUE_MAX))
 
     # Patch Path.home() so functions using Path.home() / ".claude" / "projects" hit our temp dir
     monkeypatch.setattr(Path, "home", staticmethod(lambda: tmp_path))
@@ -69,7 +83,7 @@ def mock_telegram_api(monkeypatch):
 
     calls = []
 
-    def _fake_api(method, data):
+    def _fake_api(method, data, spool=True):
         calls.append({"method": method, "data": data})
         return {"ok": True, "result": True}
 
@@ -88,6 +102,7 @@ def mock_tmux(monkeypatch):
         "cwd": "/Users/test/project",
         "title": None,
         "calls": [],
+        "stdin": [],
     }
 
     original_run = sp.run
@@ -99,6 +114,8 @@ def mock_tmux(monkeypatch):
             return original_run(cmd, *args, **kwargs)
 
         subcmd = cmd[1] if len(cmd) > 1 else ""
+        if "input" in kwargs:
+            state["stdin"].append(kwargs["input"])
 
         if subcmd == "has-session":
             rc = 0 if state["exists"] else 1
@@ -124,3 +141,24 @@ def mock_tmux(monkeypatch):
 
     monkeypatch.setattr(sp, "run", _fake_run)
     return state
+
+
+@pytest.fixture
+def handler():
+    """A Handler built without a socket, its reply methods mocked."""
+    import bridge
+
+    h = bridge.Handler.__new__(bridge.Handler)
+    h.reply = MagicMock()
+    h.reply_keyboard = MagicMock()
+    h.edit_keyboard = MagicMock()
+    return h
+
+
+@pytest.fixture
+def closed_port_url():
+    """URL of a local port nothing listens on, so connections are refused."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
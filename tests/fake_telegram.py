@@ -0,0 +1,220 @@
+"""Local fake Telegram Bot API server for hermetic end-to-end tests and benchmarks.
+
+Point the bridge and hooks at it with TELEGRAM_API_BASE=http://127.0.0.1:<port>.
+Supports configurable latency, 429 injection and request recording.
+
+    python tests/fake_telegram.py --port 8081 --latency-ms 50
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+_PATH_RE = re.compile(r"^/bot(?P<token>[^/]+)/(?P<method>\w+)$")
+
+
+class FakeTelegram:
+    """In-process Bot API stand-in.
+
+    Recorded calls are dicts: {"method", "token", "data", "time"}.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.requests: list[dict[str, Any]] = []
+        self.webhook_url = ""
+        self._lock = threading.Lock()
+        self._updates: list[dict[str, Any]] = []
+        self._updates_cond = threading.Condition(self._lock)
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._fail_429: dict[str, list[int]] = {}  # method -> [remaining, retry_after]
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeTelegram":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeTelegram":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- Test controls ---
+
+    def inject_429(self, method: str, count: int = 1, retry_after: int = 1) -> None:
+        """Answer the next `count` calls to `method` with 429 Too Many Requests."""
+        with self._lock:
+            self._fail_429[method] = [count, retry_after]
+
+    def queue_update(self, update: dict[str, Any]) -> int:
+        """Queue an update for getUpdates; assigns update_id if missing."""
+        with self._updates_cond:
+            update = dict(update)
+            update.setdefault("update_id", self._next_update_id)
+            self._next_update_id = max(self._next_update_id, update["update_id"]) + 1
+            self._updates.append(update)
+            self._updates_cond.notify_all()
+            return update["update_id"]
+
+    def calls(self, method: str | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            return [r for r in self.requests if method is None or r["method"] == method]
+
+    def wait_for(self, method: str, count: int = 1, timeout: float = 5.0) -> list[dict[str, Any]]:
+        """Block until `count` calls to `method` were recorded."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            found = self.calls(method)
+            if len(found) >= count:
+                return found
+            time.sleep(0.01)
+        raise TimeoutError(f"{method}: expected {count} call(s), got {len(self.calls(method))}")
+
+    # --- API ---
+
+    def _dispatch(self, method: str, data: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        with self._lock:
+            fail = self._fail_429.get(method)
+            if fail and fail[0] > 0:
+                fail[0] -= 1
+                return 429, {"ok": False, "error_code": 429,
+                             "description": f"Too Many Requests: retry after {fail[1]}",
+                             "parameters": {"retry_after": fail[1]}}
+
+        if method in ("sendMessage", "editMessageText", "sendDocument"):
+            with self._lock:
+                message_id = data.get("message_id") or self._next_message_id
+                if method != "editMessageText":
+                    self._next_message_id += 1
+            return 200, {"ok": True, "result": {
+                "message_id": int(message_id), "date": int(time.time()),
+                "chat": {"id": _maybe_int(data.get("chat_id"))}, "text": data.get("text", ""),
+            }}
+        if method in ("answerCallbackQuery", "sendChatAction", "editMessageReplyMarkup",
+                      "setMyCommands", "deleteWebhook"):
+            return 200, {"ok": True, "result": True}
+        if method == "setWebhook":
+            self.webhook_url = data.get("url", "")
+            return 200, {"ok": True, "result": True, "description": "Webhook was set"}
+        if method == "getWebhookInfo":
+            return 200, {"ok": True, "result": {"url": self.webhook_url, "pending_update_count": 0}}
+        if method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "username": "fake_bot"}}
+        if method == "getUpdates":
+            return 200, {"ok": True, "result": self._get_updates(data)}
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    def _get_updates(self, data: dict[str, Any]) -> list[dict[str, Any]]:
+        offset = int(data.get("offset", 0) or 0)
+        timeout = min(float(data.get("timeout", 0) or 0), 30.0)
+        deadline = time.monotonic() + timeout
+        with self._updates_cond:
+            # Confirming an offset drops earlier updates, as the real API does
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+            while not self._updates and time.monotonic() < deadline:
+                self._updates_cond.wait(deadline - time.monotonic())
+            return list(self._updates[:int(data.get("limit", 100) or 100)])
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                parsed = urllib.parse.urlparse(self.path)
+                match = _PATH_RE.match(parsed.path)
+                if not match:
+                    self._send(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+                    return
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+                data = _parse_body(self.headers.get("Content-Type", ""), body)
+                data.update({k: v[-1] for k, v in urllib.parse.parse_qs(parsed.query).items()})
+                method = match.group("method")
+                with fake._lock:
+                    fake.requests.append({"method": method, "token": match.group("token"),
+                                          "data": data, "time": time.time()})
+                if fake.latency:
+                    time.sleep(fake.latency)
+                try:
+                    self._send(*fake._dispatch(method, data))
+                except ConnectionError:
+                    pass  # the client gave up waiting (timeout tests)
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        return Handler
+
+
+def _maybe_int(value: Any) -> Any:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _parse_body(content_type: str, body: bytes) -> dict[str, Any]:
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        try:
+            data = json.loads(body)
+            return data if isinstance(data, dict) else {}
+        except ValueError:
+            return {}
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        return {k: v[-1] for k, v in urllib.parse.parse_qs(body.decode()).items()}
+    if content_type.startswith("multipart/form-data"):
+        # Documents: record plain fields and the upload size, not the bytes
+        data: dict[str, Any] = {"_bytes": len(body)}
+        for name, value in re.findall(rb'name="([^"]+)"\r\n\r\n(.*?)\r\n--', body, re.S):
+            data[name.decode()] = value.decode(errors="replace")
+        return data
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    fake = FakeTelegram(args.host, args.port, latency=args.latency_ms / 1000)
+    print(f"Fake Telegram on {fake.base_url} (export TELEGRAM_API_BASE={fake.base_url})")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Cold-start benchmark for the Telegram hooks.
+
+Claude Code starts a fresh process for every hook event, so what matters is
+wall time from exec to exit. Each scenario runs the real hooks/*.sh wrapper
+against a throwaway HOME and the fake Bot API. Bare interpreter start
+(python3 -S -c pass) is measured alongside; the budget applies to the median
+overhead above it.
+
+    python tests/hookbench.py --runs 20
+    python tests/hookbench.py --budget-ms 40 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+PROJECT_DIR = Path(__file__).parent.parent
+HOOKS_DIR = PROJECT_DIR / "hooks"
+
+# Median overhead over bare interpreter start, per event (importing http.client is ~45 ms of it)
+DEFAULT_BUDGET_MS = 100.0
+
+# name -> (hook script, stdin, state files to create under ~/.claude)
+SCENARIOS: dict[str, tuple[str, dict[str, Any], dict[str, str]]] = {
+    "paused": ("send-input-to-telegram.sh", {"prompt": "hello"}, {"telegram_sync_paused": ""}),
+    "input": ("send-input-to-telegram.sh", {"prompt": "hello"}, {}),
+    "permission": ("handle-permission.sh", {"tool_name": "Bash", "tool_input": {"command": "ls"}}, {}),
+    "askq": ("handle-permission.sh", {"tool_name": "AskUserQuestion", "tool_input": {"questions": [
+        {"question": "Pick", "options": [{"label": "A"}, {"label": "B"}]}]}}, {}),
+}
+
+
+def _time_ms(cmd: list[str], stdin: bytes, env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, input=stdin, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return (time.perf_counter() - start) * 1000
+
+
+def _home(workdir: str, name: str, files: dict[str, str]) -> str:
+    claude = Path(workdir) / name / ".claude"
+    claude.mkdir(parents=True)
+    (claude / "telegram_chat_id").write_text("42")
+    for fname, content in files.items():
+        (claude / fname).write_text(content)
+    return str(claude.parent)
+
+
+def run_bench(api_base: str, runs: int = 10, scenarios: list[str] | None = None) -> dict[str, Any]:
+    """Median/p95 wall time per scenario and for the bare interpreter, in ms."""
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="hookbench-") as workdir:
+        base_env = {**os.environ, "TELEGRAM_BOT_TOKEN": "0:BENCH", "TELEGRAM_API_BASE": api_base}
+        samples = [_time_ms(["python3", "-S", "-c", "pass"], b"", base_env) for _ in range(runs)]
+        floor = statistics.median(samples)
+        results["floor"] = {"p50_ms": round(floor, 1), "p95_ms": round(max(samples), 1)}
+        for name in scenarios or list(SCENARIOS):
+            script, stdin, files = SCENARIOS[name]
+            env = {**base_env, "HOME": _home(workdir, name, files)}
+            cmd = ["bash", str(HOOKS_DIR / script)]
+            payload = json.dumps(stdin).encode()
+            _time_ms(cmd, payload, env)  # warm the page cache, not the interpreter
+            samples = sorted(_time_ms(cmd, payload, env) for _ in range(runs))
+            p50 = statistics.median(samples)
+            results[name] = {
+                "p50_ms": round(p50, 1),
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+                "overhead_ms": round(p50 - floor, 1),
+            }
+    return results
+
+
+def over_budget(results: dict[str, Any], budget_ms: float) -> list[str]:
+    return [name for name, r in results.items() if r.get("overhead_ms", 0) > budget_ms]
+
+
+def format_results(results: dict[str, Any], budget_ms: float) -> str:
+    lines = [f"{'event':<12}{'p50 ms':>9}{'p95 ms':>9}{'over floor':>12}   budget {budget_ms:.0f} ms"]
+    for name, r in results.items():
+        overhead = r.get("overhead_ms")
+        mark = "" if overhead is None else ("  OVER" if overhead > budget_ms else "  ok")
+        lines.append(f"{name:<12}{r['p50_ms']:>9}{r['p95_ms']:>9}{'' if overhead is None else overhead:>12}{mark}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    from fake_telegram import FakeTelegram
+    with FakeTelegram() as fake:
+        results = run_bench(fake.base_url, args.runs, args.scenario)
+
+    print(json.dumps(results, indent=2) if args.json else format_results(results, args.budget_ms))
+    return 1 if over_budget(results, args.budget_ms) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
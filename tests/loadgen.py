@@ -0,0 +1,270 @@
+"""Webhook load generator: replay recorded or synthetic updates against a bridge.
+
+Reports throughput, p50/p95/p99 latency per command, and error/retry counts.
+
+    # Against a running bridge (record real traffic with UPDATE_RECORD_FILE=...)
+    python tests/loadgen.py --bridge http://127.0.0.1:8080 --replay updates.jsonl
+    # Fully offline: spawns fake Telegram + fake tmux + a bridge subprocess
+    python tests/loadgen.py --spawn --synthetic 500 --rate 100 --concurrency 16
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+PROJECT_DIR = Path(__file__).parent.parent
+FAKE_BIN = Path(__file__).parent / "fake_bin"
+
+# Synthetic traffic mix: kind -> weight
+SYNTHETIC_MIX = {"text": 70, "/status": 15, "/resume": 10, "callback": 5}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def classify(update: dict[str, Any]) -> str:
+    """Label an update by command for per-command stats."""
+    if "callback_query" in update:
+        data = update["callback_query"].get("data", "")
+        return "cb:" + data.split(":", 1)[0]
+    text = update.get("message", {}).get("text", "")
+    if text.startswith("/"):
+        return text.split()[0].lower()
+    return "text"
+
+
+def synthetic_updates(count: int, chats: int = 4, seed: int = 0,
+                      mix: dict[str, int] | None = None) -> list[dict[str, Any]]:
+    """Build a reproducible stream of messages, commands and callbacks."""
+    mix = mix or SYNTHETIC_MIX
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    updates = []
+    for i, kind in enumerate(kinds):
+        chat = {"id": 1000 + rng.randrange(chats)}
+        if kind == "callback":
+            updates.append({"callback_query": {"id": str(i), "data": "rpage:8",
+                                               "message": {"chat": chat, "message_id": i}}})
+        else:
+            text = f"load test message {i}" if kind == "text" else kind
+            updates.append({"message": {"message_id": i, "chat": chat, "text": text}})
+    return updates
+
+
+def load_recording(path: str) -> list[tuple[float, dict[str, Any]]]:
+    """Read an UPDATE_RECORD_FILE: [(seconds since first update, update)]."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                records.append((float(rec["t"]), rec["update"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    if not records:
+        return []
+    t0 = records[0][0]
+    return [(t - t0, u) for t, u in records]
+
+
+def schedule(updates: list[dict[str, Any]], rate: float) -> list[tuple[float, dict[str, Any]]]:
+    return [(i / rate if rate > 0 else 0.0, u) for i, u in enumerate(updates)]
+
+
+class LoadReport:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.retries = 0
+        self.duration = 0.0
+
+    def add(self, command: str, latency: float | None, retries: int) -> None:
+        with self._lock:
+            self.retries += retries
+            if latency is None:
+                self.errors[command] = self.errors.get(command, 0) + 1
+            else:
+                self.latencies.setdefault(command, []).append(latency)
+
+    def summary(self) -> dict[str, Any]:
+        commands = sorted(set(self.latencies) | set(self.errors))
+        total = sum(len(v) for v in self.latencies.values()) + sum(self.errors.values())
+        per_command = {}
+        for cmd in commands:
+            lat = self.latencies.get(cmd, [])
+            per_command[cmd] = {
+                "count": len(lat) + self.errors.get(cmd, 0),
+                "p50_ms": round(percentile(lat, 50) * 1000, 2),
+                "p95_ms": round(percentile(lat, 95) * 1000, 2),
+                "p99_ms": round(percentile(lat, 99) * 1000, 2),
+                "errors": self.errors.get(cmd, 0),
+            }
+        return {
+            "requests": total,
+            "duration_s": round(self.duration, 3),
+            "throughput_rps": round(total / self.duration, 1) if self.duration else 0.0,
+            "errors": sum(self.errors.values()),
+            "retries": self.retries,
+            "commands": per_command,
+        }
+
+    def format(self) -> str:
+        s = self.summary()
+        lines = [f"Requests: {s['requests']} in {s['duration_s']}s ({s['throughput_rps']} req/s), "
+                 f"errors {s['errors']}, retries {s['retries']}",
+                 f"{'command':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"]
+        for cmd, c in s["commands"].items():
+            lines.append(f"{cmd:<14}{c['count']:>7}{c['p50_ms']:>10}{c['p95_ms']:>10}{c['p99_ms']:>10}{c['errors']:>8}")
+        return "\n".join(lines)
+
+
+def _post(url: str, update: dict[str, Any], timeout: float) -> None:
+    req = urllib.request.Request(url, json.dumps(update).encode(), {"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        r.read()
+
+
+def run_load(bridge_url: str, jobs: list[tuple[float, dict[str, Any]]], concurrency: int = 8,
+             timeout: float = 30.0, retries: int = 1, fresh_ids: bool = True) -> LoadReport:
+    """Send each update at its scheduled offset; latency is measured per POST."""
+    report = LoadReport()
+    base_id = random.randrange(1 << 30, 1 << 40) if fresh_ids else 0
+
+    def send(index: int, due: float, update: dict[str, Any]) -> None:
+        if fresh_ids or "update_id" not in update:
+            # Fresh ids so the bridge's duplicate filter doesn't drop replays
+            update = {**update, "update_id": base_id + index}
+        delay = start + due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        attempts = 0
+        while True:
+            t0 = time.monotonic()
+            try:
+                _post(bridge_url, update, timeout)
+                report.add(classify(update), time.monotonic() - t0, attempts)
+                return
+            except (urllib.error.URLError, OSError):
+                if attempts >= retries:
+                    report.add(classify(update), None, attempts)
+                    return
+                attempts += 1
+                time.sleep(0.05 * attempts)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, (due, update) in enumerate(jobs):
+            pool.submit(send, i, due, update)
+    report.duration = time.monotonic() - start
+    return report
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_bridge(api_base: str, workdir: str, tmux_delay: float = 0.0) -> tuple[subprocess.Popen, str]:
+    """Start bridge.py with a throwaway HOME, fake tmux and the given Bot API base."""
+    home = Path(workdir) / "home"
+    (home / ".claude" / "projects").mkdir(parents=True, exist_ok=True)
+    port = _free_port()
+    env = {
+        **os.environ,
+        "HOME": str(home),
+        "PATH": f"{FAKE_BIN}{os.pathsep}{os.environ.get('PATH', '')}",
+        "PORT": str(port),
+        "TELEGRAM_BOT_TOKEN": "0:LOADGEN",
+        "TELEGRAM_API_BASE": api_base,
+        "FAKE_TMUX_LOG": str(Path(workdir) / "tmux.log"),
+    }
+    if tmux_delay:
+        env["FAKE_TMUX_DELAY"] = str(tmux_delay)
+    proc = subprocess.Popen([sys.executable, str(PROJECT_DIR / "bridge.py")], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/"
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return proc, url
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("bridge did not start")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--bridge", help="URL of a running bridge")
+    target.add_argument("--spawn", action="store_true", help="run fake Telegram + fake tmux + bridge")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--replay", metavar="FILE", help="UPDATE_RECORD_FILE recording to replay")
+    source.add_argument("--synthetic", type=int, default=200, metavar="N", help="synthetic updates (default 200)")
+    parser.add_argument("--rate", type=float, default=50.0, help="updates/s; 0 = as fast as possible")
+    parser.add_argument("--speed", type=float, default=0.0, help="replay at recorded timing x SPEED instead of --rate")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--chats", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="fake Telegram latency (--spawn)")
+    parser.add_argument("--tmux-delay-ms", type=float, default=0.0, help="fake tmux latency (--spawn)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        recorded = load_recording(args.replay)
+        if args.speed > 0:
+            jobs = [(t / args.speed, u) for t, u in recorded]
+        else:
+            jobs = schedule([u for _, u in recorded], args.rate)
+    else:
+        jobs = schedule(synthetic_updates(args.synthetic, args.chats, args.seed), args.rate)
+
+    fake = proc = None
+    try:
+        if args.spawn:
+            sys.path.insert(0, str(Path(__file__).parent))
+            from fake_telegram import FakeTelegram
+            fake = FakeTelegram(latency=args.api_latency_ms / 1000).start()
+            workdir = tempfile.mkdtemp(prefix="loadgen-")
+            proc, bridge_url = spawn_bridge(fake.base_url, workdir, args.tmux_delay_ms / 1000)
+        else:
+            bridge_url = args.bridge
+        report = run_load(bridge_url, jobs, args.concurrency, retries=args.retries)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=5)
+        if fake:
+            fake.stop()
+
+    print(json.dumps(report.summary(), indent=2) if args.json else report.format())
+    return 1 if report.summary()["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
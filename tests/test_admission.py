@@ -0,0 +1,129 @@
+"""Tests for inbound admission control: rate limits, the busy queue and load shedding."""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+import bridge
+
+
+def _update(text, chat_id=123):
+    return {"message": {"text": text, "chat": {"id": chat_id}, "message_id": 1}}
+
+
+@pytest.fixture
+def handler(handler, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+    fake_session_files("-proj", [("sess-active", 5)])
+    return handler
+
+
+def _busy():
+    Path(bridge.PENDING_FILE).write_text("0")
+
+
+def _typed(mock_tmux, text):
+    return [c for c in mock_tmux["calls"] if text in c]
+
+
+class TestInboundLimiter:
+    def test_burst_then_refill(self):
+        limiter = bridge.InboundLimiter(rate_per_min=60, burst=3)
+        assert [limiter.allow(1, now=0) for _ in range(4)] == [True, True, True, False]
+        assert limiter.allow(2, now=0)  # other chats have their own bucket
+        assert not limiter.allow(1, now=0.5)
+        assert limiter.allow(1, now=1.5)
+
+    def test_rate_zero_is_off(self):
+        limiter = bridge.InboundLimiter(rate_per_min=0, burst=1)
+        assert all(limiter.allow(1, now=0) for _ in range(100))
+
+
+class TestInputQueue:
+    def test_bounded_with_positions(self):
+        queue = bridge.InputQueue(max_depth=2)
+        assert queue.submit("s", 1, "a") == 1
+        assert queue.submit("s", 1, "b") == 2
+        assert queue.submit("s", 1, "c") is None
+        assert queue.submit("t", 1, "d") == 1
+        assert queue.depth("s") == 2 and queue.depth() == 3
+
+    def test_batches_one_chat_in_arrival_order(self):
+        queue = bridge.InputQueue(max_depth=10)
+        queue.submit("s", 1, "a")
+        queue.submit("t", 2, "x")
+        queue.submit("s", 1, "b")
+        queue.submit("s", 3, "c")
+        queue.submit("s", 1, "d")
+        assert queue.pop_batch() == ("s", 1, "a\n\nb")
+        assert queue.pop_batch() == ("t", 2, "x")
+        assert queue.pop_batch() == ("s", 3, "c")
+        assert queue.pop_batch() == ("s", 1, "d")
+        assert queue.pop_batch() is None
+
+    def test_drop_chat(self):
+        queue = bridge.InputQueue(max_depth=10)
+        for chat in (1, 2, 1):
+            queue.submit("s", chat, "m")
+        assert queue.drop_chat(1) == 2
+        assert queue.pop_batch() == ("s", 2, "m")
+
+
+class TestAdmission:
+    def test_idle_claude_gets_message_directly(self, handler, mock_tmux):
+        handler.handle_message(_update("hello"))
+        assert _typed(mock_tmux, "hello")
+        assert bridge._input_queue.depth() == 0
+
+    def test_busy_claude_queues_and_delivers_later(self, handler, mock_tmux, monkeypatch):
+        _busy()
+        handler.handle_message(_update("first"))
+        handler.handle_message(_update("second"))
+        assert not _typed(mock_tmux, "first")
+        assert [c[0][1] for c in handler.reply.call_args_list] == ["⏳ Busy, queued 1", "⏳ Busy, queued 2"]
+        assert bridge._input_queue.depth("sess-active") == 2
+
+        monkeypatch.setattr(bridge, "_start_typing", MagicMock())
+        bridge.deliver_input(*bridge._input_queue.pop_batch())
+        assert mock_tmux["stdin"] == [b"first\n\nsecond"]
+        bridge._start_typing.assert_called_once_with(123)
+
+    def test_full_queue_drops_with_notice(self, handler, monkeypatch):
+        monkeypatch.setattr(bridge, "_input_queue", bridge.InputQueue(max_depth=1))
+        _busy()
+        handler.handle_message(_update("a"))
+        handler.handle_message(_update("b"))
+        assert "queue full" in handler.reply.call_args[0][1]
+        assert bridge.get_metrics().get("input_rejected")
+
+    def test_flood_is_throttled_with_one_notice(self, handler, mock_tmux, monkeypatch):
+        monkeypatch.setattr(bridge, "_inbound_limiter", bridge.InboundLimiter(rate_per_min=1, burst=2))
+        monkeypatch.setattr(bridge, "_start_typing", MagicMock())  # Claude stays idle
+        for i in range(5):
+            handler.handle_message(_update(f"msg{i}"))
+        assert _typed(mock_tmux, "msg1") and not _typed(mock_tmux, "msg2")
+        notices = [c for c in handler.reply.call_args_list if "Too many messages" in c[0][1]]
+        assert len(notices) == 1
+
+    def test_commands_bypass_the_rate_limit(self, handler, mock_tmux, monkeypatch):
+        monkeypatch.setattr(bridge, "_inbound_limiter", bridge.InboundLimiter(rate_per_min=1, burst=1))
+        handler.handle_message(_update("text"))
+        handler.handle_message(_update("/escape"))
+        assert handler.reply.call_args[0][1] == "Interrupted"
+
+    def test_expensive_commands_shed_when_deep(self, handler, monkeypatch):
+        monkeypatch.setattr(bridge, "INPUT_SHED_DEPTH", 2)
+        _busy()
+        for text in ("a", "b"):
+            handler.handle_message(_update(text))
+        handler.handle_message(_update("/report"))
+        assert "Try /report again" in handler.reply.call_args[0][1]
+        handler.handle_message(_update("/status"))
+        assert "Queued input: 2" in handler.reply.call_args[0][1]
+
+    def test_escape_drops_queued(self, handler):
+        _busy()
+        handler.handle_message(_update("a"))
+        handler.handle_message(_update("/escape"))
+        assert handler.reply.call_args[0][1] == "Interrupted, dropped 1 queued"
+        assert bridge._input_queue.depth() == 0
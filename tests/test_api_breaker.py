@@ -0,0 +1,100 @@
+"""Tests for the Bot API circuit breaker and adaptive timeouts."""
+
+import time
+
+import pytest
+
+import bridge
+from fake_telegram import FakeTelegram
+
+
+class TestApiBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = bridge.ApiBreaker(failures=3, cooldown=10)
+        for _ in range(2):
+            breaker.record("sendMessage", False, now=0)
+        breaker.record("sendMessage", True, now=0)  # a success resets the count
+        for _ in range(3):
+            assert breaker.allow("sendMessage", now=1)
+            breaker.record("sendMessage", False, now=1)
+        assert breaker.state("sendMessage") == "open"
+        assert not breaker.allow("sendMessage", now=5)
+        assert breaker.allow("answerCallbackQuery", now=5)  # per method
+
+    def test_half_open_probe(self):
+        breaker = bridge.ApiBreaker(failures=1, cooldown=10)
+        breaker.record("m", False, now=0)
+        assert breaker.allow("m", now=10)
+        assert breaker.state("m") == "half-open"
+        assert not breaker.allow("m", now=10)  # one probe at a time
+        breaker.record("m", False, now=11)
+        assert breaker.state("m") == "open" and not breaker.allow("m", now=15)
+        assert breaker.allow("m", now=21)
+        breaker.record("m", True, now=21)
+        assert breaker.state("m") == "closed" and breaker.open_methods() == []
+
+    def test_timeout_follows_p95(self):
+        breaker = bridge.ApiBreaker()
+        assert breaker.timeout("m") == bridge.API_TIMEOUT_MAX
+        for _ in range(40):
+            breaker.record("m", True, 1.0)
+        assert breaker.timeout("m") == pytest.approx(3.0)
+        for _ in range(50):
+            breaker.record("m", True, 0.01)
+        assert breaker.timeout("m") == bridge.API_TIMEOUT_MIN
+        for _ in range(50):
+            breaker.record("m", True, 9.0)
+        assert breaker.timeout("m") == bridge.API_TIMEOUT_MAX
+
+    def test_probe_gets_full_timeout(self):
+        breaker = bridge.ApiBreaker(failures=1, cooldown=0)
+        for _ in range(20):
+            breaker.record("m", True, 0.01)
+        breaker.record("m", False, now=0)
+        assert breaker.allow("m", now=1)
+        assert breaker.timeout("m") == bridge.API_TIMEOUT_MAX
+
+
+class TestTelegramApi:
+    @pytest.fixture
+    def api(self, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "1:T")
+        return monkeypatch
+
+    def test_open_circuit_fails_fast_and_spools(self, api, closed_port_url):
+        api.setattr(bridge, "TELEGRAM_API_BASE", closed_port_url)
+        for _ in range(bridge.BREAKER_FAILURES):
+            bridge.telegram_api("answerCallbackQuery", {"callback_query_id": "1"})
+        assert bridge._api_breaker.state("answerCallbackQuery") == "open"
+        with FakeTelegram() as fake:
+            api.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+            assert bridge.telegram_api("answerCallbackQuery", {"callback_query_id": "2"}) is None
+            assert bridge.telegram_api("sendChatAction", {"chat_id": 5, "action": "typing"})["ok"]
+            assert fake.calls("answerCallbackQuery") == []
+        assert "api_fast_fails" in bridge.get_metrics()
+
+    def test_deferred_message_is_spooled(self, api):
+        for _ in range(bridge.BREAKER_FAILURES):
+            bridge._api_breaker.record("sendMessage", False)
+        assert bridge.telegram_api("sendMessage", {"chat_id": 5, "text": "later"}) is None
+        assert bridge._outbound_spool.count() == 1
+
+    def test_slow_api_times_out_at_adaptive_timeout(self, api):
+        api.setattr(bridge, "API_TIMEOUT_MIN", 0.05)
+        for _ in range(bridge.API_LATENCY_MIN_SAMPLES):
+            bridge._api_breaker.record("getMe", True, 0.01)
+        with FakeTelegram(latency=0.5) as fake:
+            api.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+            start = time.monotonic()
+            assert bridge.telegram_api("getMe", {}) is None
+            assert time.monotonic() - start < 0.4
+        # The timed-out call counts as a (censored) latency sample, pushing the timeout up
+        assert bridge._api_breaker.failures["getMe"] == 1
+        assert len(bridge._api_breaker.latencies["getMe"]) == bridge.API_LATENCY_MIN_SAMPLES + 1
+
+    def test_client_errors_do_not_open_circuit(self, api):
+        with FakeTelegram() as fake:
+            api.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+            for _ in range(bridge.BREAKER_FAILURES + 1):
+                bridge.telegram_api("noSuchMethod", {})
+        assert bridge._api_breaker.state("noSuchMethod") == "closed"
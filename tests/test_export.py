@@ -0,0 +1,109 @@
+"""Tests for /export: streamed transcript rendering and document upload."""
+
+import gzip
+import io
+import json
+import os
+from unittest.mock import MagicMock
+
+import bridge
+
+
+def _write_session(tmp_claude_dir, project, session_id, messages):
+    proj = tmp_claude_dir / "projects" / project
+    proj.mkdir(parents=True, exist_ok=True)
+    path = proj / f"{session_id}.jsonl"
+    lines = []
+    for role, text in messages:
+        content = text if role == "user" else [{"type": "text", "text": text}]
+        lines.append(json.dumps({
+            "type": role, "timestamp": "2026-02-11T10:00:00.000Z",
+            "message": {"content": content},
+        }))
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+class TestRenderTranscript:
+    def test_markdown_sections(self, tmp_claude_dir):
+        path = _write_session(tmp_claude_dir, "-p", "s1", [("user", "hi"), ("assistant", "hello")])
+        out = io.StringIO()
+        assert bridge.render_transcript_markdown(path, out) == 2
+        md = out.getvalue()
+        assert md.startswith("# Claude session s1")
+        assert "## 🧑 You · 2026-02-11 10:00:00\n\nhi" in md
+        assert "## 🤖 Claude" in md and "hello" in md
+
+
+class TestExportSession:
+    def test_small_export_plain(self, tmp_claude_dir, tmp_path):
+        path = _write_session(tmp_claude_dir, "-p", "s1", [("user", "hi")])
+        out, name, count = bridge.export_session(path, str(tmp_path))
+        assert name == "s1.md" and count == 1
+        assert "hi" in open(out).read()
+
+    def test_large_export_gzipped(self, tmp_claude_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr(bridge, "EXPORT_COMPRESS_BYTES", 10)
+        path = _write_session(tmp_claude_dir, "-p", "s1", [("user", "x" * 500)])
+        out, name, _ = bridge.export_session(path, str(tmp_path))
+        assert name == "s1.md.gz"
+        with gzip.open(out, "rt") as f:
+            assert "x" * 500 in f.read()
+        assert not os.path.exists(os.path.join(tmp_path, "s1.md"))
+
+
+class TestFindSessionFile:
+    def test_exact_and_prefix(self, tmp_claude_dir, fake_session_files):
+        fake_session_files("-p", [("abcd1234-ef", 5), ("ffff0000-aa", 5)])
+        assert bridge.find_session_file("abcd1234-ef").stem == "abcd1234-ef"
+        assert bridge.find_session_file("ffff").stem == "ffff0000-aa"
+        assert bridge.find_session_file("zzz") is None
+
+    def test_rejects_paths(self, tmp_claude_dir):
+        assert bridge.find_session_file("../etc") is None
+
+
+class TestSendDocument:
+    def test_streams_body_with_exact_length(self, tmp_path, monkeypatch):
+        doc = tmp_path / "f.md"
+        doc.write_bytes(b"y" * (bridge.STREAM_CHUNK_BYTES * 2 + 7))
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "t")
+        seen = {}
+
+        def _fake_urlopen(req, timeout):
+            chunks = list(req.data)
+            seen["chunks"] = len(chunks)
+            seen["body"] = b"".join(chunks)
+            seen["length"] = int(req.get_header("Content-length"))
+            resp = MagicMock()
+            resp.__enter__.return_value.read.return_value = b'{"ok": true}'
+            return resp
+
+        monkeypatch.setattr(bridge.urllib.request, "urlopen", _fake_urlopen)
+        assert bridge.telegram_send_document(1, str(doc), "f.md", "cap") == {"ok": True}
+        assert seen["length"] == len(seen["body"])
+        assert seen["chunks"] > 3
+        assert b'filename="f.md"' in seen["body"] and b"cap" in seen["body"]
+
+
+class TestExportCommand:
+    def test_unknown_session(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api):
+        handler.handle_message({"message": {"text": "/export nope", "chat": {"id": 1}}})
+        assert "not found" in handler.reply.call_args[0][1]
+
+    def test_worker_uploads(self, handler, tmp_claude_dir, monkeypatch):
+        path = _write_session(tmp_claude_dir, "-p", "s1", [("user", "hi")])
+        uploads = []
+        monkeypatch.setattr(bridge, "telegram_send_document",
+                            lambda chat, p, name, cap: uploads.append((chat, name, cap)) or {"ok": True})
+        handler._export_worker(7, path)
+        assert uploads == [(7, "s1.md", "1 messages")]
+        handler.reply.assert_not_called()
+
+    def test_worker_rejects_oversize(self, handler, tmp_claude_dir, monkeypatch):
+        path = _write_session(tmp_claude_dir, "-p", "s1", [("user", "hi")])
+        monkeypatch.setattr(bridge, "EXPORT_MAX_UPLOAD_BYTES", 1)
+        monkeypatch.setattr(bridge, "telegram_send_document", MagicMock())
+        handler._export_worker(7, path)
+        assert "too large" in handler.reply.call_args[0][1]
+        bridge.telegram_send_document.assert_not_called()
@@ -0,0 +1,110 @@
+"""End-to-end tests over real HTTP against the local fake Bot API server."""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import bridge
+from fake_telegram import FakeTelegram
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def fake_tg(monkeypatch, tmp_claude_dir):
+    with FakeTelegram() as fake:
+        monkeypatch.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "123:TEST")
+        yield fake
+
+
+def _hook_env(home: Path, fake: FakeTelegram) -> dict[str, str]:
+    (home / ".claude").mkdir(exist_ok=True)
+    (home / ".claude" / "telegram_chat_id").write_text("42")
+    return {**os.environ, "HOME": str(home), "TELEGRAM_BOT_TOKEN": "123:TEST",
+            "TELEGRAM_API_BASE": fake.base_url}
+
+
+class TestFakeServer:
+    def test_records_bridge_calls(self, fake_tg):
+        result = bridge.telegram_api("sendMessage", {"chat_id": 7, "text": "hi"})
+        assert result["ok"] and result["result"]["message_id"] == 1
+        call = fake_tg.calls("sendMessage")[0]
+        assert call["token"] == "123:TEST"
+        assert call["data"] == {"chat_id": 7, "text": "hi"}
+
+    def test_429_injection(self, fake_tg):
+        fake_tg.inject_429("sendMessage", count=1, retry_after=3)
+        assert bridge.telegram_api("sendMessage", {"chat_id": 7, "text": "a"}) is None
+        # Chat 7's message is now spooled; another chat is sent directly
+        assert bridge.telegram_api("sendMessage", {"chat_id": 8, "text": "b"})["ok"]
+        assert len(fake_tg.calls("sendMessage")) == 2
+
+    def test_latency(self, fake_tg):
+        fake_tg.latency = 0.1
+        start = time.monotonic()
+        bridge.telegram_api("sendChatAction", {"chat_id": 7, "action": "typing"})
+        assert time.monotonic() - start >= 0.1
+
+    def test_webhook_roundtrip(self, fake_tg):
+        assert bridge.ensure_webhook("https://bot.example.com") == "set"
+        assert bridge.ensure_webhook("https://bot.example.com") == "unchanged"
+        assert len(fake_tg.calls("setWebhook")) == 1
+
+    def test_get_updates_offset_and_long_poll(self, fake_tg):
+        fake_tg.queue_update({"message": {"text": "one"}})
+        first = bridge.telegram_api("getUpdates", {"offset": 0})["result"]
+        assert [u["message"]["text"] for u in first] == ["one"]
+        threading.Timer(0.1, fake_tg.queue_update, args=({"message": {"text": "two"}},)).start()
+        second = bridge.telegram_api("getUpdates", {"offset": first[0]["update_id"] + 1, "timeout": 2})
+        assert [u["message"]["text"] for u in second["result"]] == ["two"]
+
+    def test_document_upload(self, fake_tg, tmp_path):
+        path = tmp_path / "t.md"
+        path.write_bytes(b"x" * 100_000)
+        assert bridge.telegram_send_document(7, str(path), "t.md", caption="c")["ok"]
+        data = fake_tg.calls("sendDocument")[0]["data"]
+        assert data["chat_id"] == "7" and data["caption"] == "c"
+        assert data["_bytes"] > 100_000
+
+
+class TestHooksEndToEnd:
+    def test_input_hook_posts_to_api_base(self, fake_tg, tmp_path):
+        result = subprocess.run(
+            ["bash", str(PROJECT_DIR / "hooks/send-input-to-telegram.sh")],
+            input=json.dumps({"prompt": "hello from desktop"}), capture_output=True, text=True,
+            env=_hook_env(tmp_path, fake_tg), timeout=20,
+        )
+        assert result.returncode == 0, result.stderr
+        call = fake_tg.wait_for("sendMessage")[0]
+        assert call["data"]["chat_id"] == "42"
+        assert "hello from desktop" in call["data"]["text"]
+
+    def test_permission_hook_returns_native_decision(self, fake_tg, tmp_path):
+        env = _hook_env(tmp_path, fake_tg)
+        sock_path = tmp_path / ".claude" / "telegram_permission.sock"
+        server = bridge.start_permission_server(str(sock_path))
+        try:
+            proc = subprocess.Popen(
+                ["bash", str(PROJECT_DIR / "hooks/handle-permission.sh")],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env,
+            )
+            proc.stdin.write(json.dumps({"tool_name": "Bash", "tool_input": {"command": "ls"}}))
+            proc.stdin.close()
+            call = fake_tg.wait_for("sendMessage", timeout=15)[0]
+            buttons = [row[0]["callback_data"] for row in call["data"]["reply_markup"]["inline_keyboard"]]
+            assert buttons[0].startswith("perm:") and buttons[0].endswith(":allow")
+            request_id = buttons[0].split(":")[1]
+            assert bridge._permission_broker.resolve(request_id, "deny")
+            proc.wait(timeout=15)
+            out = proc.stdout.read()
+        finally:
+            server.close()
+        decision = json.loads(out)["hookSpecificOutput"]
+        assert decision["hookEventName"] == "PermissionRequest"
+        assert decision["decision"]["behavior"] == "deny"
@@ -1,6 +1,7 @@
 """Tests for the HTTP handler in bridge.py."""
 
 import os
+import threading
 from unittest.mock import MagicMock
 
 import bridge
@@ -18,11 +19,14 @@ def _make_update(text, chat_id=123, message_id=1):
     }
 
 
-def _make_callback(data, chat_id=123):
+def _make_callback(data, chat_id=123, message_id=None):
     """Build a Telegram callback_query dict."""
+    message = {"chat": {"id": chat_id}}
+    if message_id is not None:
+        message["message_id"] = message_id
     return {
         "id": "cb1",
-        "message": {"chat": {"id": chat_id}},
+        "message": message,
         "data": data,
     }
 
@@ -32,6 +36,7 @@ def _make_handler(mock_tmux, mock_telegram_api):
     handler = bridge.Handler.__new__(bridge.Handler)
     handler.reply = MagicMock()
     handler.reply_keyboard = MagicMock()
+    handler.edit_keyboard = MagicMock()
     return handler
 
 
@@ -159,6 +164,52 @@ class TestProjectsCommand:
         assert "No projects" in msg
 
 
+def _callback_data(keyboard):
+    return [btn["callback_data"] for row in keyboard for btn in row]
+
+
+class TestPagedPickers:
+    def test_resume_first_page_has_next(self, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+        fake_session_files("-proj", [(f"s{i:02d}", i) for i in range(bridge.PAGE_SIZE + 2)])
+        handler = _make_handler(mock_tmux, mock_telegram_api)
+        _send_command(handler, "/resume")
+        data = _callback_data(handler.reply_keyboard.call_args[0][2])
+        assert f"{bridge.CB_RESUME_PAGE}{bridge.PAGE_SIZE}" in data
+        assert not any(d.startswith(bridge.CB_RESUME_PAGE + "0") for d in data)
+
+    def test_resume_next_page_edits_message(self, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+        fake_session_files("-proj", [(f"s{i:02d}", i) for i in range(bridge.PAGE_SIZE + 2)])
+        handler = _make_handler(mock_tmux, mock_telegram_api)
+        handler.handle_callback(_make_callback(f"{bridge.CB_RESUME_PAGE}{bridge.PAGE_SIZE}", message_id=77))
+        chat_id, message_id, _, kb = handler.edit_keyboard.call_args[0]
+        assert message_id == 77
+        data = _callback_data(kb)
+        assert f"{bridge.CB_RESUME}s{bridge.PAGE_SIZE:02d}" in data
+        assert f"{bridge.CB_RESUME_PAGE}0" in data
+        assert bridge.CB_CONTINUE_RECENT not in data
+
+    def test_paging_works_without_tmux(self, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+        mock_tmux["exists"] = False
+        fake_session_files("-proj-a", [("s1", 10)])
+        handler = _make_handler(mock_tmux, mock_telegram_api)
+        handler.handle_callback(_make_callback(f"{bridge.CB_PROJECTS_PAGE}0", message_id=5))
+        handler.edit_keyboard.assert_called_once()
+
+    def test_project_sessions_page(self, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+        fake_session_files("-proj-z", [(f"s{i:02d}", i) for i in range(bridge.PAGE_SIZE + 1)])
+        ph = bridge.project_hash("-proj-z")
+        handler = _make_handler(mock_tmux, mock_telegram_api)
+        handler.handle_callback(_make_callback(f"{bridge.CB_SESSIONS_PAGE}{ph}:{bridge.PAGE_SIZE}", message_id=9))
+        data = _callback_data(handler.edit_keyboard.call_args[0][3])
+        assert data == [f"{bridge.CB_RESUME}s{bridge.PAGE_SIZE:02d}", f"{bridge.CB_SESSIONS_PAGE}{ph}:0"]
+
+    def test_invalid_cursor_ignored(self, tmp_claude_dir, mock_tmux, mock_telegram_api):
+        handler = _make_handler(mock_tmux, mock_telegram_api)
+        handler.handle_callback(_make_callback(f"{bridge.CB_RESUME_PAGE}abc"))
+        handler.reply.assert_not_called()
+        handler.edit_keyboard.assert_not_called()
+
+
 class TestRegularMessage:
     def test_active_sends_to_tmux(self, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
         fake_session_files("-proj", [("sess-active", 5)])
@@ -168,6 +219,32 @@ class TestRegularMessage:
                       if len(c) > 2 and "send-keys" in c and "Hello Claude" in c]
         assert len(send_calls) > 0
 
+    def test_multiline_is_pasted(self, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+        fake_session_files("-proj", [("sess-active", 5)])
+        handler = _make_handler(mock_tmux, mock_telegram_api)
+        text = "first line\n" + "x" * 5000
+        handler.handle_message(_make_update(text))
+        assert mock_tmux["stdin"] == [text.encode()]
+        assert not [c for c in mock_tmux["calls"] if "-l" in c]
+        paste = [c for c in mock_tmux["calls"] if "paste-buffer" in c]
+        assert len(paste) == 1 and "-p" in paste[0]
+        assert mock_tmux["calls"][-1][-1] == "Enter"
+
+    def test_rapid_messages_coalesce(self, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files,
+                                     monkeypatch):
+        fake_session_files("-proj", [("sess-active", 5)])
+        delivered = []
+        coalescer = bridge.InputCoalescer(10_000, delivered.append)
+        monkeypatch.setattr(bridge, "_input_coalescer", coalescer)
+        monkeypatch.setattr(bridge, "_start_typing", MagicMock())
+        handler = _make_handler(mock_tmux, mock_telegram_api)
+        for text in ("one", "two", "three"):
+            handler.handle_message(_make_update(text))
+        assert delivered == []
+        bridge._start_typing.assert_called_once_with(123)
+        coalescer.flush(123)
+        assert delivered == ["one\n\ntwo\n\nthree"]
+
     def test_paused_rejects(self, tmp_claude_dir, mock_tmux, mock_telegram_api):
         create_sync_flag(bridge.SYNC_PAUSED_FILE)
         handler = _make_handler(mock_tmux, mock_telegram_api)
@@ -188,6 +265,30 @@ class TestRegularMessage:
         assert chat == "456"
 
 
+class TestInputCoalescer:
+    def test_window_zero_delivers_immediately(self):
+        delivered = []
+        bridge.InputCoalescer(0, delivered.append).submit(1, "hi")
+        assert delivered == ["hi"]
+
+    def test_window_elapses(self):
+        done = threading.Event()
+        delivered = []
+        coalescer = bridge.InputCoalescer(20, lambda text: (delivered.append(text), done.set()))
+        coalescer.submit(1, "a")
+        coalescer.submit(1, "b")
+        assert done.wait(2)
+        assert delivered == ["a\n\nb"] and not coalescer.holding(1)
+
+    def test_chats_are_separate(self):
+        delivered = []
+        coalescer = bridge.InputCoalescer(10_000, delivered.append)
+        coalescer.submit(1, "a")
+        coalescer.submit(2, "b")
+        coalescer.flush(2)
+        assert delivered == ["b"] and coalescer.holding(1)
+
+
 class TestAskAnswerCallback:
     """Tests for AskUserQuestion callback handling (askq: prefix)."""
 
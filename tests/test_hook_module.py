@@ -0,0 +1,141 @@
+"""Tests for hooks/lib/telegram_hook.py and its cold-start budget."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import telegram_hook
+from fake_telegram import FakeTelegram
+from hookbench import DEFAULT_BUDGET_MS, over_budget, run_bench
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def hook_home(tmp_path, monkeypatch):
+    claude = tmp_path / ".claude"
+    claude.mkdir()
+    for name in ("CHAT_ID_FILE", "PENDING_FILE", "SESSION_CHAT_MAP_FILE", "GROUP_PROJECT_MAP_FILE",
+                 "CURRENT_SESSION_FILE", "SYNC_DISABLED_FILE", "SYNC_PAUSED_FILE"):
+        monkeypatch.setattr(telegram_hook, name, str(claude / Path(getattr(telegram_hook, name)).name))
+    monkeypatch.setattr(telegram_hook, "LOG_DIR", str(claude / "logs"))
+    return claude
+
+
+class TestRecipients:
+    def test_owner_watchers_and_topic(self, hook_home):
+        (hook_home / "telegram_chat_id").write_text("9\n")
+        (hook_home / "session_chat_map.json").write_text(json.dumps(
+            {"s1": {"owner": 1, "watchers": ["2"]}, "s2": "5"}))
+        (hook_home / "group_project_map.json").write_text(json.dumps(
+            {"-100": {"topics": {"s1": {"thread_id": 7}}}}))
+        assert telegram_hook.get_chat_ids("s1") == ["-100:7", "2"]
+        assert telegram_hook.get_chat_id("s1") == "-100:7"
+        assert telegram_hook.get_chat_ids("s2") == ["5"]
+        assert telegram_hook.get_chat_ids("other") == ["9"]
+        assert telegram_hook.get_chat_ids("") == ["9"]
+
+    def test_malformed_topics_fall_back_to_plain_chat(self, hook_home):
+        (hook_home / "session_chat_map.json").write_text(json.dumps({"s1": 1}))
+        (hook_home / "group_project_map.json").write_text(json.dumps({
+            "-101": "not a group",
+            "-102": {"topics": ["s1"]},
+            "-103": {"topics": {"s1": {}}},
+            "-104": {"topics": {"s1": {"thread_id": "x"}}},
+        }))
+        assert telegram_hook.get_topic("s1") == ""
+        assert telegram_hook.get_chat_ids("s1") == ["1"]
+
+    def test_no_chat(self, hook_home):
+        assert telegram_hook.get_chat_ids("s1") == []
+
+    def test_target(self):
+        assert telegram_hook.target("-100:7") == {"chat_id": "-100", "message_thread_id": 7}
+        assert telegram_hook.target("5") == {"chat_id": "5"}
+
+
+class TestFormatting:
+    def test_markdown_to_html(self):
+        html = telegram_hook.markdown_to_html("**b** *i* `x<y`\n```py\na & b\n```")
+        assert html == '<b>b</b> <i>i</i> <code>x&lt;y</code>\n<pre><code class="language-py">a &amp; b</code></pre>'
+
+    def test_question_indexes_run_on(self):
+        messages = telegram_hook.format_questions([
+            {"question": "Q1", "options": [{"label": "A"}, {"label": "B"}]},
+            {"question": "Q2", "header": "H", "options": [{"label": "C", "description": "d"}]},
+        ])
+        assert [b[0]["callback_data"] for b in messages[1][1]["inline_keyboard"]] == ["askq:2"]
+        assert messages[1][0] == "❓ H\n\nQ2\n\n1. C\n   d"
+
+    def test_last_assistant_text(self, tmp_path):
+        path = tmp_path / "t.jsonl"
+        path.write_text("\n".join(json.dumps(e, separators=(",", ":")) for e in [
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": "old"}]}},
+            {"type": "user", "message": {"content": "hi"}},
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": "one"}]}},
+            {"type": "assistant", "message": {"content": [{"type": "tool_use", "name": "Bash"}]}},
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": "two"}]}},
+        ]) + "\n")
+        assert telegram_hook.last_assistant_text(str(path)) == "one\n\ntwo"
+        path.write_text("")
+        assert telegram_hook.last_assistant_text(str(path)) is None
+
+
+class TestHttp:
+    def test_post_reuses_connection_and_survives_close(self, monkeypatch):
+        with FakeTelegram() as fake:
+            monkeypatch.setenv("TELEGRAM_API_BASE", fake.base_url)
+            monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "1:T")
+            # The fake server speaks HTTP/1.0 and closes after each response
+            assert telegram_hook.send_message("-100:7", "a")
+            assert telegram_hook.send_message("5", "b")
+            calls = fake.calls("sendMessage")
+        assert [c["data"]["text"] for c in calls] == ["a", "b"]
+        assert calls[0]["data"]["message_thread_id"] == 7 and calls[0]["token"] == "1:T"
+
+    def test_post_goes_through_http_proxy(self, monkeypatch):
+        with FakeTelegram() as fake:
+            monkeypatch.setenv("TELEGRAM_API_BASE", "http://api.telegram.invalid")
+            monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "1:T")
+            monkeypatch.setenv("http_proxy", fake.base_url)
+            monkeypatch.setenv("HTTP_PROXY", fake.base_url)
+            for name in ("no_proxy", "NO_PROXY"):
+                monkeypatch.delenv(name, raising=False)
+            assert telegram_hook.send_message("5", "via proxy")
+            assert [c["data"]["text"] for c in fake.calls("sendMessage")] == ["via proxy"]
+
+    def test_edge_error_page_reports_status(self):
+        assert telegram_hook._parse_reply(502, b"<html>Bad gateway</html>") == {"ok": False, "error_code": 502}
+        assert telegram_hook._parse_reply(200, b'{"ok": true}') == {"ok": True}
+
+    def test_token_from_common_sh(self, monkeypatch):
+        monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+        assert telegram_hook.bot_token() == "YOUR_BOT_TOKEN_HERE"
+
+
+class TestStartup:
+    def test_early_exit_imports_no_network_stack(self, tmp_path):
+        (tmp_path / ".claude").mkdir()
+        (tmp_path / ".claude" / "telegram_sync_paused").write_text("")
+        (tmp_path / ".claude" / "telegram_chat_id").write_text("1")
+        code = ("import sys, io; sys.stdin = io.StringIO('{\"prompt\": \"hi\"}'); import telegram_hook; "
+                "telegram_hook.main(['input']); "
+                "print(sorted(m for m in ('socket', 'ssl', 'http.client', 'threading') if m in sys.modules))")
+        out = subprocess.run([sys.executable, "-S", "-c", code], capture_output=True, text=True, check=True,
+                             cwd=PROJECT_DIR / "hooks/lib", env={"HOME": str(tmp_path), "PATH": "/usr/bin:/bin"})
+        assert out.stdout.strip() == "[]"
+
+    def test_unknown_event_is_usage_error(self):
+        result = subprocess.run(["python3", "-S", str(PROJECT_DIR / "hooks/lib/telegram_hook.py"), "bogus"],
+                                capture_output=True, text=True)
+        assert result.returncode == 2 and "usage" in result.stderr
+
+    @pytest.mark.skipif(not os.environ.get("HOOKBENCH"), reason="wall-clock budget; set HOOKBENCH=1 to run")
+    def test_cold_start_within_budget(self):
+        with FakeTelegram() as fake:
+            results = run_bench(fake.base_url, runs=5, scenarios=["paused", "input"])
+        assert not over_budget(results, DEFAULT_BUDGET_MS), results
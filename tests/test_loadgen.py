@@ -0,0 +1,69 @@
+"""Tests for the webhook load generator and the update recorder."""
+
+import json
+
+import bridge
+import loadgen
+from fake_telegram import FakeTelegram
+
+
+class TestStats:
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        assert loadgen.percentile(values, 50) == 50.0
+        assert loadgen.percentile(values, 99) == 99.0
+        assert loadgen.percentile([3.0], 95) == 3.0
+        assert loadgen.percentile([], 50) == 0.0
+
+    def test_classify(self):
+        assert loadgen.classify({"message": {"text": "/Status now"}}) == "/status"
+        assert loadgen.classify({"message": {"text": "hello"}}) == "text"
+        assert loadgen.classify({"callback_query": {"data": "resume:abc"}}) == "cb:resume"
+
+    def test_synthetic_is_reproducible(self):
+        a = loadgen.synthetic_updates(50, seed=3)
+        assert a == loadgen.synthetic_updates(50, seed=3)
+        assert {loadgen.classify(u) for u in a} <= {"text", "/status", "/resume", "cb:rpage"}
+
+    def test_report_summary(self):
+        report = loadgen.LoadReport()
+        report.add("text", 0.010, 0)
+        report.add("text", None, 1)
+        report.duration = 2.0
+        s = report.summary()
+        assert s["requests"] == 2 and s["errors"] == 1 and s["retries"] == 1
+        assert s["commands"]["text"]["p50_ms"] == 10.0
+        assert "text" in report.format()
+
+
+class TestRecorder:
+    def test_do_post_records_updates(self, tmp_path, tmp_claude_dir, monkeypatch):
+        record = tmp_path / "updates.jsonl"
+        monkeypatch.setattr(bridge, "UPDATE_RECORD_FILE", str(record))
+        bridge.record_update({"update_id": 1, "message": {"text": "a"}})
+        bridge.record_update({"update_id": 2, "message": {"text": "b"}})
+        replay = loadgen.load_recording(str(record))
+        assert [u["update_id"] for _, u in replay] == [1, 2]
+        assert replay[0][0] == 0.0
+
+    def test_disabled_by_default(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(bridge, "UPDATE_RECORD_FILE", "")
+        bridge.record_update({"update_id": 1})
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestEndToEnd:
+    def test_spawned_bridge_under_load(self, tmp_path):
+        with FakeTelegram() as fake:
+            proc, url = loadgen.spawn_bridge(fake.base_url, str(tmp_path))
+            try:
+                jobs = loadgen.schedule(loadgen.synthetic_updates(20, chats=1), rate=0)
+                report = loadgen.run_load(url, jobs, concurrency=4)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=5)
+        summary = report.summary()
+        assert summary["requests"] == 20 and summary["errors"] == 0
+        # Plain text went through the fake tmux; commands answered through the fake API
+        assert (tmp_path / "tmux.log").read_text().count("send-keys") >= 1
+        assert fake.calls("sendMessage")
@@ -0,0 +1,129 @@
+"""Tests for the compressed, indexed conversation log archive."""
+
+import gzip
+import os
+from datetime import date, datetime
+from unittest.mock import patch
+
+import bridge
+
+
+def _entry(hhmm, role, text):
+    return f"\n[{hhmm}] {role}:\n{text}\n" + "-" * 40 + "\n"
+
+
+def _write_day_log(day, content):
+    path = os.path.join(bridge.LOG_DIR, f"cc_{day.strftime(bridge.LOG_DATE_FORMAT)}.log")
+    with open(path, "w") as f:
+        f.write(content)
+    return path
+
+
+class TestSplitLogByHour:
+    def test_chunks_per_hour(self):
+        text = _entry("09:05", "You", "a") + _entry("09:50", "Claude", "b") + _entry("11:00", "You", "c")
+        chunks = bridge._split_log_by_hour(text)
+        assert [h for h, _ in chunks] == [9, 11]
+        assert "".join(c for _, c in chunks) == text
+
+
+class TestArchiveLogs:
+    def test_archives_closed_days_only(self, tmp_claude_dir):
+        old = _write_day_log(date(2026, 9, 1), _entry("10:00", "You", "old"))
+        today = _write_day_log(date(2026, 9, 2), _entry("10:00", "You", "new"))
+        assert bridge.archive_logs(today=date(2026, 9, 2)) == 1
+        assert not os.path.exists(old)
+        assert os.path.exists(today)
+        gz_path, idx_path = bridge._archive_paths("202609")
+        index = bridge._load_archive_index(idx_path)
+        assert list(index["days"]) == ["2026-09-01"]
+        with gzip.open(gz_path, "rt") as f:
+            assert "old" in f.read()
+
+    def test_read_range_seeks_hour_members(self, tmp_claude_dir):
+        text = _entry("08:00", "You", "early") + _entry("13:30", "You", "lunch") + _entry("20:00", "You", "late")
+        _write_day_log(date(2026, 9, 1), text)
+        _write_day_log(date(2026, 9, 3), _entry("13:00", "You", "other day"))
+        bridge.archive_logs(today=date(2026, 9, 10))
+        out = bridge.read_archived_logs(datetime(2026, 9, 1, 13), datetime(2026, 9, 1, 14))
+        assert "lunch" in out
+        assert "early" not in out and "late" not in out and "other day" not in out
+
+    def test_read_spans_months(self, tmp_claude_dir):
+        _write_day_log(date(2026, 8, 31), _entry("23:00", "You", "august"))
+        _write_day_log(date(2026, 9, 1), _entry("00:10", "You", "september"))
+        bridge.archive_logs(today=date(2026, 9, 2))
+        out = bridge.read_archived_logs(datetime(2026, 8, 31, 22), datetime(2026, 9, 1, 1))
+        assert "august" in out and "september" in out
+
+    def test_appends_to_existing_month(self, tmp_claude_dir):
+        _write_day_log(date(2026, 9, 1), _entry("10:00", "You", "one"))
+        bridge.archive_logs(today=date(2026, 9, 2))
+        _write_day_log(date(2026, 9, 2), _entry("10:00", "You", "two"))
+        bridge.archive_logs(today=date(2026, 9, 3))
+        out = bridge.read_archived_logs(datetime(2026, 9, 1), datetime(2026, 9, 2, 23))
+        assert "one" in out and "two" in out
+
+    def test_interrupted_run_not_archived_twice(self, tmp_claude_dir):
+        src = _write_day_log(date(2026, 9, 1), _entry("10:00", "You", "once"))
+        with patch.object(bridge.os, "remove"):  # stop before the source is removed
+            bridge.archive_logs(today=date(2026, 9, 2))
+        assert bridge.archive_logs(today=date(2026, 9, 2)) == 0
+        assert not os.path.exists(src)
+        out = bridge.read_archived_logs(datetime(2026, 9, 1), datetime(2026, 9, 1, 23))
+        assert out.count("once") == 1
+
+    def test_late_write_after_interrupted_run_archived_once(self, tmp_claude_dir):
+        src = _write_day_log(date(2026, 9, 1), _entry("10:00", "You", "once"))
+        with patch.object(bridge.os, "remove"):
+            bridge.archive_logs(today=date(2026, 9, 2))
+        with open(src, "a") as f:
+            f.write(_entry("23:59", "Claude", "late"))
+        assert bridge.archive_logs(today=date(2026, 9, 2)) == 1
+        assert not os.path.exists(src)
+        out = bridge.read_archived_logs(datetime(2026, 9, 1), datetime(2026, 9, 1, 23, 59))
+        assert out.count("once") == 1 and out.count("late") == 1
+
+    def test_unindexed_members_are_dropped(self, tmp_claude_dir):
+        _write_day_log(date(2026, 9, 1), _entry("10:00", "You", "one"))
+        bridge.archive_logs(today=date(2026, 9, 2))
+        gz_path, _ = bridge._archive_paths("202609")
+        size = os.path.getsize(gz_path)
+        with open(gz_path, "ab") as f:
+            f.write(gzip.compress(b"orphan"))  # written before a crash, never indexed
+        _write_day_log(date(2026, 9, 2), _entry("10:00", "You", "two"))
+        bridge.archive_logs(today=date(2026, 9, 3))
+        with gzip.open(gz_path, "rt") as f:
+            assert "orphan" not in f.read()
+        assert os.path.getsize(gz_path) > size
+
+    def test_ignores_other_files(self, tmp_claude_dir):
+        with open(os.path.join(bridge.LOG_DIR, "debug.log"), "w") as f:
+            f.write("x")
+        assert bridge.archive_logs(today=date(2026, 9, 2)) == 0
+
+
+class TestRetentionAndRotation:
+    def test_prune_old_months(self, tmp_claude_dir):
+        _write_day_log(date(2025, 1, 10), _entry("10:00", "You", "ancient"))
+        _write_day_log(date(2026, 9, 1), _entry("10:00", "You", "recent"))
+        bridge.archive_logs(today=date(2026, 9, 2))
+        assert bridge.prune_log_archive(retention_days=90, today=date(2026, 9, 2)) == 1
+        assert not os.path.exists(bridge._archive_paths("202501")[0])
+        assert os.path.exists(bridge._archive_paths("202609")[0])
+
+    def test_rotate_debug_log_by_size(self, tmp_claude_dir):
+        path = os.path.join(bridge.LOG_DIR, "debug.log")
+        with open(path, "w") as f:
+            f.write("x" * 100)
+        assert bridge.rotate_debug_log(max_bytes=50) is True
+        assert not os.path.exists(path)
+        with gzip.open(path + ".1.gz", "rt") as f:
+            assert f.read() == "x" * 100
+
+    def test_small_debug_log_kept(self, tmp_claude_dir):
+        path = os.path.join(bridge.LOG_DIR, "debug.log")
+        with open(path, "w") as f:
+            f.write("x")
+        assert bridge.rotate_debug_log(max_bytes=50) is False
+        assert os.path.exists(path)
@@ -0,0 +1,94 @@
+"""Tests for owner + read-only watcher bindings and hook fan-out."""
+
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import bridge
+from fake_telegram import FakeTelegram
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+
+def _say(handler, text, chat_id):
+    handler.handle_message({"message": {"text": text, "chat": {"id": chat_id}, "message_id": 1}})
+    return handler.reply.call_args[0][1]
+
+
+class TestBindings:
+    def test_legacy_string_values(self, tmp_claude_dir):
+        bridge.save_session_chat_map({"s1": "100"})
+        assert bridge.get_chat_id_for_session("s1") == "100"
+        assert bridge.get_session_recipients("s1") == ["100"]
+
+    def test_watchers_kept_and_plain_when_empty(self, tmp_claude_dir):
+        bridge.bind_session_to_chat("s1", 100)
+        assert bridge.set_session_watcher("s1", 200, True)
+        assert not bridge.set_session_watcher("s1", 200, True)
+        assert not bridge.set_session_watcher("s1", 100, True)  # owner can't also watch
+        assert bridge.load_session_chat_map()["s1"] == {"owner": "100", "watchers": ["200"]}
+        bridge.bind_session_to_chat("s1", 300)
+        assert bridge.get_session_recipients("s1") == ["300", "200"]
+        bridge.bind_session_to_chat("s1", 200)  # watcher takes over
+        assert bridge.get_session_recipients("s1") == ["200"]
+        assert bridge.load_session_chat_map()["s1"] == "200"
+
+    def test_unwatch(self, tmp_claude_dir):
+        bridge.bind_session_to_chat("s1", 100)
+        bridge.set_session_watcher("s1", 200, True)
+        assert bridge.set_session_watcher("s1", 200, False)
+        assert bridge.load_session_chat_map()["s1"] == "100"
+
+
+class TestObserveCommands:
+    def test_observe_is_read_only(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+        fake_session_files("-proj", [("sess-obs", 5)])
+        bridge.bind_session_to_chat("sess-obs", 100)
+        assert "Observing" in _say(handler, "/observe", 200)
+        assert bridge.get_session_watchers("sess-obs") == ["200"]
+        assert "read-only" in _say(handler, "rm -rf /", 200)
+        assert not [c for c in mock_tmux["calls"] if "rm -rf /" in c]
+        assert "Observers: 1" in _say(handler, "/status", 100)
+        assert "Stopped observing" in _say(handler, "/unobserve", 200)
+        assert "Not observing" in _say(handler, "/unobserve", 200)
+
+    def test_owner_cannot_observe(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api, fake_session_files):
+        fake_session_files("-proj", [("sess-own", 5)])
+        bridge.bind_session_to_chat("sess-own", 100)
+        assert "already own" in _say(handler, "/observe", 100)
+
+
+class TestHookFanOut:
+    def _env(self, home, fake, mapping):
+        claude = home / ".claude"
+        claude.mkdir(exist_ok=True)
+        (claude / "session_chat_map.json").write_text(json.dumps(mapping))
+        return {**os.environ, "HOME": str(home), "TELEGRAM_BOT_TOKEN": "1:T",
+                "TELEGRAM_API_BASE": fake.base_url}
+
+    def test_stop_hook_delivers_to_owner_and_watchers(self, tmp_path):
+        transcript = tmp_path / "sess-fan.jsonl"
+        transcript.write_text("\n".join(json.dumps(e, separators=(",", ":")) for e in [
+            {"type": "user", "message": {"content": "hi"}},
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": "**done**"}]}},
+        ]) + "\n")
+        with FakeTelegram() as fake:
+            env = self._env(tmp_path, fake, {"sess-fan": {"owner": "1", "watchers": ["2", "3"]}})
+            subprocess.run(["bash", str(PROJECT_DIR / "hooks/send-to-telegram.sh")],
+                           input=json.dumps({"transcript_path": str(transcript)}),
+                           env=env, capture_output=True, text=True, timeout=30, check=True)
+            calls = fake.calls("sendMessage")
+        assert sorted(c["data"]["chat_id"] for c in calls) == ["1", "2", "3"]
+        assert {c["data"]["text"] for c in calls} == {"<b>done</b>"}
+
+    def test_input_from_telegram_goes_to_watchers_only(self, tmp_path):
+        with FakeTelegram() as fake:
+            env = self._env(tmp_path, fake, {"sess-in": {"owner": "1", "watchers": ["2"]}})
+            (tmp_path / ".claude" / "current_session_id").write_text("sess-in")
+            (tmp_path / ".claude" / "telegram_pending").write_text("1")
+            subprocess.run(["bash", str(PROJECT_DIR / "hooks/send-input-to-telegram.sh")],
+                           input=json.dumps({"prompt": "go"}), env=env,
+                           capture_output=True, text=True, timeout=30, check=True)
+            calls = fake.calls("sendMessage")
+        assert [c["data"]["chat_id"] for c in calls] == ["2"]
@@ -0,0 +1,149 @@
+"""Tests for exact session detection through the tmux pane's process tree."""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import bridge
+
+SID_A = "aaaaaaaa-1111-2222-3333-444444444444"
+SID_B = "bbbbbbbb-1111-2222-3333-444444444444"
+
+
+@pytest.fixture
+def fake_proc(tmp_path, tmp_claude_dir, monkeypatch):
+    """A /proc with shell 100 -> claude 101, rooted at tmp_path/proc."""
+    root = tmp_path / "proc"
+    root.mkdir()
+    (root / "stat").write_text("cpu 0 0\nbtime 1000\n")
+    cwd = tmp_path / "work" / "my.app"
+    cwd.mkdir(parents=True)
+    project_dir = tmp_claude_dir / "projects" / bridge.encode_project_path(str(cwd))
+    project_dir.mkdir(parents=True)
+
+    def _proc(pid, ppid, cmdline, starttime=500, children=()):
+        d = root / str(pid)
+        (d / "task" / str(pid)).mkdir(parents=True)
+        (d / "fd").mkdir()
+        fields = ["S", str(ppid)] + ["0"] * 17 + [str(starttime)] + ["0"] * 5
+        (d / "stat").write_text(f"{pid} ({os.path.basename(cmdline[0])}) " + " ".join(fields) + "\n")
+        (d / "cmdline").write_text("\0".join(cmdline) + "\0")
+        (d / "task" / str(pid) / "children").write_text(" ".join(map(str, children)))
+        (d / "cwd").symlink_to(cwd)
+        return d
+
+    _proc(100, 1, ["-bash"], children=[101])
+    claude = _proc(101, 100, ["node", "/usr/lib/node_modules/@anthropic-ai/claude-code/cli.js",
+                              "--resume", SID_A])
+    monkeypatch.setattr(bridge, "PROC_ROOT", str(root))
+    monkeypatch.setattr(bridge, "_boot_time", None)
+    monkeypatch.setattr(bridge, "_claude_proc_cache", {})
+    monkeypatch.setattr(bridge, "_pane_switch", None)
+    monkeypatch.setattr(bridge, "tmux_get_pane_pid", lambda: 100)
+    return {"root": root, "claude": claude, "project": project_dir}
+
+
+class TestHelpers:
+    def test_encode_project_path(self):
+        assert bridge.encode_project_path("/Users/foo/my.app") == "-Users-foo-my-app"
+
+    def test_find_claude_below_shell(self, fake_proc):
+        assert bridge.find_claude_pid(100) == 101
+        assert bridge.find_claude_pid(100, max_depth=0) is None
+
+
+class TestDetectPaneSession:
+    def test_open_transcript_wins(self, fake_proc):
+        transcript = fake_proc["project"] / f"{SID_B}.jsonl"
+        transcript.write_text("")
+        (fake_proc["claude"] / "fd" / "3").symlink_to(transcript)
+        assert bridge.detect_pane_session() == SID_B
+
+    def test_clear_under_resume_argv_finds_new_session(self, fake_proc, mock_tmux, monkeypatch):
+        monkeypatch.setattr(bridge.time, "sleep", lambda s: None)
+        (fake_proc["project"] / f"{SID_A}.jsonl").write_text("")
+        assert bridge.detect_pane_session() == SID_A
+        bridge.tmux_new_session()
+        new = fake_proc["project"] / f"{SID_B}.jsonl"
+        new.write_text("")
+        os.utime(new, (time.time() + 1, time.time() + 1))
+        assert bridge.detect_pane_session() == SID_B
+
+    def test_resume_under_resume_argv_finds_target(self, fake_proc, mock_tmux, monkeypatch):
+        monkeypatch.setattr(bridge.time, "sleep", lambda s: None)
+        bridge.tmux_resume_in_place(SID_B)
+        assert bridge.detect_pane_session() == SID_B  # argv still names SID_A
+
+    def test_switch_in_an_earlier_process_is_ignored(self, fake_proc, mock_tmux, monkeypatch):
+        monkeypatch.setattr(bridge.time, "sleep", lambda s: None)
+        bridge.tmux_resume_in_place(SID_B)
+        stat = fake_proc["claude"] / "stat"
+        stat.write_text(stat.read_text().replace(" 500 ", " 900 "))  # claude restarted
+        assert bridge.detect_pane_session() == SID_A
+
+    def test_transcript_written_since_start_without_argv(self, fake_proc):
+        (fake_proc["claude"] / "cmdline").write_text("claude\0")
+        (fake_proc["project"] / f"{SID_B}.jsonl").write_text("")
+        assert bridge.detect_pane_session() == SID_B
+
+    def test_transcript_older_than_process_is_ignored(self, fake_proc):
+        (fake_proc["claude"] / "cmdline").write_text("claude\0")
+        old = fake_proc["project"] / f"{SID_B}.jsonl"
+        old.write_text("")
+        os.utime(old, (1001, 1001))  # before the claude process started (btime 1000 + 5s)
+        assert bridge.detect_pane_session() is None
+
+    def test_no_claude_process(self, fake_proc):
+        (fake_proc["root"] / "100" / "task" / "100" / "children").write_text("")
+        assert bridge.detect_pane_session() is None
+
+    def test_cache_is_reused(self, fake_proc, monkeypatch):
+        bridge.detect_pane_session()
+        cached = bridge._claude_proc_cache[101]
+        monkeypatch.setattr(bridge, "_proc_cmdline", lambda pid: pytest.fail("argv re-read"))
+        monkeypatch.setattr(bridge, "find_claude_pid", lambda pane_pid: 101)
+        assert bridge.detect_pane_session() == SID_A
+        assert bridge._claude_proc_cache[101] is cached
+
+    def test_cache_invalidated_on_pid_reuse(self, fake_proc):
+        assert bridge.detect_pane_session() == SID_A
+        stat = fake_proc["claude"] / "stat"
+        stat.write_text(stat.read_text().replace(" 500 ", " 900 "))
+        (fake_proc["claude"] / "cmdline").write_text(f"claude\0--session-id={SID_B}\0")
+        assert bridge.detect_pane_session() == SID_B
+
+    def test_get_current_session_id_prefers_pane(self, fake_proc, mock_tmux):
+        Path(bridge.CURRENT_SESSION_FILE).write_text(SID_B)
+        assert bridge.get_current_session_id() == SID_A
+
+    def test_no_proc_falls_back(self, tmp_claude_dir, mock_tmux, monkeypatch, tmp_path):
+        monkeypatch.setattr(bridge, "PROC_ROOT", str(tmp_path / "missing"))
+        assert bridge.detect_pane_session() is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux") or not os.path.isdir("/proc/self/fd"),
+                    reason="needs Linux /proc")
+class TestRealProc:
+    def test_detects_transcript_held_open(self, tmp_path, tmp_claude_dir, monkeypatch):
+        project = tmp_claude_dir / "projects" / "-proj"
+        project.mkdir(parents=True)
+        transcript = project / f"{SID_B}.jsonl"
+        script = tmp_path / "claude"
+        script.write_text(f"#!/bin/bash\nexec 3>>'{transcript}'\nsleep 30\n")
+        script.chmod(0o755)
+        shell = subprocess.Popen(["bash", "-c", f"'{script}'; true"], start_new_session=True)
+        try:
+            monkeypatch.setattr(bridge, "_claude_proc_cache", {})
+            monkeypatch.setattr(bridge, "tmux_get_pane_pid", lambda: shell.pid)
+            deadline = time.time() + 5
+            while time.time() < deadline and bridge.detect_pane_session() != SID_B:
+                time.sleep(0.05)
+            assert bridge.detect_pane_session() == SID_B
+        finally:
+            os.killpg(shell.pid, signal.SIGKILL)
+            shell.wait()
@@ -0,0 +1,80 @@
+"""Tests for the /perf self-diagnostic probes and their stored baselines."""
+
+import json
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import bridge
+from fake_telegram import FakeTelegram
+
+
+class TestProbes:
+    def test_all_probes_run(self, tmp_claude_dir, mock_tmux, fake_session_files, monkeypatch):
+        fake_session_files("-proj", [("s1", 5)])
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "1:T")
+        with FakeTelegram() as fake:
+            monkeypatch.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+            results = bridge.run_perf_probes(samples=3)
+            assert len(fake.calls("getMe")) == 3
+        assert list(results) == ["Bot API round-trip", "tmux round-trip", "Project catalog scan",
+                                 "Transcript read", "Log append"]
+        assert all(isinstance(v, float) for v in results.values())
+        assert list((tmp_claude_dir / "logs").iterdir()) == []  # scratch log removed
+
+    def test_unavailable_and_failing_probes(self, tmp_claude_dir, mock_tmux, monkeypatch):
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "")
+        monkeypatch.setattr(bridge, "_probe_tmux", MagicMock(side_effect=RuntimeError("tmux session not found")))
+        results = bridge.run_perf_probes(samples=1)
+        assert results["Bot API round-trip"] == "n/a"
+        assert results["Transcript read"] == "n/a"
+        assert results["tmux round-trip"] == "failed (tmux session not found)"
+
+
+class TestBaselines:
+    def test_first_run_becomes_baseline(self, tmp_claude_dir):
+        assert bridge.record_perf_run({"Log append": 0.5, "Bot API round-trip": "n/a"}) == {}
+        assert json.loads(Path(bridge.PERF_BASELINE_FILE).read_text()) == {"Log append": [0.5]}
+        assert "First run" in bridge.format_perf_report({"Log append": 0.5}, {})
+
+    def test_compared_against_median_of_history(self, tmp_claude_dir):
+        Path(bridge.PERF_BASELINE_FILE).write_text(json.dumps({"tmux round-trip": [1.0, 2.0, 30.0]}))
+        baselines = bridge.record_perf_run({"tmux round-trip": 5.0, "Log append": 0.3})
+        assert baselines == {"tmux round-trip": 2.0}
+        report = bridge.format_perf_report({"tmux round-trip": 5.0, "Log append": 0.3}, baselines)
+        assert "tmux round-trip: 5.0 ms (usual 2.0, ×2.5) ⚠️" in report
+        assert report.endswith("Log append: 0.3 ms")
+
+    def test_history_is_capped(self, tmp_claude_dir):
+        for i in range(bridge.PERF_HISTORY + 3):
+            bridge.record_perf_run({"Log append": float(i)})
+        runs = bridge.load_perf_history()["Log append"]
+        assert len(runs) == bridge.PERF_HISTORY and runs[-1] == bridge.PERF_HISTORY + 2
+
+
+class TestPerfCommand:
+    def test_perf_runs_off_the_handler_thread(self, handler, tmp_claude_dir, mock_tmux, monkeypatch):
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "")
+        release = threading.Event()
+        probes = bridge.perf_probes
+        monkeypatch.setattr(bridge, "perf_probes", lambda: (release.wait(5), probes())[1])
+        handler.handle_message({"message": {"text": "/perf", "chat": {"id": 1}}})
+        assert handler.reply.call_args[0][1] == "⏱ Running probes..."  # handler returned while probing
+        handler.handle_message({"message": {"text": "/perf", "chat": {"id": 1}}})
+        assert "already running" in handler.reply.call_args[0][1]
+        release.set()
+        deadline = time.time() + 5
+        while bridge._perf_lock.locked() and time.time() < deadline:
+            time.sleep(0.01)
+        report = handler.reply.call_args[0][1]
+        assert report.startswith("⏱ Perf") and "Bot API round-trip: n/a" in report
+        assert bridge.load_perf_history()
+
+
+class TestTranscriptProbe:
+    def test_reads_only_the_tail(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(bridge, "PERF_TRANSCRIPT_TAIL", 60)
+        path = tmp_path / "t.jsonl"
+        path.write_text("not json, outside the tail\n" * 50 + '{"type": "user"}\n' * 3)
+        bridge._probe_transcript(str(path))()  # would raise on the early lines
@@ -0,0 +1,121 @@
+"""Tests for native permission decisions over the bridge's Unix socket."""
+
+import json
+import os
+import socket
+import threading
+
+import bridge
+
+
+def _ask(path, request_id, timeout=5):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(path)
+    conn.sendall((json.dumps({"id": request_id, "timeout": timeout}) + "\n").encode())
+    return conn
+
+
+def _read_reply(conn):
+    with conn, conn.makefile("r") as f:
+        return json.loads(f.readline())
+
+
+def _wait_pending(n=1):
+    for _ in range(200):
+        if bridge._permission_broker.pending_count() >= n:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("request never registered")
+
+
+class TestPermissionBroker:
+    def test_resolve_wakes_waiter(self):
+        broker = bridge.PermissionBroker()
+        result = []
+        t = threading.Thread(target=lambda: result.append(broker.wait("r1", 5)))
+        t.start()
+        while broker.pending_count() == 0:
+            threading.Event().wait(0.01)
+        assert broker.resolve("r1", "allow") is True
+        t.join(2)
+        assert result == ["allow"]
+
+    def test_timeout_returns_none_and_unregisters(self):
+        broker = bridge.PermissionBroker()
+        assert broker.wait("r1", 0.01) is None
+        assert broker.resolve("r1", "deny") is False
+
+
+class TestPermissionSocket:
+    def test_roundtrip(self, tmp_claude_dir):
+        server = bridge.start_permission_server()
+        try:
+            conn = _ask(bridge.PERMISSION_SOCKET_FILE, "abc")
+            _wait_pending()
+            assert bridge._permission_broker.resolve("abc", "allow_all")
+            assert _read_reply(conn) == {"decision": "allow_all"}
+        finally:
+            server.close()
+
+    def test_timeout_replies_null(self, tmp_claude_dir):
+        server = bridge.start_permission_server()
+        try:
+            conn = _ask(bridge.PERMISSION_SOCKET_FILE, "late", timeout=0.05)
+            assert _read_reply(conn) == {"decision": None}
+        finally:
+            server.close()
+
+
+class TestPermissionHandover:
+    def test_waiting_hook_answered_by_successor(self, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "RELOAD_STATE_FILE", str(tmp_claude_dir / "state.json"))
+        old_broker = bridge.PermissionBroker()
+        monkeypatch.setattr(bridge, "_permission_broker", old_broker)
+        server = bridge.start_permission_server()
+        try:
+            conn = _ask(bridge.PERMISSION_SOCKET_FILE, "shown")
+            _wait_pending()
+            # Predecessor: stop accepting, hand the listener and the waiting hook over
+            bridge.pause_permission_server()
+            waits = old_broker.hand_over()
+            bridge.save_reload_state(waits)
+            successor_listener = os.dup(server.fileno())
+
+            # Successor (in-process here): adopt both
+            monkeypatch.setattr(bridge, "_permission_broker", bridge.PermissionBroker())
+            bridge.restore_reload_state()  # takes ownership of the duplicated fds
+            successor = bridge.start_permission_server(listen_fd=successor_listener)
+            old_broker.release([w["id"] for w in waits])
+            server.close()
+
+            assert bridge._permission_broker.resolve("shown", "allow")
+            assert _read_reply(conn) == {"decision": "allow"}
+            late = _ask(bridge.PERMISSION_SOCKET_FILE, "after")  # same socket file, now served by the successor
+            _wait_pending()
+            assert bridge._permission_broker.resolve("after", "deny")
+            assert _read_reply(late) == {"decision": "deny"}
+            successor.close()
+        finally:
+            server.close()
+
+
+class TestPermissionCallback:
+    def test_tap_resolves_and_clears_keyboard(self, handler, tmp_claude_dir, mock_telegram_api):
+        result = []
+        t = threading.Thread(target=lambda: result.append(bridge._permission_broker.wait("id1", 5)))
+        t.start()
+        _wait_pending()
+        handler.handle_callback({"id": "q", "data": "perm:id1:deny",
+                                 "message": {"chat": {"id": 7}, "message_id": 3}})
+        t.join(2)
+        assert result == ["deny"]
+        assert handler.reply.call_args[0][1] == "❌ Denied"
+        assert "editMessageReplyMarkup" in [c["method"] for c in mock_telegram_api]
+
+    def test_expired_request(self, handler, tmp_claude_dir, mock_telegram_api):
+        handler.handle_callback({"id": "q", "data": "perm:gone:allow", "message": {"chat": {"id": 7}}})
+        assert "expired" in handler.reply.call_args[0][1]
+
+    def test_unknown_decision_ignored(self, handler, tmp_claude_dir, mock_telegram_api):
+        handler.handle_callback({"id": "q", "data": "perm:x:maybe", "message": {"chat": {"id": 7}}})
+        handler.reply.assert_not_called()
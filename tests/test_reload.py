@@ -0,0 +1,226 @@
+"""Tests for graceful reload: socket handoff to a successor bridge process."""
+
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import bridge
+from fake_telegram import FakeTelegram
+from loadgen import spawn_bridge
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+
+def _read_pid(path):
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+class TestHandoffHelpers:
+    def test_make_server_on_inherited_socket(self, tmp_claude_dir):
+        listener = socket.create_server(("127.0.0.1", 0))
+        server = bridge.make_server(os.dup(listener.fileno()))
+        listener.close()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            port = server.server_address[1]
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5).read()
+            assert body == b"Claude-Telegram Bridge"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_state_survives_handoff(self, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "RELOAD_STATE_FILE", str(tmp_claude_dir / "state.json"))
+        monkeypatch.setattr(bridge, "_warm_pool", bridge.WarmPool(2, 60))
+        monkeypatch.setattr(bridge, "_project_id_cache", {})
+        h = bridge.project_hash("-Users-me-app")
+        bridge._warm_pool.parked["@3"] = ("/work/app", 123.0)
+        bridge.save_reload_state()
+        assert oct(os.stat(bridge.RELOAD_STATE_FILE).st_mode & 0o777) == "0o600"
+        bridge._project_id_cache.clear()
+        bridge._warm_pool.parked.clear()
+        bridge.restore_reload_state()
+        assert bridge.project_from_hash(h) == "-Users-me-app"
+        assert bridge._warm_pool.parked == {"@3": ("/work/app", 123.0)}
+        assert not os.path.exists(bridge.RELOAD_STATE_FILE)
+
+    def test_queued_input_survives_handoff(self, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "RELOAD_INPUT_FILE", str(tmp_claude_dir / "input.json"))
+        delivered = []
+        monkeypatch.setattr(bridge, "_input_coalescer", bridge.InputCoalescer(10_000, delivered.append))
+        bridge._input_queue.submit("s1", 5, "first")
+        bridge._input_queue.submit("s2", 6, "other")
+        bridge._input_queue.submit("s1", 5, "second")
+        bridge._input_coalescer.submit(7, "held")
+        bridge.hand_over_input()  # predecessor, after its last request
+        assert delivered == ["held"] and bridge._input_queue.depth() == 0
+        assert oct(os.stat(bridge.RELOAD_INPUT_FILE).st_mode & 0o777) == "0o600"
+
+        successor_queue = bridge.InputQueue(max_depth=1)
+        monkeypatch.setattr(bridge, "_input_queue", successor_queue)
+        successor_queue.submit("s1", 5, "arrived during reload")
+        bridge.take_over_input()
+        assert successor_queue.pop_batch() == ("s1", 5, "first\n\nsecond\n\narrived during reload")
+        assert successor_queue.pop_batch() == ("s2", 6, "other")
+        assert not os.path.exists(bridge.RELOAD_INPUT_FILE)
+
+    def test_reload_without_running_bridge(self, tmp_claude_dir, monkeypatch, capsys):
+        monkeypatch.setattr(bridge, "BRIDGE_PID_FILE", str(tmp_claude_dir / "none.pid"))
+        assert bridge.request_reload(timeout=0.1) == 1
+        assert "No running bridge" in capsys.readouterr().out
+
+
+class TestReloadEndToEnd:
+    def test_no_request_refused_during_reload(self, tmp_path):
+        with FakeTelegram() as fake:
+            proc, url = spawn_bridge(fake.base_url, str(tmp_path))
+            home = tmp_path / "home"
+            pid_file = home / ".claude" / "telegram_bridge.pid"
+            successor = None
+            stop = threading.Event()
+            statuses, errors = [], []
+
+            def hammer(offset):
+                n = offset
+                while not stop.is_set():
+                    n += 100
+                    req = urllib.request.Request(url, data=json.dumps({"update_id": n}).encode(),
+                                                 headers={"Content-Type": "application/json"})
+                    try:
+                        with urllib.request.urlopen(req, timeout=5) as r:
+                            statuses.append(r.status)
+                    except OSError as e:
+                        errors.append(repr(e))
+
+            try:
+                deadline = time.monotonic() + 5
+                while _read_pid(pid_file) != proc.pid and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                assert _read_pid(pid_file) == proc.pid
+                threads = [threading.Thread(target=hammer, args=(i,)) for i in range(4)]
+                for t in threads:
+                    t.start()
+                time.sleep(0.3)
+                env = {**os.environ, "HOME": str(home)}
+                result = subprocess.run([sys.executable, str(PROJECT_DIR / "bridge.py"), "--reload"],
+                                        env=env, capture_output=True, text=True, timeout=40)
+                assert result.returncode == 0, result.stdout + result.stderr
+                successor = _read_pid(pid_file)
+                assert successor and successor != proc.pid
+                proc.wait(timeout=10)  # the old process drains and exits
+                time.sleep(0.3)
+                stop.set()
+                for t in threads:
+                    t.join()
+                assert errors == []
+                assert len(statuses) > 20 and set(statuses) == {200}
+                assert not (home / ".claude" / "telegram_bridge_reload_env.json").exists()
+            finally:
+                stop.set()
+                if successor:
+                    try:
+                        os.kill(successor, signal.SIGKILL)
+                    except OSError:
+                        pass
+                proc.kill()
+
+
+    def test_pending_permission_survives_reload(self, tmp_path):
+        with FakeTelegram() as fake:
+            proc, url = spawn_bridge(fake.base_url, str(tmp_path))
+            claude_dir = tmp_path / "home" / ".claude"
+            pid_file = claude_dir / "telegram_bridge.pid"
+            successor = None
+            hook = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                deadline = time.monotonic() + 5
+                while _read_pid(pid_file) != proc.pid and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                hook.connect(str(claude_dir / "telegram_permission.sock"))
+                hook.sendall(b'{"id": "p1", "timeout": 60}\n')
+                time.sleep(0.3)  # registered with the old process's broker
+                env = {**os.environ, "HOME": str(tmp_path / "home")}
+                result = subprocess.run([sys.executable, str(PROJECT_DIR / "bridge.py"), "--reload"],
+                                        env=env, capture_output=True, text=True, timeout=40)
+                assert result.returncode == 0, result.stdout + result.stderr
+                successor = _read_pid(pid_file)
+                proc.wait(timeout=10)
+                tap = {"update_id": 1, "callback_query": {"id": "q", "data": "perm:p1:allow",
+                                                          "message": {"chat": {"id": 5}, "message_id": 9}}}
+                req = urllib.request.Request(url, data=json.dumps(tap).encode(),
+                                             headers={"Content-Type": "application/json"})
+                urllib.request.urlopen(req, timeout=5).read()
+                hook.settimeout(10)
+                with hook.makefile("r") as f:
+                    assert json.loads(f.readline()) == {"decision": "allow"}
+                texts = [c["data"].get("text", "") for c in fake.calls("sendMessage")]
+                assert not any("expired" in t for t in texts)
+            finally:
+                hook.close()
+                if successor:
+                    try:
+                        os.kill(successor, signal.SIGKILL)
+                    except OSError:
+                        pass
+                proc.kill()
+
+
+class TestStartScript:
+    def test_start_sh_reload(self, tmp_path):
+        with FakeTelegram() as fake:
+            proc, _ = spawn_bridge(fake.base_url, str(tmp_path))
+            home = tmp_path / "home"
+            pid_file = home / ".claude" / "telegram_bridge.pid"
+            successor = None
+            try:
+                deadline = time.monotonic() + 5
+                while _read_pid(pid_file) != proc.pid and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                result = subprocess.run(["bash", str(PROJECT_DIR / "scripts/start.sh"), "--reload"],
+                                        env={**os.environ, "HOME": str(home)},
+                                        capture_output=True, text=True, timeout=40)
+                assert result.returncode == 0, result.stdout + result.stderr
+                assert "Bridge reloaded" in result.stdout
+                successor = _read_pid(pid_file)
+                assert successor and successor != proc.pid
+                proc.wait(timeout=10)
+            finally:
+                if successor:
+                    try:
+                        os.kill(successor, signal.SIGKILL)
+                    except OSError:
+                        pass
+                proc.kill()
+
+    def test_wait_for_bridge_follows_the_pid_file(self, tmp_path):
+        source = (PROJECT_DIR / "scripts/start.sh").read_text()
+        function = re.search(r"^wait_for_bridge\(\) \{\n.*?^\}\n", source, re.M | re.S).group(0)
+        pid_file = tmp_path / "bridge.pid"
+        old = subprocess.Popen(["sleep", "30"])
+        new = subprocess.Popen(["sleep", "30"])
+        pid_file.write_text(str(old.pid))
+        waiter = subprocess.Popen(["bash", "-c", f'{function}\nBRIDGE_PID={old.pid}\nwait_for_bridge'],
+                                  env={**os.environ, "BRIDGE_PID_FILE": str(pid_file)})
+        try:
+            pid_file.write_text(str(new.pid))  # the successor takes over
+            old.kill()
+            old.wait()
+            time.sleep(1.5)
+            assert waiter.poll() is None  # still waiting on the successor
+            new.kill()
+            new.wait()
+            assert waiter.wait(timeout=5) == 0
+        finally:
+            for p in (old, new, waiter):
+                p.kill()
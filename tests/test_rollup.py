@@ -0,0 +1,136 @@
+"""Tests for the hourly usage rollup store and ranged /report views."""
+
+import calendar
+import json
+import os
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import bridge
+
+
+def _assistant(model, inp, out, ts, cache_read=0):
+    usage = {"input_tokens": inp, "output_tokens": out}
+    if cache_read:
+        usage["cache_read_input_tokens"] = cache_read
+    return json.dumps({"type": "assistant", "timestamp": ts, "message": {"model": model, "usage": usage}})
+
+
+def _append(tmp_claude_dir, project, session_id, lines):
+    proj = tmp_claude_dir / "projects" / project
+    proj.mkdir(parents=True, exist_ok=True)
+    path = proj / f"{session_id}.jsonl"
+    with open(path, "a") as f:
+        f.write("".join(line + "\n" for line in lines))
+    return path
+
+
+def _ts(hour_epoch):
+    return time.strftime("%Y-%m-%dT%H:05:00.000Z", time.gmtime(hour_epoch * 3600))
+
+
+H0 = calendar.timegm((2026, 9, 1, 10, 0, 0)) // 3600
+
+
+class TestParseUsageLine:
+    def test_extracts_fields(self):
+        u = bridge.parse_usage_line(_assistant("claude-opus-4-6", 10, 20, "2026-09-01T10:00:00Z", cache_read=5))
+        assert (u["input"], u["output"], u["cache_read"], u["cache_write"]) == (10, 20, 5, 0)
+
+    def test_skips_synthetic_and_user(self):
+        assert bridge.parse_usage_line(_assistant("<synthetic>", 1, 1, "2026-09-01T10:00:00Z")) is None
+        assert bridge.parse_usage_line(json.dumps({"type": "user", "usage": {}})) is None
+
+
+class TestUsageRollup:
+    def test_add_and_summarize(self):
+        r = bridge.UsageRollup()
+        r.add("m", "p", H0, (10, 20, 1, 2))
+        r.add("m", "p", H0 + 2, (1, 1, 0, 0))
+        r.add("m", "q", H0 - 1, (5, 5, 0, 0))  # earlier hour shifts the base
+        assert r.base_hour == H0 - 1
+        s = r.summarize(H0 * 3600, (H0 + 1) * 3600)
+        assert s["totals"] == {"input": 10, "output": 20, "cache_read": 1, "cache_write": 2}
+        assert s["by_project"] == {"p": 30}
+        assert r.hourly_totals(H0 - 1, H0 + 3) == [10, 30, 0, 2]
+
+    def test_refresh_reads_only_appended_lines(self, tmp_claude_dir):
+        _append(tmp_claude_dir, "-p", "s1", [_assistant("m", 10, 10, _ts(H0))])
+        r = bridge.UsageRollup()
+        assert r.refresh() == 1
+        assert r.refresh() == 0
+        _append(tmp_claude_dir, "-p", "s1", [_assistant("m", 1, 1, _ts(H0 + 1))])
+        assert r.refresh() == 1
+        assert r.summarize(H0 * 3600, (H0 + 2) * 3600)["totals"]["input"] == 11
+
+    def test_persisted_store_is_compact_and_reloads(self, tmp_claude_dir):
+        lines = [_assistant("claude-sonnet-4-5-20250929", 100, 50, _ts(H0 - h)) for h in range(0, 90 * 24, 3)]
+        _append(tmp_claude_dir, "-proj", "s1", lines)
+        bridge.UsageRollup().refresh()
+        assert os.path.getsize(bridge.USAGE_ROLLUP_FILE) < 8 * 1024
+        fresh = bridge.UsageRollup()
+        fresh.load()
+        assert fresh.summarize((H0 - 90 * 24) * 3600, (H0 + 1) * 3600)["totals"]["input"] == 100 * len(lines)
+        assert fresh.refresh() == 0
+
+    def test_corrupt_file_starts_empty(self, tmp_claude_dir):
+        with open(bridge.USAGE_ROLLUP_FILE, "wb") as f:
+            f.write(b"CCR1garbage")
+        r = bridge.UsageRollup()
+        r.load()
+        assert r.series == {}
+
+
+class TestParseReportRange:
+    NOW = datetime(2026, 10, 19, 15, 30)
+
+    def test_days(self):
+        label, start, end = bridge.parse_report_range("90d", self.NOW)
+        assert label == "Last 90d"
+        assert datetime.fromtimestamp(start) == datetime(2026, 7, 22)
+        assert datetime.fromtimestamp(end) == self.NOW
+
+    def test_month(self):
+        _, start, end = bridge.parse_report_range("2026-09", self.NOW)
+        assert datetime.fromtimestamp(start) == datetime(2026, 9, 1)
+        assert datetime.fromtimestamp(end) == datetime(2026, 10, 1)
+
+    def test_day(self):
+        _, start, end = bridge.parse_report_range("2026-09-15", self.NOW)
+        assert datetime.fromtimestamp(end) == datetime(2026, 9, 16)
+
+    def test_invalid(self):
+        assert bridge.parse_report_range("lastweek", self.NOW) is None
+        assert bridge.parse_report_range("2026-13", self.NOW) is None
+        assert bridge.parse_report_range("0d", self.NOW) is None
+
+
+class TestReportViews:
+    def test_range_report_format(self):
+        r = bridge.UsageRollup()
+        r.add("claude-opus-4-6", "-Users-x-app", H0, (1000, 2000, 0, 0))
+        msg = bridge.format_range_report("2026-09", r.summarize(H0 * 3600, (H0 + 1) * 3600))
+        assert "Token Usage: 2026-09" in msg
+        assert "Opus 4.6" in msg and "~$" in msg
+
+    def test_burn_and_heatmap(self):
+        r = bridge.UsageRollup()
+        r.add("m", "p", H0, (100, 0, 0, 0))
+        burn = bridge.format_burn_report(r, now_ts=H0 * 3600 + 60)
+        assert "Burn rate" in burn and "█" in burn
+        heat = bridge.format_heatmap_report(r, now=datetime.fromtimestamp(H0 * 3600))
+        assert heat.count("\n") >= 9 and "█" in heat
+        header, first_row = heat.split("\n")[2:4]
+        header = header.removeprefix("<code>")
+        for hour in (0, 6, 12, 18):
+            assert header.index(str(hour)) == len(first_row) - 24 + hour
+
+    def test_report_command_dispatch(self, handler, tmp_claude_dir, mock_telegram_api):
+        handler.reply_html = MagicMock()
+        handler.handle_message({"message": {"text": "/report 2026-09", "chat": {"id": 1}}})
+        assert "2026-09" in handler.reply.call_args[0][1]
+        handler.handle_message({"message": {"text": "/report heatmap", "chat": {"id": 1}}})
+        assert "heatmap" in handler.reply_html.call_args[0][1]
+        handler.handle_message({"message": {"text": "/report bogus", "chat": {"id": 1}}})
+        assert "Usage" in handler.reply.call_args[0][1]
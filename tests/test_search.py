@@ -0,0 +1,140 @@
+"""Tests for /search: incremental transcript index and command."""
+
+import json
+
+import bridge
+
+
+def _user(text, ts="2026-02-11T10:00:00Z"):
+    return json.dumps({"type": "user", "timestamp": ts, "message": {"role": "user", "content": text}})
+
+
+def _assistant(text, ts="2026-02-11T10:00:05Z"):
+    return json.dumps({
+        "type": "assistant", "timestamp": ts,
+        "message": {"content": [{"type": "text", "text": text}, {"type": "tool_use", "name": "Bash"}]},
+    })
+
+
+def _write(tmp_claude_dir, project, session_id, lines, mode="w"):
+    proj = tmp_claude_dir / "projects" / project
+    proj.mkdir(parents=True, exist_ok=True)
+    path = proj / f"{session_id}.jsonl"
+    with open(path, mode) as f:
+        f.write("".join(line + "\n" for line in lines))
+    return path
+
+
+class TestExtractMessageText:
+    def test_user_string(self):
+        assert bridge.extract_message_text(json.loads(_user("hi"))) == ("user", "hi")
+
+    def test_assistant_text_blocks_only(self):
+        assert bridge.extract_message_text(json.loads(_assistant("done"))) == ("assistant", "done")
+
+    def test_tool_result_skipped(self):
+        entry = {"type": "user", "message": {"content": [{"type": "tool_result", "content": "x"}]}}
+        assert bridge.extract_message_text(entry) is None
+
+    def test_meta_skipped(self):
+        entry = {"type": "user", "isMeta": True, "message": {"content": "caveat"}}
+        assert bridge.extract_message_text(entry) is None
+
+
+class TestIterAppendedLines:
+    def test_partial_line_left_for_later(self, tmp_path):
+        p = tmp_path / "t.jsonl"
+        p.write_bytes(b'{"a":1}\n{"b":')
+        lines = list(bridge.iter_appended_lines(str(p)))
+        assert lines == [('{"a":1}\n', 8)]
+
+    def test_resume_from_offset(self, tmp_path):
+        p = tmp_path / "t.jsonl"
+        p.write_bytes(b"one\ntwo\n")
+        assert [line for line, _ in bridge.iter_appended_lines(str(p), 4)] == ["two\n"]
+
+
+class TestSearchIndex:
+    def test_finds_session_by_prompt_and_reply(self, tmp_claude_dir):
+        _write(tmp_claude_dir, "-proj-a", "sess-mig", [_user("fix the migration bug"), _assistant("Patched alembic")])
+        _write(tmp_claude_dir, "-proj-b", "sess-other", [_user("write docs")])
+        index = bridge.SearchIndex()
+        index.update()
+        assert [r["session_id"] for r in index.search("migration")] == ["sess-mig"]
+        assert [r["session_id"] for r in index.search("alembic")] == ["sess-mig"]
+        assert index.search("nonexistentword") == []
+
+    def test_only_appended_bytes_indexed(self, tmp_claude_dir):
+        path = _write(tmp_claude_dir, "-proj-a", "s1", [_user("first prompt")])
+        index = bridge.SearchIndex()
+        assert index.update() == 1
+        assert index.update() == 0
+        _write(tmp_claude_dir, "-proj-a", "s1", [_assistant("second reply")], mode="a")
+        assert index.update() == 1
+        assert index.search("first")[0]["session_id"] == "s1"
+        assert path.exists()
+
+    def test_rewritten_file_reindexed(self, tmp_claude_dir):
+        _write(tmp_claude_dir, "-proj-a", "s1", [_user("alpha words here"), _user("beta words here")])
+        index = bridge.SearchIndex()
+        index.update()
+        _write(tmp_claude_dir, "-proj-a", "s1", [_user("gamma")])
+        index.update()
+        assert index.search("alpha") == []
+        assert index.search("gamma")[0]["session_id"] == "s1"
+
+    def test_query_punctuation_is_safe(self, tmp_claude_dir):
+        _write(tmp_claude_dir, "-proj-a", "s1", [_user("deploy to prod")])
+        index = bridge.SearchIndex()
+        index.update()
+        assert [r["session_id"] for r in index.search('prod"(')] == ["s1"]
+        assert index.search("***") == []
+
+    def test_deleted_transcript_is_purged(self, tmp_claude_dir):
+        path = _write(tmp_claude_dir, "-proj-a", "s1", [_user("ephemeral words")])
+        index = bridge.SearchIndex()
+        index.update()
+        path.unlink()
+        index.update()
+        assert index.search("ephemeral") == []
+        assert bridge.SearchIndex().is_ready() is False  # nothing left to search yet
+
+    def test_refresh_async_builds_in_background(self, tmp_claude_dir):
+        _write(tmp_claude_dir, "-proj-a", "s1", [_user("background build")])
+        index = bridge.SearchIndex()
+        assert not index.is_ready()
+        assert index.refresh_async()
+        assert index.ready.wait(5)
+        assert index.is_ready() and index.search("background")
+
+    def test_one_result_per_session(self, tmp_claude_dir):
+        _write(tmp_claude_dir, "-proj-a", "s1", [_user("cache cache"), _assistant("cache again")])
+        index = bridge.SearchIndex()
+        index.update()
+        assert len(index.search("cache")) == 1
+
+
+class TestSearchCommand:
+    def test_replies_indexing_until_ready(self, handler, tmp_claude_dir, mock_telegram_api):
+        _write(tmp_claude_dir, "-proj-a", "sess-mig", [_user("migration bug")])
+        handler.handle_message({"message": {"text": "/search migration", "chat": {"id": 1}}})
+        assert "Indexing" in handler.reply.call_args[0][1]
+        assert bridge._search_index.ready.wait(5)
+        handler.handle_message({"message": {"text": "/search migration", "chat": {"id": 1}}})
+        assert handler.reply_keyboard.called
+
+    def test_results_use_resume_callback(self, handler, tmp_claude_dir, mock_telegram_api):
+        _write(tmp_claude_dir, "-proj-a", "sess-mig", [_user("migration bug")])
+        bridge._search_index.update()
+        handler.handle_message({"message": {"text": "/search migration", "chat": {"id": 1}}})
+        kb = handler.reply_keyboard.call_args[0][2]
+        assert kb[0][0]["callback_data"] == f"{bridge.CB_RESUME}sess-mig"
+
+    def test_usage_without_query(self, handler, tmp_claude_dir, mock_telegram_api):
+        handler.handle_message({"message": {"text": "/search", "chat": {"id": 1}}})
+        assert "Usage" in handler.reply.call_args[0][1]
+
+    def test_no_match(self, handler, tmp_claude_dir, mock_telegram_api):
+        bridge._search_index.update()
+        handler.handle_message({"message": {"text": "/search nothing", "chat": {"id": 1}}})
+        assert "No sessions match" in handler.reply.call_args[0][1]
@@ -1,6 +1,7 @@
 """Tests for session management functions in bridge.py."""
 
 import json
+import os
 import time
 from pathlib import Path
 
@@ -112,3 +113,38 @@ class TestGetProjects:
         fake_session_files("-new-proj", [("s2", 5)], base_time=now)
         projects = bridge.get_projects()
         assert projects[0]["encoded_name"] == "-new-proj"
+
+
+class TestPaging:
+    def test_recent_sessions_offset(self, tmp_claude_dir, fake_session_files):
+        now = time.time()
+        fake_session_files("-proj-p", [(f"s{i}", i * 10) for i in range(5)], base_time=now)
+        page = bridge.get_recent_sessions_from_files(limit=2, offset=2)
+        assert [s["session_id"] for s in page] == ["s2", "s3"]
+
+    def test_offset_skips_invalid_lazily(self, tmp_claude_dir, fake_session_files):
+        now = time.time()
+        fake_session_files("-proj-q", [("a", 10), ("b", 20), ("c", 30)], base_time=now)
+        bad = tmp_claude_dir / "projects" / "-proj-q" / "b.jsonl"
+        bad.write_text("not json\n")
+        os.utime(bad, (now - 20, now - 20))
+        page = bridge.get_recent_sessions_from_files(limit=5)
+        assert [s["session_id"] for s in page] == ["a", "c"]
+
+    def test_project_sessions_offset(self, tmp_claude_dir, fake_session_files):
+        now = time.time()
+        fake_session_files("-proj-r", [("x", 10), ("y", 20), ("z", 30)], base_time=now)
+        page = bridge.get_sessions_for_project("-proj-r", limit=2, offset=1)
+        assert [s["session_id"] for s in page] == ["y", "z"]
+
+    def test_projects_offset(self, tmp_claude_dir, fake_session_files):
+        now = time.time()
+        for i in range(4):
+            fake_session_files(f"-proj-{i}", [(f"s{i}", i * 10)], base_time=now)
+        page = bridge.get_projects(limit=2, offset=2)
+        assert [p["encoded_name"] for p in page] == ["-proj-2", "-proj-3"]
+
+    def test_project_count_ignores_stale(self, tmp_claude_dir, fake_session_files):
+        now = time.time()
+        fake_session_files("-proj-s", [("new", 10), ("old", 40 * 86400)], base_time=now)
+        assert bridge.get_projects()[0]["session_count"] == 1
@@ -4,12 +4,20 @@ Verifies that scripts correctly source common.sh and don't hardcode
 paths that should come from the shared library.
 """
 
+import os
 import re
+import subprocess
 from pathlib import Path
 
 import pytest
 
 PROJECT_DIR = Path(__file__).parent.parent
+HOOK_MODULE = PROJECT_DIR / "hooks/lib/telegram_hook.py"
+
+
+def _hook_source(hook: str) -> str:
+    """A Telegram hook wrapper plus the module that does its work."""
+    return (PROJECT_DIR / hook).read_text() + HOOK_MODULE.read_text()
 
 # Variables that must be defined in common.sh
 SHARED_VARS = [
@@ -93,15 +101,30 @@ class TestPathConsistency:
 class TestHookScriptsSourceCommon:
     """Verify hook scripts source lib/common.sh."""
 
-    @pytest.mark.parametrize("hook", [
-        "hooks/send-to-telegram.sh",
-        "hooks/send-input-to-telegram.sh",
-        "hooks/play-alarm.sh",
-        "hooks/handle-permission.sh",
+    def test_sources_common(self):
+        content = (PROJECT_DIR / "hooks/play-alarm.sh").read_text()
+        assert 'source "$(dirname "$0")/lib/common.sh"' in content
+
+    @pytest.mark.parametrize("hook,event", [
+        ("hooks/send-to-telegram.sh", "stop"),
+        ("hooks/send-input-to-telegram.sh", "input"),
+        ("hooks/send-notification-to-telegram.sh", "notification"),
+        ("hooks/handle-permission.sh", "permission"),
     ])
-    def test_sources_common(self, hook):
+    def test_telegram_hooks_exec_module(self, hook, event):
+        """Telegram hooks hand straight over to the Python module (no common.sh, no jq)."""
         content = (PROJECT_DIR / hook).read_text()
-        assert 'source "$(dirname "$0")/lib/common.sh"' in content
+        assert f'exec python3 -S "$HOOK_LIB/telegram_hook.py" {event}' in content
+        assert "source " not in content
+        assert "jq -" not in content
+
+    def test_module_paths_match_common(self):
+        """telegram_hook.py reads the same state files as lib/common.sh."""
+        common = (PROJECT_DIR / "hooks/lib/common.sh").read_text()
+        module = HOOK_MODULE.read_text()
+        for var in SHARED_VARS:
+            path = re.search(rf"^{var}=~/.claude/(\S+)", common, re.M).group(1)
+            assert f'"{path}"' in module, f"telegram_hook.py missing {path}"
 
     @pytest.mark.parametrize("hook", [
         "hooks/send-to-telegram.sh",
@@ -122,6 +145,7 @@ class TestScriptsSourceCommon:
         "scripts/install.sh",
         "scripts/uninstall.sh",
         "scripts/clean-logs.sh",
+        "scripts/archive-logs.sh",
     ])
     def test_sources_common(self, script):
         content = (PROJECT_DIR / script).read_text()
@@ -373,29 +397,28 @@ class TestPermissionHookIntegration:
         assert (PROJECT_DIR / "hooks/handle-permission.sh").exists()
 
     def test_handle_permission_reads_stdin(self):
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
-        assert "INPUT=$(cat)" in content
+        content = _hook_source("hooks/handle-permission.sh")
+        assert "sys.stdin.read()" in content
 
     def test_handle_permission_checks_sync(self):
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
-        assert "get_sync_disabled" in content
+        content = _hook_source("hooks/handle-permission.sh")
+        assert "sync_disabled()" in content
 
-    def test_handle_permission_uses_jq(self):
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
-        assert "jq" in content
+    def test_handle_permission_parses_tool_name(self):
+        content = _hook_source("hooks/handle-permission.sh")
+        assert "json.loads" in content
         assert "tool_name" in content
 
     def test_handle_permission_handles_all_tools(self):
         """Hook sends to Telegram for all tools, not just AskUserQuestion."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
+        content = _hook_source("hooks/handle-permission.sh")
         assert "AskUserQuestion" in content
         # No early exit for non-AskUserQuestion tools
         assert 'TOOL_NAME" != "AskUserQuestion"' not in content
-        assert "hookSpecificOutput" not in content
 
     def test_handle_permission_askq_inline_keyboard(self):
         """AskUserQuestion is formatted as inline keyboard with askq: callbacks."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
+        content = _hook_source("hooks/handle-permission.sh")
         assert "askq:" in content
         assert "inline_keyboard" in content
 
@@ -610,23 +633,88 @@ class TestStartSyncOptions:
         assert "--resume-sync" in content
 
 
+class TestFastRestart:
+    """Verify start.sh reuses a healthy tunnel and polls readiness instead of sleeping."""
+
+    def test_reuses_tunnel_when_webhook_matches(self):
+        content = (PROJECT_DIR / "scripts/start.sh").read_text()
+        assert "tunnel_reusable" in content
+        assert "getWebhookInfo" in content
+        assert "TUNNEL_STATE_FILE" in content
+        assert "--fresh-tunnel)" in content
+
+    def test_no_fixed_dns_sleep(self):
+        content = (PROJECT_DIR / "scripts/start.sh").read_text()
+        assert "sleep 10" not in content
+        assert "wait_until 30 tunnel_reachable" in content
+
+    def test_terminate_forgets_tunnel(self):
+        content = (PROJECT_DIR / "scripts/start.sh").read_text()
+        block = content[content.index("if $TERMINATE_ALL"):content.index("exit 0", content.index("if $TERMINATE_ALL"))]
+        assert 'rm -f "$TUNNEL_STATE_FILE"' in block
+
+    def test_wait_until_backs_off_and_gives_up(self, tmp_path):
+        flag = tmp_path / "ready"
+        script = (
+            f'source "{PROJECT_DIR}/scripts/lib/common.sh"\n'
+            f'ready() {{ [ -e "{flag}" ]; }}\n'
+            f'(sleep 0.3; touch "{flag}") &\n'
+            'wait_until 5 ready && echo ok\n'
+            'wait_until 0.2 false || echo gave-up\n'
+        )
+        result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, timeout=10,
+                                env={**os.environ, "HOME": str(tmp_path)})
+        assert result.stdout.split() == ["ok", "gave-up"]
+
+
+class TestStableWebhook:
+    """Verify start.sh supports a fixed webhook URL / named tunnel."""
+
+    def test_config_env_has_webhook_defaults(self):
+        content = (PROJECT_DIR / "config.env").read_text()
+        assert "DEFAULT_WEBHOOK_URL=" in content
+        assert "DEFAULT_CLOUDFLARE_TUNNEL_NAME=" in content
+
+    def test_named_tunnel_and_drift_check(self):
+        content = (PROJECT_DIR / "scripts/start.sh").read_text()
+        assert 'run "$CLOUDFLARE_TUNNEL_NAME"' in content
+        ensure = content[content.index("ensure_webhook() {"):]
+        ensure = ensure[:ensure.index("\n}\n")]
+        assert "getWebhookInfo" in ensure
+        assert "set_webhook" in ensure
+
+
 class TestPermissionHookFormatting:
     """Verify handle-permission.sh: all tools → inline keyboard with askq: callbacks."""
 
-    def test_handle_permission_no_decision_output(self):
-        """Hook exits without outputting a decision — CC falls back to terminal dialog."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
-        assert "hookSpecificOutput" not in content
+    def test_handle_permission_returns_decision_output(self):
+        """Tool permissions block on the bridge socket and print the decision as hook output."""
+        content = _hook_source("hooks/handle-permission.sh")
+        assert "hookSpecificOutput" in content
+        assert '"hookEventName": "PermissionRequest"' in content
+        assert "PERMISSION_SOCKET_FILE" in content
+        assert "perm:" in content
+
+    def test_handle_permission_falls_back_without_socket(self):
+        """Without the bridge socket, buttons fall back to askq: keystroke answers."""
+        content = _hook_source("hooks/handle-permission.sh")
+        assert '"askq:0"' in content
+        assert "Claude Code shows its own dialog" in content
+
+    def test_permission_wait_below_hook_timeout(self):
+        content = HOOK_MODULE.read_text()
+        match = re.search(r'os\.environ\.get\("PERMISSION_WAIT"\) or (\d+)', content)
+        assert match and int(match.group(1)) < 120
 
     def test_handle_permission_askq_inline_keyboard(self):
         """AskUserQuestion is formatted as inline keyboard with askq: callbacks."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
+        content = _hook_source("hooks/handle-permission.sh")
         assert "askq:" in content
         assert "inline_keyboard" in content
 
     def test_handle_permission_sends_keyboard_for_all_tools(self):
         """Non-AskUserQuestion tools get 3-button inline keyboard (Yes/Yes to all/No)."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
+        content = _hook_source("hooks/handle-permission.sh")
         # No early exit for non-AskUserQuestion
         assert 'TOOL_NAME" != "AskUserQuestion"' not in content
         # 3-button keyboard for tool permissions
@@ -636,20 +724,20 @@ class TestPermissionHookFormatting:
 
     def test_handle_permission_formats_edit_tool(self):
         """Edit tool shows file_path in permission message."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
+        content = _hook_source("hooks/handle-permission.sh")
         assert "Edit" in content
         assert "file_path" in content
 
     def test_handle_permission_formats_bash_tool(self):
         """Bash tool shows command in permission message (truncated to 300 chars)."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
+        content = _hook_source("hooks/handle-permission.sh")
         assert "Bash" in content
         assert "command" in content
         assert "300" in content
 
     def test_handle_permission_formats_write_tool(self):
         """Write tool shows file_path in permission message."""
-        content = (PROJECT_DIR / "hooks/handle-permission.sh").read_text()
+        content = _hook_source("hooks/handle-permission.sh")
         assert '"Write"' in content
 
 
@@ -665,21 +753,23 @@ class TestHooksIndependentOfBridge:
     @pytest.mark.parametrize("hook", HOOK_FILES)
     def test_hooks_call_telegram_api_directly(self, hook):
         """Hooks call api.telegram.org directly, not via bridge."""
-        content = (PROJECT_DIR / hook).read_text()
+        content = _hook_source(hook)
         assert "api.telegram.org" in content
 
     @pytest.mark.parametrize("hook", HOOK_FILES)
     def test_hooks_do_not_depend_on_bridge(self, hook):
         """Hooks don't reference bridge localhost or bridge.py."""
-        content = (PROJECT_DIR / hook).read_text()
+        content = _hook_source(hook)
         assert "localhost" not in content
         assert "bridge.py" not in content
 
     @pytest.mark.parametrize("hook", HOOK_FILES)
     def test_hooks_use_token_from_common(self, hook):
         """Hooks use $TELEGRAM_BOT_TOKEN from common.sh, not hardcoded."""
-        content = (PROJECT_DIR / hook).read_text()
+        content = _hook_source(hook)
         assert "TELEGRAM_BOT_TOKEN" in content
+        assert "common.sh" in content
+        assert "YOUR_BOT_TOKEN_HERE" not in content
 
 
 class TestSyncFlagConsistency:
@@ -728,14 +818,14 @@ class TestNotificationHookIntegration:
 
     def test_notification_hook_handles_ask_user_question(self):
         """Notification hook handles AskUserQuestion with inline keyboard."""
-        content = (PROJECT_DIR / "hooks/send-notification-to-telegram.sh").read_text()
+        content = _hook_source("hooks/send-notification-to-telegram.sh")
         assert "AskUserQuestion" in content
         assert "questions" in content
         assert "options" in content
 
     def test_notification_hook_askq_inline_keyboard(self):
         """Notification hook formats AskUserQuestion as inline keyboard with askq: callbacks."""
-        content = (PROJECT_DIR / "hooks/send-notification-to-telegram.sh").read_text()
+        content = _hook_source("hooks/send-notification-to-telegram.sh")
         assert "askq:" in content
         assert "inline_keyboard" in content
         assert "reply_markup" not in content or "inline_keyboard" in content
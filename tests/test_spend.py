@@ -0,0 +1,128 @@
+"""Tests for the transcript-tailing spend watchdog."""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import bridge
+
+SONNET = "claude-sonnet-4-5-20250929"  # $3 / $15 per 1M input / output tokens
+
+
+def _usage_line(output_tokens, ts=None):
+    ts = ts or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return json.dumps({"type": "assistant", "timestamp": ts, "message": {
+        "model": SONNET, "usage": {"input_tokens": 0, "output_tokens": output_tokens}}}) + "\n"
+
+
+@pytest.fixture
+def transcript(tmp_claude_dir):
+    project = tmp_claude_dir / "projects" / "-proj"
+    project.mkdir()
+
+    def _append(session_id, *lines):
+        path = project / f"{session_id}.jsonl"
+        with open(path, "a") as f:
+            f.writelines(lines)
+        return path
+
+    return _append
+
+
+class TestParseAmounts:
+    def test_parse(self):
+        assert bridge._parse_amounts("10, 5,x,-1,") == [5.0, 10.0]
+        assert bridge._parse_amounts("") == []
+
+
+class TestSpendWatchdog:
+    def test_counts_only_appended_usage(self, transcript):
+        dog = bridge.SpendWatchdog([100.0], [])
+        transcript("s1", _usage_line(1_000_000))
+        dog.poll()
+        assert dog.today() == pytest.approx(15.0)
+        transcript("s1", _usage_line(200_000), '{"type":"assistant","message":{"usage"')  # partial line
+        dog.poll()
+        dog.poll()
+        assert dog.today() == pytest.approx(18.0)
+        assert dog.sessions["s1"] == pytest.approx(18.0)
+
+    def test_existing_spend_primes_silently(self, transcript):
+        dog = bridge.SpendWatchdog([5.0, 10.0], [1.0])
+        transcript("s1", _usage_line(1_000_000))  # $15
+        assert dog.poll() == []
+        transcript("s1", _usage_line(1000))
+        assert dog.poll() == []
+
+    def test_daily_and_session_alerts_fire_once(self, transcript):
+        dog = bridge.SpendWatchdog([5.0, 10.0], [2.0])
+        dog.poll()
+        transcript("s1", _usage_line(400_000))  # $6
+        alerts = dog.poll()
+        assert [sid for sid, _ in alerts] == [None, "s1"]
+        assert "alert at $5" in alerts[0][1]
+        transcript("s2", _usage_line(400_000))  # $12 today
+        alerts = dog.poll()
+        assert [(sid, "$10" in text) for sid, text in alerts] == [(None, True), ("s2", False)]
+        transcript("s2", _usage_line(1000))
+        assert dog.poll() == []
+
+    def test_old_usage_does_not_count_today(self, transcript):
+        dog = bridge.SpendWatchdog([1.0], [])
+        transcript("s1", _usage_line(1_000_000, ts="2020-01-01T12:00:00.000Z"))
+        dog.poll()
+        assert dog.today() == 0.0
+
+    def test_untouched_transcripts_are_skipped(self, transcript):
+        path = transcript("old", _usage_line(1_000_000))
+        yesterday = time.time() - 2 * 86400
+        os.utime(path, (yesterday, yesterday))
+        dog = bridge.SpendWatchdog([1.0], [])
+        dog.poll()
+        assert str(path) not in dog.offsets
+
+    def test_cap_pauses_and_interrupts(self, transcript, mock_tmux):
+        dog = bridge.SpendWatchdog([], [], daily_cap=3.0, cap_actions=frozenset({"pause", "escape"}))
+        dog.poll()
+        transcript("s1", _usage_line(300_000))  # $4.50
+        alerts = dog.poll()
+        assert len(alerts) == 1 and "Daily cap $3 reached" in alerts[0][1]
+        assert os.path.exists(bridge.SYNC_PAUSED_FILE)
+        assert any("Escape" in c for c in mock_tmux["calls"])
+        transcript("s1", _usage_line(300_000))
+        assert dog.poll() == []
+
+    def test_cap_already_hit_at_startup_is_enforced_once(self, transcript, mock_tmux):
+        transcript("s1", _usage_line(1_000_000))  # $15
+        dog = bridge.SpendWatchdog([5.0], [], daily_cap=3.0, cap_actions=frozenset({"pause"}))
+        alerts = dog.poll()
+        assert len(alerts) == 1 and "Daily cap $3 reached" in alerts[0][1] and "Sync paused" in alerts[0][1]
+        assert os.path.exists(bridge.SYNC_PAUSED_FILE)
+        os.remove(bridge.SYNC_PAUSED_FILE)  # user resumes
+        transcript("s1", _usage_line(1000))
+        assert dog.poll() == []
+        assert not os.path.exists(bridge.SYNC_PAUSED_FILE)
+
+    def test_cap_without_actions_primes_silently(self, transcript):
+        transcript("s1", _usage_line(1_000_000))
+        dog = bridge.SpendWatchdog([], [], daily_cap=3.0)
+        assert dog.poll() == []
+
+
+class TestAlertDelivery:
+    def test_session_alert_goes_to_owner(self, tmp_claude_dir):
+        bridge.bind_session_to_chat("s1", 100)
+        (tmp_claude_dir / "telegram_chat_id").write_text("200")
+        assert bridge._alert_chat("s1") == "100"
+        assert bridge._alert_chat("unbound") == "200"
+        assert bridge._alert_chat(None) == "200"
+
+    def test_status_shows_spend(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api, monkeypatch):
+        dog = bridge.SpendWatchdog([5.0], [], daily_cap=20.0)
+        dog.daily[time.strftime("%Y-%m-%d")] = 1.5
+        monkeypatch.setattr(bridge, "_spend_watchdog", dog)
+        handler._cmd_status(1, "/status")
+        assert "Spend today: ~$1.50 (cap $20)" in handler.reply.call_args[0][1]
@@ -0,0 +1,157 @@
+"""Tests for the on-disk outbound spool shared by the bridge and the hooks."""
+
+import json
+import os
+
+import pytest
+
+import bridge
+import telegram_hook
+from fake_telegram import FakeTelegram
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return bridge.OutboundSpool(str(tmp_path / "spool"), max_bytes=10_000)
+
+
+def _msg(chat, text):
+    return {"chat_id": chat, "text": text}
+
+
+class TestOutboundSpool:
+    def test_drains_in_order_per_chat(self, spool):
+        for i in range(3):
+            spool.append("5", "sendMessage", _msg("5", f"m{i}"))
+        spool.append("-100:7", "sendMessage", _msg("-100", "topic"))
+        assert spool.count() == 4 and spool.pending("5") and spool.pending("-100:9")
+        sent = []
+        assert spool.drain(lambda e: sent.append(e["data"]["text"]) or "ok") == 4
+        assert sent == ["topic", "m0", "m1", "m2"]
+        assert spool.count() == 0 and not spool.pending("5")
+
+    def test_retry_keeps_tail_and_backs_off(self, spool):
+        for i in range(3):
+            spool.append("5", "sendMessage", _msg("5", f"m{i}"))
+        results = iter(["ok", "retry"])
+        assert spool.drain(lambda e: next(results), now=1000) == 1
+        assert spool.count() == 2
+        assert 1001 <= spool.retry_at["5"] <= 1002
+        # Appended meanwhile: queued behind the unsent tail
+        spool.append("5", "sendMessage", _msg("5", "late"))
+        assert spool.drain(lambda e: pytest.fail("sent during backoff"), now=1000.5) == 0
+        spool.drain(lambda e: "retry", now=1005)
+        assert 1007 <= spool.retry_at["5"] <= 1009  # second failure doubles the delay
+        sent = []
+        spool.drain(lambda e: sent.append(e["data"]["text"]) or "ok", now=2000)
+        assert sent == ["m1", "m2", "late"]
+        assert "5" not in spool.failures
+
+    def test_backoff_is_capped(self, spool):
+        spool.append("5", "sendMessage", _msg("5", "x"))
+        spool.failures["5"] = 50
+        spool.drain(lambda e: "retry", now=0)
+        assert spool.retry_at["5"] <= bridge.SPOOL_BACKOFF_MAX
+
+    def test_rejected_messages_are_dropped(self, spool):
+        spool.append("5", "sendMessage", _msg("5", "bad"))
+        spool.append("5", "sendMessage", _msg("5", "good"))
+        results = iter(["drop", "ok"])
+        assert spool.drain(lambda e: next(results)) == 1
+        assert spool.count() == 0
+
+    def test_full_spool_refuses(self, spool):
+        while spool.append("5", "sendMessage", _msg("5", "x" * 1000)):
+            pass
+        assert 10_000 <= os.path.getsize(spool._path("5")) < 12_000
+        assert spool.append("6", "sendMessage", _msg("6", "other chat"))
+
+
+class TestBridgeSpooling:
+    def test_unreachable_api_spools_and_later_messages_queue(self, tmp_claude_dir, closed_port_url, monkeypatch):
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "1:T")
+        monkeypatch.setattr(bridge, "TELEGRAM_API_BASE", closed_port_url)
+        assert bridge.telegram_api("sendMessage", _msg(5, "one")) is None
+        assert bridge.telegram_api("sendChatAction", {"chat_id": 5, "action": "typing"}) is None
+        with FakeTelegram() as fake:
+            monkeypatch.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+            bridge.telegram_api("sendMessage", _msg(5, "two"))  # reachable, but must not overtake "one"
+            assert fake.calls("sendMessage") == []
+            assert bridge._outbound_spool.count() == 2
+            fake.inject_429("sendMessage")
+            assert bridge._outbound_spool.drain(bridge._spool_send, now=0) == 0
+            assert bridge._outbound_spool.drain(bridge._spool_send, now=1000) == 2
+            texts = [c["data"]["text"] for c in fake.calls("sendMessage")]
+        assert texts == ["one", "one", "two"]  # the first attempt got the 429
+
+    def test_rate_limited_send_is_spooled(self, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "1:T")
+        with FakeTelegram() as fake:
+            monkeypatch.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+            fake.inject_429("sendMessage")
+            assert bridge.telegram_api("sendMessage", _msg(5, "limited")) is None
+            assert bridge._outbound_spool.count() == 1
+            assert bridge._outbound_spool.drain(bridge._spool_send) == 1
+            assert [c["data"]["text"] for c in fake.calls("sendMessage")] == ["limited", "limited"]
+
+    def test_replies_and_watch_frames_are_not_spooled(self, tmp_claude_dir, closed_port_url, mock_tmux,
+                                                     monkeypatch):
+        monkeypatch.setattr(bridge, "BOT_TOKEN", "1:T")
+        monkeypatch.setattr(bridge, "TELEGRAM_API_BASE", closed_port_url)
+        bridge._outbound_spool.append("5", "sendMessage", _msg(5, "claude output"))
+        handler = bridge.Handler.__new__(bridge.Handler)
+        handler.reply(5, "Interrupted")
+        handler.reply_keyboard(5, "Pick", [[{"text": "a", "callback_data": "x"}]])
+        watcher = bridge.PaneWatcher(5)
+        watcher.step(now=0)
+        assert watcher.message_id is None
+        assert bridge._outbound_spool.count() == 1
+
+    def test_status_reports_spooled(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api):
+        bridge._outbound_spool.append("5", "sendMessage", _msg(5, "x"))
+        handler._cmd_status(1, "/status")
+        assert "Spooled messages: 1" in handler.reply.call_args[0][1]
+
+
+class TestHookSpooling:
+    @pytest.fixture
+    def hook_spool(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(telegram_hook, "SPOOL_DIR", str(tmp_path / "spool"))
+        monkeypatch.setattr(telegram_hook, "LOG_DIR", str(tmp_path / "logs"))
+        monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "1:T")
+        return tmp_path / "spool"
+
+    def test_hook_spools_and_bridge_delivers(self, hook_spool, closed_port_url, monkeypatch):
+        monkeypatch.setenv("TELEGRAM_API_BASE", closed_port_url)
+        assert telegram_hook.send_or_spool("-100:7", "<b>hi</b>", parse_mode="HTML", plain="hi")
+        assert telegram_hook.spooled("-100:3")
+        entry = json.loads((hook_spool / "-100.jsonl").read_text())
+        assert entry["data"]["message_thread_id"] == 7 and entry["fallback"]["text"] == "hi"
+
+        spool = bridge.OutboundSpool(str(hook_spool))
+        with FakeTelegram() as fake:
+            monkeypatch.setenv("TELEGRAM_API_BASE", fake.base_url)
+            # Reachable again, but the new message queues behind the spooled one
+            assert telegram_hook.send_or_spool("-100:7", "next")
+            assert fake.calls("sendMessage") == []
+            monkeypatch.setattr(bridge, "TELEGRAM_API_BASE", fake.base_url)
+            monkeypatch.setattr(bridge, "BOT_TOKEN", "1:T")
+            assert spool.drain(bridge._spool_send) == 2
+            calls = fake.calls("sendMessage")
+        assert [(c["data"]["text"], c["data"].get("parse_mode")) for c in calls] == [
+            ("<b>hi</b>", "HTML"), ("next", None)]
+
+    def test_429_and_5xx_are_spooled(self, hook_spool, monkeypatch):
+        replies = iter([{"ok": False, "error_code": 429}, {"ok": False, "error_code": 502}])
+        monkeypatch.setattr(telegram_hook, "post", lambda method, data: next(replies))
+        assert telegram_hook.send_or_spool("5", "a")
+        assert telegram_hook.send_or_spool("6", "b")
+        assert telegram_hook.spooled("5") and telegram_hook.spooled("6")
+
+    def test_rejected_html_falls_back_without_spooling(self, hook_spool, monkeypatch):
+        replies = iter([{"ok": False, "description": "can't parse entities"}, {"ok": True}])
+        sent = []
+        monkeypatch.setattr(telegram_hook, "post", lambda method, data: sent.append(data) or next(replies))
+        assert telegram_hook.send_or_spool("5", "<b", parse_mode="HTML", plain="<b")
+        assert [d.get("parse_mode") for d in sent] == ["HTML", None]
+        assert not hook_spool.exists()
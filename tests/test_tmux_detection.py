@@ -1,5 +1,10 @@
 """Tests for tmux detection functions in bridge.py."""
 
+import shutil
+import subprocess
+
+import pytest
+
 import bridge
 
 
@@ -66,3 +71,77 @@ class TestFilterWindowTitle:
 
     def test_meaningful_title(self):
         assert bridge.filter_window_title("my-session") == "my-session"
+
+
+class TestClassifyPaneCommand:
+    def test_shells(self):
+        assert bridge.classify_pane_command("zsh") == bridge.PANE_SHELL
+        assert bridge.classify_pane_command("-bash") == bridge.PANE_SHELL
+
+    def test_claude(self):
+        assert bridge.classify_pane_command("claude") == bridge.PANE_CLAUDE
+        assert bridge.classify_pane_command("2.0.14") == bridge.PANE_CLAUDE
+        assert bridge.classify_pane_command("node") == bridge.PANE_CLAUDE
+
+    def test_other(self):
+        assert bridge.classify_pane_command("vim") == bridge.PANE_OTHER
+
+
+class TestPaneState:
+    def _probe(self, monkeypatch, stdout, returncode=0):
+        calls = []
+
+        def _run(*args, capture=False, text=False):
+            calls.append(args)
+            out = stdout if args[0] == "display-message" else ""
+            return subprocess.CompletedProcess(args, returncode, stdout=out, stderr="")
+
+        monkeypatch.setattr(bridge, "_tmux_run", _run)
+        return calls
+
+    def test_one_probe_reads_all_fields(self, monkeypatch):
+        calls = self._probe(monkeypatch, "0\t123\tzsh\n")
+        assert bridge.tmux_pane_state() == bridge.PANE_SHELL
+        assert len(calls) == 1 and "#{pane_dead}" in calls[0][-1]
+
+    def test_claude_output_ending_in_prompt_char_is_not_shell(self, monkeypatch):
+        self._probe(monkeypatch, "0\t123\tclaude\n")
+        monkeypatch.setattr(bridge, "tmux_get_pane_content", lambda lines=3: "cost: 5 $")
+        assert bridge.tmux_is_at_shell() is False
+
+    def test_custom_prompt_is_shell(self, monkeypatch):
+        self._probe(monkeypatch, "0\t123\tfish\n")
+        monkeypatch.setattr(bridge, "tmux_get_pane_content", lambda lines=3: "λ")
+        assert bridge.tmux_is_at_shell() is True
+
+    def test_node_needs_claude_below_pane(self, monkeypatch, tmp_path):
+        self._probe(monkeypatch, "0\t123\tnode\n")
+        monkeypatch.setattr(bridge, "PROC_ROOT", str(tmp_path))
+        monkeypatch.setattr(bridge, "find_claude_pid", lambda pid: None)
+        assert bridge.tmux_pane_state() == bridge.PANE_OTHER
+        monkeypatch.setattr(bridge, "find_claude_pid", lambda pid: 124)
+        assert bridge.tmux_pane_state() == bridge.PANE_CLAUDE
+
+    def test_dead_pane_is_respawned(self, monkeypatch):
+        calls = self._probe(monkeypatch, "1\t123\tclaude\n")
+        assert bridge.tmux_is_at_shell() is True
+        assert calls[-1][0] == "respawn-pane"
+
+    def test_falls_back_to_screen_when_tmux_gives_nothing(self, monkeypatch):
+        self._probe(monkeypatch, "\n")
+        monkeypatch.setattr(bridge, "tmux_get_pane_content", lambda lines=3: "user@host $")
+        assert bridge.tmux_pane_state() is None
+        assert bridge.tmux_is_at_shell() is True
+
+    @pytest.mark.skipif(shutil.which("tmux") is None, reason="needs tmux")
+    def test_real_tmux(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("TMUX_TMPDIR", str(tmp_path))
+        monkeypatch.delenv("TMUX", raising=False)
+        monkeypatch.setattr(bridge, "TMUX_SESSION", "probe")
+        subprocess.run(["tmux", "new-session", "-d", "-s", "probe", "sleep 30"], check=True)
+        try:
+            assert bridge.tmux_pane_state() == bridge.PANE_OTHER
+            subprocess.run(["tmux", "respawn-pane", "-k", "-t", "probe", "/bin/sh"], check=True)
+            assert bridge.tmux_pane_state() == bridge.PANE_SHELL
+        finally:
+            subprocess.run(["tmux", "kill-server"], capture_output=True)
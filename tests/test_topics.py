@@ -0,0 +1,143 @@
+"""Tests for forum-topic routing: one group topic per session."""
+
+import json
+import os
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import bridge
+from fake_telegram import FakeTelegram
+
+PROJECT_DIR = Path(__file__).parent.parent
+GROUP = -1001
+
+
+def _topic_update(text, thread_id=None, chat_id=GROUP):
+    msg = {"text": text, "chat": {"id": chat_id}, "message_id": 1}
+    if thread_id is not None:
+        msg.update({"message_thread_id": thread_id, "is_topic_message": True})
+    return {"message": msg}
+
+
+class TestTopicIndex:
+    def test_lookup_and_reload_on_change(self, tmp_claude_dir):
+        index = bridge.TopicIndex()
+        index.link_group(GROUP, "/p", "p")
+        index.add_topic(GROUP, "sess-a", 7, "A")
+        assert index.lookup(GROUP, 7) == "sess-a"
+        assert index.topic_for("sess-a") == (str(GROUP), 7)
+        assert index.lookup(GROUP, None) is None
+
+        data = json.loads(Path(bridge.GROUP_PROJECT_MAP_FILE).read_text())
+        data[str(GROUP)]["topics"]["sess-b"] = {"thread_id": 9, "name": "B"}
+        Path(bridge.GROUP_PROJECT_MAP_FILE).write_text(json.dumps(data))
+        os.utime(bridge.GROUP_PROJECT_MAP_FILE, ns=(1, 1))
+        assert index.lookup(GROUP, 9) == "sess-b"
+
+    def test_malformed_entries_are_skipped(self, tmp_claude_dir, capsys):
+        Path(bridge.GROUP_PROJECT_MAP_FILE).write_text(json.dumps({
+            str(GROUP): {"project_path": "/p", "topics": {
+                "sess-ok": {"thread_id": 7}, "sess-none": {"name": "x"}, "sess-bad": {"thread_id": "abc"},
+            }},
+            "-1002": {"topics": ["not", "a", "dict"]},
+            "-1003": "garbage",
+        }))
+        index = bridge.TopicIndex()
+        assert index.lookup(GROUP, 7) == "sess-ok"
+        assert index.topic_for("sess-none") is None and index.topic_for("sess-bad") is None
+        out = capsys.readouterr().out
+        assert "sess-none" in out and "sess-bad" in out and "-1002" in out and "-1003" in out
+
+    def test_claim_pending_matches_project(self, tmp_claude_dir, monkeypatch):
+        paths = {"sess-x": "/other", "sess-y": "/proj"}
+        monkeypatch.setattr(bridge, "get_project_path_for_session", paths.get)
+        index = bridge.TopicIndex()
+        index.link_group(GROUP, "/proj", "proj")
+        index.add_pending(GROUP, 11, "work")
+        assert index.claim_pending("sess-x") is None
+        assert index.claim_pending("sess-unknown") is None  # no project path: never attached
+        assert index.claim_pending("sess-y") == (str(GROUP), 11)
+        assert index.claim_pending("sess-y") is None
+        assert index.pending == {}
+
+    def test_claim_pending_needs_group_project(self, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "get_project_path_for_session", lambda sid: "/proj")
+        index = bridge.TopicIndex()
+        index.add_pending(GROUP, 11, "work")  # group never linked to a project
+        assert index.claim_pending("sess-y") is None
+
+
+class TestTopicRouting:
+    def test_topic_message_goes_to_its_session(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api,
+                                               monkeypatch):
+        monkeypatch.setattr(bridge, "tmux_switch_session", MagicMock())
+        monkeypatch.setattr(bridge, "_start_typing", MagicMock())
+        bridge._topic_index.link_group(GROUP, "/Users/test/project", "project")
+        bridge._topic_index.add_topic(GROUP, "sess-t", 7, "T")
+        bridge.save_session_chat_map({"sess-other": "100"})
+        handler.handle_message(_topic_update("hello topic", 7))
+        sent = [c for c in mock_tmux["calls"] if "hello topic" in c]
+        assert sent
+        bridge.tmux_switch_session.assert_called_once_with("sess-t")
+        assert Path(bridge.CURRENT_SESSION_FILE).read_text() == "sess-t"
+        assert bridge.load_session_chat_map() == {"sess-other": "100"}
+        assert not os.path.exists(bridge.CHAT_ID_FILE)
+
+    def test_unknown_topic_asks_for_newtopic(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api):
+        bridge._topic_index.link_group(GROUP, "/p", "p")
+        handler.handle_message(_topic_update("hi", 3))
+        assert "/newtopic" in handler.reply.call_args[0][1]
+
+    def test_replies_stay_in_thread(self, tmp_claude_dir, mock_telegram_api):
+        handler = bridge.Handler.__new__(bridge.Handler)
+        handler._reply_thread = (GROUP, 7)
+        handler.reply(GROUP, "x")
+        handler.reply(100, "y")
+        assert mock_telegram_api[0]["data"]["message_thread_id"] == 7
+        assert "message_thread_id" not in mock_telegram_api[1]["data"]
+
+    def test_linkgroup_rejected_in_dm(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api):
+        handler.handle_message(_topic_update("/linkgroup /tmp", chat_id=100))
+        assert "forum group" in handler.reply.call_args[0][1]
+        assert bridge._topic_index.group(100) is None
+
+    def test_newtopic_creates_topic_and_pending(self, handler, tmp_claude_dir, mock_tmux, monkeypatch, tmp_path):
+        calls = []
+
+        def _fake_api(method, data, spool=True):
+            calls.append({"method": method, "data": data})
+            if method == "createForumTopic":
+                return {"ok": True, "result": {"message_thread_id": 55, "name": data["name"]}}
+            return {"ok": True, "result": True}
+
+        monkeypatch.setattr(bridge, "telegram_api", _fake_api)
+        monkeypatch.setattr(bridge, "tmux_new_session", MagicMock())
+        mock_tmux["cwd"] = str(tmp_path)
+        handler.handle_message(_topic_update(f"/linkgroup {tmp_path}"))
+        handler.handle_message(_topic_update("/newtopic refactor"))
+        assert bridge._topic_index.pending[str(GROUP)] == (55, "refactor")
+        assert calls[-1]["data"]["message_thread_id"] == 55
+
+
+class TestHookTopics:
+    def test_stop_hook_posts_into_topic(self, tmp_path):
+        transcript = tmp_path / "sess-top.jsonl"
+        transcript.write_text("\n".join(json.dumps(e, separators=(",", ":")) for e in [
+            {"type": "user", "message": {"content": "hi"}},
+            {"type": "assistant", "message": {"content": [{"type": "text", "text": "done"}]}},
+        ]) + "\n")
+        claude = tmp_path / ".claude"
+        claude.mkdir()
+        (claude / "session_chat_map.json").write_text(json.dumps({"sess-top": {"owner": "1", "watchers": ["2"]}}))
+        (claude / "group_project_map.json").write_text(json.dumps(
+            {str(GROUP): {"project_path": "/p", "topics": {"sess-top": {"thread_id": 7}}}}))
+        with FakeTelegram() as fake:
+            env = {**os.environ, "HOME": str(tmp_path), "TELEGRAM_BOT_TOKEN": "1:T",
+                   "TELEGRAM_API_BASE": fake.base_url}
+            subprocess.run(["bash", str(PROJECT_DIR / "hooks/send-to-telegram.sh")],
+                           input=json.dumps({"transcript_path": str(transcript)}),
+                           env=env, capture_output=True, text=True, timeout=30, check=True)
+            calls = fake.calls("sendMessage")
+        targets = sorted((c["data"]["chat_id"], c["data"].get("message_thread_id")) for c in calls)
+        assert targets == [(str(GROUP), 7), ("2", None)]
@@ -0,0 +1,122 @@
+"""Tests for webhook retry detection (update_id tracking) in bridge.py."""
+
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+import bridge
+
+
+def _post(handler, update):
+    """Feed a raw update through Handler.do_POST."""
+    body = json.dumps(update).encode()
+    handler.rfile = io.BytesIO(body)
+    handler.wfile = io.BytesIO()
+    handler.headers = {"Content-Length": str(len(body))}
+    handler.send_response = MagicMock()
+    handler.end_headers = MagicMock()
+    handler.do_POST()
+
+
+@pytest.fixture
+def handler(handler):
+    handler.handle_message = MagicMock()
+    handler.handle_callback = MagicMock()
+    return handler
+
+
+class TestUpdateTracker:
+    def test_new_then_duplicate(self, tmp_claude_dir):
+        tracker = bridge.UpdateTracker()
+        assert tracker.check_and_mark(100) is True
+        assert tracker.check_and_mark(100) is False
+
+    def test_window_evicts_into_watermark(self, tmp_claude_dir):
+        tracker = bridge.UpdateTracker(max_recent=3)
+        for uid in (1, 2, 3, 4):
+            assert tracker.check_and_mark(uid) is True
+        assert tracker.watermark == 1
+        assert tracker.check_and_mark(1) is False
+        assert len(tracker._recent) == 3
+
+    def test_out_of_order_within_window(self, tmp_claude_dir):
+        tracker = bridge.UpdateTracker()
+        assert tracker.check_and_mark(10) is True
+        assert tracker.check_and_mark(8) is True
+        assert tracker.check_and_mark(8) is False
+
+    def test_state_persists_across_instances(self, tmp_claude_dir):
+        bridge.UpdateTracker(max_recent=2).check_and_mark(5)
+        fresh = bridge.UpdateTracker(max_recent=2)
+        assert fresh.check_and_mark(5) is False
+        assert fresh.check_and_mark(6) is True
+
+    def test_corrupt_state_file_ignored(self, tmp_claude_dir):
+        with open(bridge.UPDATE_STATE_FILE, "w") as f:
+            f.write("not json")
+        assert bridge.UpdateTracker().check_and_mark(1) is True
+
+
+class TestDoPostDedup:
+    def test_retry_dropped_and_counted(self, handler, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "_update_tracker", bridge.UpdateTracker())
+        monkeypatch.setattr(bridge, "_metrics", {})
+        update = {"update_id": 42, "message": {"text": "hi", "chat": {"id": 1}}}
+        _post(handler, update)
+        _post(handler, update)
+        assert handler.handle_message.call_count == 1
+        assert bridge.get_metrics()["duplicate_updates"] == 1
+        assert handler.wfile.getvalue() == b"OK"
+
+    def test_update_without_id_still_handled(self, handler, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "_update_tracker", bridge.UpdateTracker())
+        _post(handler, {"callback_query": {"id": "x", "data": "resume:a"}})
+        _post(handler, {"callback_query": {"id": "x", "data": "resume:a"}})
+        assert handler.handle_callback.call_count == 2
+
+
+class TestFirstUpdateMetric:
+    def test_recorded_once(self, handler, tmp_claude_dir, monkeypatch):
+        monkeypatch.setattr(bridge, "_update_tracker", bridge.UpdateTracker())
+        monkeypatch.setattr(bridge, "_metrics", {})
+        monkeypatch.setattr(bridge, "_started_monotonic", bridge.time.monotonic() - 1.5)
+        _post(handler, {"update_id": 1, "message": {"text": "hi", "chat": {"id": 1}}})
+        first = bridge.get_metrics()["first_update_ms"]
+        assert 1500 <= first < 5000
+        monkeypatch.setattr(bridge, "_started_monotonic", 0)
+        _post(handler, {"update_id": 2, "message": {"text": "hi", "chat": {"id": 1}}})
+        assert bridge.get_metrics()["first_update_ms"] == first
+
+
+class TestEnsureWebhook:
+    def _api(self, monkeypatch, current_url):
+        calls = []
+
+        def _fake(method, data):
+            calls.append(method)
+            if method == "getWebhookInfo":
+                return {"ok": True, "result": {"url": current_url}}
+            return {"ok": True, "result": True}
+
+        monkeypatch.setattr(bridge, "telegram_api", _fake)
+        return calls
+
+    def test_no_reset_when_url_matches(self, monkeypatch):
+        calls = self._api(monkeypatch, "https://bot.example.com")
+        assert bridge.ensure_webhook("https://bot.example.com") == "unchanged"
+        assert calls == ["getWebhookInfo"]
+
+    def test_resets_on_drift(self, monkeypatch):
+        monkeypatch.setattr(bridge, "_metrics", {})
+        calls = self._api(monkeypatch, "https://old.trycloudflare.com")
+        assert bridge.ensure_webhook("https://bot.example.com") == "set"
+        assert calls == ["getWebhookInfo", "setWebhook"]
+        assert bridge.get_metrics()["webhook_resets"] == 1
+
+    def test_noop_without_configured_url(self, monkeypatch):
+        calls = self._api(monkeypatch, "")
+        monkeypatch.setattr(bridge, "WEBHOOK_URL", "")
+        assert bridge.ensure_webhook() == "unchanged"
+        assert calls == []
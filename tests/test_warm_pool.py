@@ -0,0 +1,85 @@
+"""Tests for the warm window pool, against a real tmux server."""
+
+import shutil
+import subprocess
+import time
+
+import pytest
+
+import bridge
+
+pytestmark = pytest.mark.skipif(shutil.which("tmux") is None, reason="needs tmux")
+
+
+@pytest.fixture
+def tmux_server(tmp_path, monkeypatch):
+    """A private tmux server with session 'pooltest' and a fake claude on PATH."""
+    fake_bin = tmp_path / "bin"
+    fake_bin.mkdir()
+    (fake_bin / "claude").write_text("#!/bin/sh\nexec sleep 300\n")
+    (fake_bin / "claude").chmod(0o755)
+    monkeypatch.setenv("TMUX_TMPDIR", str(tmp_path))
+    monkeypatch.delenv("TMUX", raising=False)
+    monkeypatch.setattr(bridge, "TMUX_SESSION", "pooltest")
+    # Non-login shell, so no profile puts a real claude back in front of the fake one
+    shell = f"exec env PATH={fake_bin}:/usr/bin:/bin /bin/sh"
+    dirs = {}
+    for name in ("a", "b", "c"):
+        dirs[name] = tmp_path / name
+        dirs[name].mkdir()
+    subprocess.run(["tmux", "new-session", "-d", "-s", "pooltest", "-c", str(dirs["a"]), shell], check=True)
+    subprocess.run(["tmux", "set-option", "-g", "default-command", shell], check=True)
+    yield dirs
+    subprocess.run(["tmux", "kill-server"], capture_output=True)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _active():
+    return next((wid, cwd) for wid, (active, _, cwd) in bridge.tmux_list_windows().items() if active)
+
+
+class TestWarmPool:
+    def test_park_reuse_evict_and_reap(self, tmux_server, monkeypatch):
+        a, b, c = (str(tmux_server[n].resolve()) for n in "abc")
+        pool = bridge.WarmPool(size=1, idle_seconds=3600)
+        monkeypatch.setattr(bridge, "_warm_pool", pool)
+        bridge.tmux_send_line("claude")
+        window_a, _ = _active()
+        assert _wait_for(lambda: bridge.tmux_list_windows()[window_a][1] == "sleep")
+
+        # Cold: a new window is opened in b and Claude started there
+        assert bridge.tmux_change_project(b) is False
+        window_b, cwd = _active()
+        assert window_b != window_a and cwd == b
+        assert list(pool.parked) == [window_a]
+        assert _wait_for(lambda: bridge.tmux_list_windows()[window_b][1] == "sleep")
+
+        # Warm: back to a selects its still-running window
+        assert bridge.tmux_change_project(a) is True
+        assert _active() == (window_a, a)
+        assert list(pool.parked) == [window_b]
+
+        # Size 1: parking a evicts b, the least recently used
+        assert pool.switch(c) is False
+        windows = bridge.tmux_list_windows()
+        assert window_b not in windows and list(pool.parked) == [window_a]
+        assert _active()[1] == c
+
+        assert pool.reap(now=time.time() + 7200) == [window_a]
+        assert list(bridge.tmux_list_windows()) == [_active()[0]]
+
+    def test_window_whose_claude_exited_is_not_reused(self, tmux_server):
+        a = str(tmux_server["a"].resolve())
+        pool = bridge.WarmPool(size=2, idle_seconds=3600)
+        window_a, _ = _active()  # just a shell, no claude running
+        pool.switch(str(tmux_server["b"]))
+        assert pool.switch(a) is False
+        assert _active()[0] != window_a
@@ -0,0 +1,71 @@
+"""Tests for the /watch diff-based pane mirror."""
+
+from unittest.mock import MagicMock
+
+import bridge
+
+
+def _watcher(monkeypatch):
+    calls = []
+
+    def _fake_api(method, data, spool=True):
+        calls.append((method, data))
+        return {"ok": True, "result": {"message_id": 55}}
+
+    monkeypatch.setattr(bridge, "telegram_api", _fake_api)
+    return bridge.PaneWatcher(1), calls
+
+
+class TestPaneWatcher:
+    def test_first_frame_sends_then_edits_on_change(self, mock_tmux, monkeypatch):
+        w, calls = _watcher(monkeypatch)
+        mock_tmux["pane_content"] = "$ make\nbuilding"
+        assert w.step(now=0) is True
+        mock_tmux["pane_content"] = "$ make\nbuilding\ndone <ok>"
+        w.step(now=1)
+        assert [m for m, _ in calls] == ["sendMessage", "editMessageText"]
+        assert calls[1][1]["message_id"] == 55
+        assert "done &lt;ok&gt;" in calls[1][1]["text"]
+
+    def test_escaped_frame_fits_message_limit(self):
+        for pad in range(4):  # every cut offset inside "&lt;"
+            html = bridge.PaneWatcher._render(["<" * 3000 + "y" * pad])
+            assert len(html) <= 4096
+            assert html.startswith("<pre>&lt;") and html.endswith("&lt;" + "y" * pad + "</pre>")
+
+    def test_unchanged_frame_skips_edit_and_backs_off(self, mock_tmux, monkeypatch):
+        w, calls = _watcher(monkeypatch)
+        w.step(now=0)
+        w.step(now=1)
+        w.step(now=2)
+        assert len(calls) == 1
+        assert w.interval == bridge.WATCH_MIN_INTERVAL * 4
+
+    def test_busy_pane_resets_interval(self, mock_tmux, monkeypatch):
+        w, _ = _watcher(monkeypatch)
+        w.step(now=0)
+        w.step(now=1)
+        mock_tmux["pane_content"] = "\n".join(f"line {i}" for i in range(10))
+        w.step(now=2)
+        assert w.interval == bridge.WATCH_MIN_INTERVAL
+
+    def test_stops_when_idle(self, mock_tmux, monkeypatch):
+        w, calls = _watcher(monkeypatch)
+        w.step(now=0)
+        assert w.step(now=bridge.WATCH_IDLE_TIMEOUT + 1) is False
+        assert "idle" in calls[-1][1]["text"]
+
+
+class TestWatchCommand:
+    def test_off_without_watch(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api):
+        handler.handle_message({"message": {"text": "/watch off", "chat": {"id": 9}}})
+        assert "No active watch" in handler.reply.call_args[0][1]
+
+    def test_start_and_stop(self, handler, tmp_claude_dir, mock_tmux, mock_telegram_api, monkeypatch):
+        started = []
+        monkeypatch.setattr(bridge.threading, "Thread", lambda target, daemon: MagicMock(start=lambda: started.append(target)))
+        handler.handle_message({"message": {"text": "/watch", "chat": {"id": 9}}})
+        assert 9 in bridge._watchers and started
+        handler.handle_message({"message": {"text": "/watch off", "chat": {"id": 9}}})
+        assert 9 not in bridge._watchers
+        assert "stopped" in handler.reply.call_args[0][1]